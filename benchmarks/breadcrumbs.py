@@ -0,0 +1,72 @@
+"""
+Measure requests/sec with breadcrumb collection on and off.
+
+    python benchmarks/breadcrumbs.py [requests]
+"""
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings
+
+settings.configure(
+    DEBUG=False,
+    ALLOWED_HOSTS=['*'],
+    ROOT_URLCONF=__name__,
+    DATABASES={},
+    MIDDLEWARE_CLASSES=(),
+    LOGGING_CONFIG=None,
+)
+
+from django.conf.urls import patterns, url
+from django.http import HttpResponse
+from django.test import Client
+from django.test.utils import override_settings
+
+from slack.breadcrumbs import BreadcrumbHandler
+
+
+logger = logging.getLogger('benchmark')
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+
+def view(request):
+    for i in range(5):
+        logger.info('doing step %d for %s', i, request.path)
+    return HttpResponse('ok')
+
+
+urlpatterns = patterns('', url(r'^$', view))
+
+
+def run(count, middleware):
+    with override_settings(MIDDLEWARE_CLASSES=middleware):
+        client = Client()
+        client.get('/')
+        started = time.time()
+        for _ in range(count):
+            client.get('/')
+        return count / (time.time() - started)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    off = run(count, ())
+    handler = BreadcrumbHandler(size=20)
+    logger.addHandler(handler)
+    on = run(count, ('slack.breadcrumbs.BreadcrumbMiddleware',))
+    logger.removeHandler(handler)
+
+    print('breadcrumbs off %8.1f req/s' % off)
+    print('breadcrumbs on  %8.1f req/s (%.1f%% slower)' % (
+        on, (off - on) / off * 100
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Measure enqueue latency on the host-wide SQLite queue with many processes
+writing at once, and check that every alert reached the database.
+
+    python benchmarks/hostqueue.py [processes] [alerts per process]
+"""
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings
+
+settings.configure(DATABASES={}, LOGGING_CONFIG=None)
+
+from slack.hostqueue import HostQueue
+from slack.reports import Report
+
+
+REPORT = Report(
+    subject='ERROR (EXTERNAL IP): Internal Server Error: /',
+    text='```%s```' % ('Traceback (most recent call last):\n' * 40),
+    message='', html_message=None, fingerprint='0' * 40, level=40
+)
+
+
+def worker(path, count, start, results):
+    queue = HostQueue(path)
+    queue.connect()
+    writer = threading.Thread(target=queue.run_writer)
+    writer.daemon = True
+    writer.start()
+    start.wait()
+    timings = []
+    for _ in range(count):
+        started = time.time()
+        queue.put(REPORT, [({}, '#errors')], REPORT.level)
+        timings.append(time.time() - started)
+        # Spread the alerts out a little, as real errors would be.
+        time.sleep(0.001)
+    queue.flush()
+    results.put(timings)
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'queue.sqlite3')
+    HostQueue(path).connect()
+    try:
+        start = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(
+                target=worker, args=(path, count, start, results)
+            )
+            for _ in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        started = time.time()
+        start.set()
+        timings = []
+        for _ in workers:
+            timings.extend(results.get())
+        elapsed = time.time() - started
+        for process in workers:
+            process.join()
+        stored = sqlite3.connect(path).execute(
+            'SELECT COUNT(*) FROM alerts'
+        ).fetchone()[0]
+    finally:
+        shutil.rmtree(directory)
+
+    timings.sort()
+    print('%d processes, %d alerts, %d stored in %.2fs' % (
+        processes, len(timings), stored, elapsed
+    ))
+    for label, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+        print('%s %7.3f ms' % (label, percentile(timings, fraction) * 1000))
+    print('max %7.3f ms' % (timings[-1] * 1000))
+
+
+if __name__ == '__main__':
+    main()
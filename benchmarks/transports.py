@@ -0,0 +1,82 @@
+"""
+Compare the Web API and incoming-webhook transports against a local stub.
+
+    python benchmarks/transports.py [requests]
+"""
+import os
+import sys
+import threading
+import time
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slack.reports import Report
+from slack.transports import WebAPITransport, WebhookTransport
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Write the response in one segment. Unbuffered, the headers and body
+    # go out separately and Nagle's algorithm holds the body until the
+    # client's delayed ACK, about 40ms per request whatever the transport.
+    wbufsize = -1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = b'{"ok": true, "ts": "1.0"}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def run(transport, destination, report, count):
+    started = time.time()
+    for _ in range(count):
+        transport.send(transport.payload(report, destination), destination)
+    return time.time() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    server = StubServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    url = 'http://127.0.0.1:%d/' % server.server_address[1]
+    report = Report('ERROR: bench', '```%s```' % ('x' * 2000), '', None)
+    destination = {
+        'token': 'bench', 'channel': '#bench', 'icon_url': None,
+        'icon_emoji': None, 'username': 'django', 'url': url,
+    }
+
+    for name, transport in (
+        ('webapi', WebAPITransport(api_url=url)),
+        ('webhook', WebhookTransport()),
+    ):
+        elapsed = run(transport, destination, report, count)
+        print('%-8s %6d requests %8.3fs %8.1f req/s' % (
+            name, count, elapsed, count / elapsed
+        ))
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import hashlib
+import time
+
+from array import array
+
+from django.utils.encoding import force_bytes
+
+
+def key_hash(key):
+    # Fingerprints are already SHA-1 hex digests.
+    if len(key) >= 16:
+        try:
+            return int(key[:16], 16)
+        except ValueError:
+            pass
+    return int(hashlib.sha1(force_bytes(key)).hexdigest()[:16], 16)
+
+
+class BackoffTable(object):
+    """
+    Occurrence counts per fingerprint that signal the 1st, ``base``-th,
+    ``base ** 2``-th, ... occurrence, starting over after ``reset`` seconds
+    without one.
+
+    State lives in three preallocated arrays (tag, count, last seen) of at
+    least ``size`` slots used as an open-addressing hash table, about 24
+    bytes per slot and no Python object per fingerprint. A fingerprint is
+    looked up in ``probes`` consecutive slots; when none is free the least
+    recently seen of them is replaced.
+    """
+    def __init__(self, size=131072, base=10, reset=3600, probes=16,
+                 clock=time.time):
+        if base < 2:
+            raise ValueError('base must be at least 2')
+        capacity = 1
+        while capacity < size:
+            capacity *= 2
+        self.mask = capacity - 1
+        self.base = base
+        self.reset = reset
+        self.probes = probes
+        self.clock = clock
+        self.tags = array('L', [0]) * capacity
+        self.counts = array('L', [0]) * capacity
+        self.seen = array('d', [0.0]) * capacity
+
+    def nbytes(self):
+        return sum(
+            values.itemsize * len(values)
+            for values in (self.tags, self.counts, self.seen)
+        )
+
+    def find(self, key):
+        """Return ``(index, tag, found)`` for ``key``'s slot."""
+        value = key_hash(key)
+        # Tag 0 marks a free slot.
+        tag = (value >> 32) or 1
+        slot = value & self.mask
+        victim = slot
+        for probe in range(self.probes):
+            index = (slot + probe) & self.mask
+            current = self.tags[index]
+            if current == tag:
+                return index, tag, True
+            if current == 0:
+                return index, tag, False
+            if self.seen[index] < self.seen[victim]:
+                victim = index
+        return victim, tag, False
+
+    def observe(self, key):
+        """
+        Count one occurrence of ``key`` and return the count if it should be
+        notified, or None.
+        """
+        now = self.clock()
+        index, tag, found = self.find(key)
+        if not found or now - self.seen[index] > self.reset:
+            self.tags[index] = tag
+            self.counts[index] = 1
+        elif self.counts[index] < 0xffffffff:
+            self.counts[index] += 1
+        self.seen[index] = now
+
+        count = self.counts[index]
+        remainder = count
+        while remainder % self.base == 0:
+            remainder //= self.base
+        return count if remainder == 1 else None
+
+    def count(self, key):
+        index, tag, found = self.find(key)
+        if not found or self.clock() - self.seen[index] > self.reset:
+            return 0
+        return self.counts[index]
@@ -0,0 +1,99 @@
+import logging
+import threading
+import time
+
+from collections import deque
+
+from django.conf import settings
+from django.db import connections
+
+
+_local = threading.local()
+
+
+def get_buffer(size=20):
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is None or buffer.maxlen != size:
+        # Keep the newest entries when the size changes.
+        buffer = _local.buffer = deque(buffer or (), maxlen=size)
+    return buffer
+
+
+def add(level, category, message, args=(), created=None, size=20):
+    get_buffer(size).append(
+        (created or time.time(), level, category, message, args)
+    )
+
+
+def clear():
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is not None:
+        buffer.clear()
+
+
+def format_breadcrumb(breadcrumb):
+    created, level, category, message, args = breadcrumb
+    try:
+        message = message % args if args else '%s' % (message,)
+    except Exception:
+        message = '%s %r' % (message, args)
+    return '%s.%03d %s %s: %s\n' % (
+        time.strftime('%H:%M:%S', time.localtime(created)),
+        created % 1 * 1000, level, category, message
+    )
+
+
+def snapshot():
+    """
+    Return the breadcrumbs recorded on the current thread, oldest first.
+
+    Messages are only formatted here, so recording stays cheap for requests
+    that never fail.
+    """
+    buffer = getattr(_local, 'buffer', None)
+    if not buffer:
+        return []
+    return [format_breadcrumb(breadcrumb) for breadcrumb in list(buffer)]
+
+
+class BreadcrumbHandler(logging.Handler):
+    """
+    Keep the last ``size`` records of the current thread in a ring buffer
+    for SlackHandler to attach to error reports.
+    """
+    def __init__(self, size=20, level=logging.NOTSET):
+        super(BreadcrumbHandler, self).__init__(level)
+        self.size = size
+
+    def handle(self, record):
+        # The buffer is thread-local, so the handler lock is not needed.
+        rv = self.filter(record)
+        if rv:
+            self.emit(record)
+        return rv
+
+    def emit(self, record):
+        add(
+            record.levelname, record.name, record.msg, record.args,
+            record.created, self.size
+        )
+
+
+class BreadcrumbMiddleware(object):
+    """
+    Start every request with an empty breadcrumb buffer. With
+    ``SLACK_BREADCRUMBS_SQL`` the request's queries are logged to
+    ``django.db.backends`` so a BreadcrumbHandler there can record them.
+    """
+    def process_request(self, request):
+        clear()
+        if getattr(settings, 'SLACK_BREADCRUMBS_SQL', False):
+            for connection in connections.all():
+                connection.use_debug_cursor = True
+
+    def process_response(self, request, response):
+        clear()
+        if getattr(settings, 'SLACK_BREADCRUMBS_SQL', False):
+            for connection in connections.all():
+                connection.use_debug_cursor = None
+        return response
@@ -0,0 +1,106 @@
+import sys
+import time
+
+from collections import deque
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Python 2 does not name it; Linux only.
+RUSAGE_THREAD = getattr(resource, 'RUSAGE_THREAD', 1)
+
+
+def thread_cpu_time():
+    """Return the CPU time used by the calling thread."""
+    if hasattr(time, 'thread_time'):
+        return time.thread_time()
+    if resource is not None and sys.platform.startswith('linux'):
+        # Counted in scheduler ticks, which evens out over the window.
+        usage = resource.getrusage(RUSAGE_THREAD)
+        return usage.ru_utime + usage.ru_stime
+    # Process CPU time: in a threaded server the other request threads are
+    # billed to the handler, which can keep it degraded under load.
+    return time.clock()
+
+
+class CpuBudget(object):
+    """
+    CPU time spent by the handler over a sliding ``window`` of seconds,
+    kept as one total per second.
+
+    The handler is degraded once the time spent goes over ``budget`` (a
+    fraction of wall time) and recovers once it falls below ``budget *
+    recover``, so it does not flap around the limit.
+    """
+    def __init__(self, budget=0.02, window=10, recover=0.5, clock=time.time):
+        self.budget = budget
+        self.window = window
+        self.recover = recover
+        self.clock = clock
+        self.seconds = deque()
+        self.total = 0.0
+        self.degraded = False
+        self.degraded_since = None
+        self.transitions = 0
+        self.degraded_records = 0
+        self.degraded_seconds = 0.0
+
+    def usage(self, now=None):
+        """Return the fraction of wall time spent over the window."""
+        self.expire(int(now if now is not None else self.clock()))
+        return self.total / self.window
+
+    def expire(self, second):
+        seconds = self.seconds
+        while seconds and seconds[0][0] <= second - self.window:
+            self.total -= seconds.popleft()[1]
+
+    def record(self, spent):
+        """
+        Add ``spent`` seconds of CPU time. Returns ``'degraded'`` or
+        ``'recovered'`` when the state changes, otherwise None.
+        """
+        now = self.clock()
+        second = int(now)
+        if self.seconds and self.seconds[-1][0] == second:
+            self.seconds[-1][1] += spent
+        else:
+            self.seconds.append([second, spent])
+        self.total += spent
+        if self.degraded:
+            self.degraded_records += 1
+
+        usage = self.usage(now)
+        if not self.degraded and usage > self.budget:
+            self.degraded = True
+            self.degraded_since = now
+        elif self.degraded and usage < self.budget * self.recover:
+            self.degraded = False
+            self.degraded_seconds += now - self.degraded_since
+        else:
+            return None
+        self.transitions += 1
+        return 'degraded' if self.degraded else 'recovered'
+
+    def stats(self):
+        now = self.clock()
+        degraded_seconds = self.degraded_seconds
+        if self.degraded:
+            degraded_seconds += now - self.degraded_since
+        return {
+            'usage': self.usage(now),
+            'degraded': self.degraded,
+            'transitions': self.transitions,
+            'degraded_records': self.degraded_records,
+            'degraded_seconds': degraded_seconds,
+        }
+
+
+def innermost_frame(tb):
+    while tb.tb_next is not None:
+        tb = tb.tb_next
+    code = tb.tb_frame.f_code
+    return '%s:%d in %s' % (code.co_filename, tb.tb_lineno, code.co_name)
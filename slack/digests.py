@@ -0,0 +1,11 @@
+def format_top_errors(top, total, window, annotate=None):
+    lines = ['Top errors in the last %d minutes (%d records):' % (
+        window // 60, total
+    )]
+    for key, count, error, label in top:
+        note = annotate(key) if annotate is not None else None
+        lines.append('%6d%s  %s%s' % (
+            count, ' (+/-%d)' % error if error else '', label,
+            ' [%s]' % note if note else ''
+        ))
+    return '\n'.join(lines)
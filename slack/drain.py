@@ -0,0 +1,117 @@
+import re
+
+from collections import OrderedDict
+
+
+WILDCARD = '<*>'
+
+# Tokens containing a digit are almost always variables.
+NUMERIC_TOKENS = re.compile(r'\S*\d\S*')
+
+
+class Cluster(object):
+    """
+    A template and where it sits in the tree. ``id`` is the template it
+    started as; it never changes, so it can identify the group while
+    ``tokens`` generalize.
+    """
+    __slots__ = ('id', 'tokens', 'leaf', 'path')
+
+    def __init__(self, tokens, leaf, path):
+        self.id = ' '.join(tokens)
+        self.tokens = tokens
+        self.leaf = leaf
+        self.path = path
+
+    @property
+    def template(self):
+        return ' '.join(self.tokens)
+
+
+class TemplateMiner(object):
+    """
+    Online log template extraction in the style of Drain.
+
+    A message is split into tokens, and tokens with a digit are replaced
+    by ``<*>``. A fixed-depth tree sends it to a leaf by its token count
+    and its first ``depth - 2`` tokens (at most ``max_children`` distinct
+    tokens per node, the rest share ``<*>``). Within the leaf it joins the
+    template sharing the largest fraction of tokens at the same positions,
+    if that is at least ``similarity``, and positions that differ become
+    ``<*>``; otherwise it starts a template of its own.
+
+    At most ``max_clusters`` templates are kept, least recently matched
+    first out, so memory and the cost of a lookup stay bounded.
+    """
+    def __init__(self, depth=4, similarity=0.4, max_children=100,
+                 max_clusters=1000, max_tokens=64):
+        self.depth = depth
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.max_tokens = max_tokens
+        self.root = {}
+        self.clusters = OrderedDict()
+
+    def tokenize(self, message):
+        tokens = NUMERIC_TOKENS.sub(WILDCARD, message).split()
+        return tokens[:self.max_tokens]
+
+    def leaf(self, tokens):
+        # Also returns the (node, key) pairs leading to the leaf.
+        keys = [len(tokens)] + tokens[:max(0, self.depth - 2)]
+        node = self.root
+        path = []
+        for index, key in enumerate(keys):
+            if key not in node and len(node) >= self.max_children:
+                key = WILDCARD
+            path.append((node, key))
+            if index == len(keys) - 1:
+                return node.setdefault(key, []), path
+            node = node.setdefault(key, {})
+
+    def match(self, leaf, tokens):
+        best = None
+        best_score = -1.0
+        for cluster in leaf:
+            same = 0
+            for template, token in zip(cluster.tokens, tokens):
+                if template == token:
+                    same += 1
+            score = float(same) / len(tokens) if tokens else 1.0
+            if score > best_score:
+                best, best_score = cluster, score
+        if best is not None and best_score >= self.similarity:
+            return best
+        return None
+
+    def add(self, message):
+        """Return the template of ``message``, learning from it."""
+        return self.learn(message).template
+
+    def learn(self, message):
+        """Return the cluster of ``message``, learning from it."""
+        tokens = self.tokenize(message)
+        leaf, path = self.leaf(tokens)
+        cluster = self.match(leaf, tokens)
+        if cluster is None:
+            cluster = Cluster(tokens, leaf, path)
+            leaf.append(cluster)
+        else:
+            cluster.tokens = [
+                template if template == token else WILDCARD
+                for template, token in zip(cluster.tokens, tokens)
+            ]
+            self.clusters.pop(cluster)
+        self.clusters[cluster] = None
+        if len(self.clusters) > self.max_clusters:
+            self.evict(self.clusters.popitem(last=False)[0])
+        return cluster
+
+    def evict(self, cluster):
+        cluster.leaf.remove(cluster)
+        # Prune the branches left empty.
+        for node, key in reversed(cluster.path):
+            if node[key]:
+                break
+            del node[key]
@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+
+from multiprocessing.pool import ThreadPool
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+# Can be reported for tasks that never ran; see fan_out.
+SKIPPED = object()
+
+
+def get_pool(size):
+    global _pool, _pool_pid
+    with _pool_lock:
+        # Worker threads do not survive a fork (e.g. gunicorn --preload), so
+        # every process gets its own pool.
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadPool(size)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+class Task(object):
+    """A call that can be cancelled until a worker starts it."""
+    def __init__(self, func, args, timeout):
+        self.func = func
+        self.args = args
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.started = None
+        self.cancelled = False
+        self.result = None
+
+    def run(self):
+        with self.lock:
+            if self.cancelled:
+                return
+            self.started = time.time()
+        try:
+            self.result = self.func(*self.args)
+        except Exception:
+            pass
+        finally:
+            self.done.set()
+
+    def cancel(self):
+        """Return True if the task will not run."""
+        with self.lock:
+            if self.started is None:
+                self.cancelled = True
+            return self.cancelled
+
+
+def fan_out(tasks, pool_size=4, skipped=None):
+    """
+    Run ``(func, args, timeout)`` tasks in parallel on the shared pool.
+
+    Every task is given its own deadline measured from dispatch, so waiting
+    on a slow task never eats into the time budget of the others. A task
+    still queued at its deadline is cancelled and reported as ``skipped``;
+    as it never runs, sending it again later cannot duplicate it. A task
+    that has started is given its full timeout from its start. Tasks that
+    run out of time or raise are reported as ``None``.
+    """
+    pool = get_pool(pool_size)
+    started = time.time()
+    pending = []
+    for func, args, timeout in tasks:
+        task = Task(func, args, timeout)
+        pool.apply_async(task.run)
+        pending.append((task, started + timeout))
+
+    results = []
+    for task, deadline in pending:
+        if not task.done.wait(max(0, deadline - time.time())):
+            if task.cancel():
+                results.append(skipped)
+                continue
+            task.done.wait(max(0, task.started + task.timeout - time.time()))
+        results.append(task.result if task.done.is_set() else None)
+    return results
@@ -0,0 +1,47 @@
+import hashlib
+
+from django.utils.encoding import force_text
+
+
+def message_template(record):
+    """
+    Return the message of ``record`` with its variable parts left out: the
+    template mined by the handler if it set one, otherwise the unformatted
+    ``record.msg``.
+    """
+    return getattr(record, 'slack_template', None) or force_text(record.msg)
+
+
+def fingerprint(record):
+    """
+    Identify records that come from the same error.
+
+    Exceptions are keyed on their type and the code path of the traceback;
+    line numbers are left out so a fingerprint survives unrelated edits.
+    Other records are keyed on their logger, level and message template,
+    or the id of the mined template, which stays the same as it generalizes.
+    """
+    if record.exc_info and record.exc_info[0] is not None:
+        exc_type, exc_value, tb = record.exc_info
+        parts = ['%s.%s' % (exc_type.__module__, exc_type.__name__)]
+        while tb is not None:
+            code = tb.tb_frame.f_code
+            parts.append('%s:%s' % (code.co_filename, code.co_name))
+            tb = tb.tb_next
+    else:
+        parts = [
+            record.name, record.levelname,
+            getattr(record, 'slack_template_id', None) or
+            message_template(record)
+        ]
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def describe(record, max_length=100):
+    if record.exc_info and record.exc_info[0] is not None:
+        label = '%s: %s' % (
+            record.exc_info[0].__name__, force_text(record.exc_info[1])
+        )
+    else:
+        label = '%s: %s' % (record.levelname, message_template(record))
+    return label[:max_length]
@@ -0,0 +1,126 @@
+import time
+
+from collections import OrderedDict
+
+
+class ClientState(object):
+    __slots__ = ('window', 'count', 'previous', 'seen')
+
+    def __init__(self, window):
+        self.window = window
+        self.count = 0
+        self.previous = 0
+        self.seen = None
+
+
+class Flood(object):
+    __slots__ = ('collapsed', 'since')
+
+    def __init__(self, since):
+        self.collapsed = 0
+        self.since = since
+
+
+class ClientFloods(object):
+    """
+    Sliding-window error counts per client (an IP or a user) that collapse
+    a client's errors once it causes ``threshold`` of them within
+    ``window`` seconds.
+
+    The window is estimated from the counts of the current and previous
+    fixed windows, so each client costs a few integers and ``observe`` is
+    O(1). At most ``max_clients`` clients are tracked, least recently seen
+    first out, and at most ``max_floods`` are collapsed at once.
+    """
+    def __init__(self, window=60, threshold=20, max_clients=10000,
+                 max_floods=100, summary_interval=600, clock=time.time):
+        self.window = window
+        self.threshold = threshold
+        self.max_clients = max_clients
+        self.max_floods = max_floods
+        self.summary_interval = summary_interval
+        self.clock = clock
+        self.clients = OrderedDict()
+        self.floods = {}
+        self.swept = clock()
+
+    def estimate(self, state, now):
+        position = now / float(self.window)
+        window = int(position)
+        remaining = 1 - (position - window)
+        if window == state.window:
+            return state.count + state.previous * remaining
+        if window == state.window + 1:
+            return state.count * remaining
+        return 0
+
+    def observe(self, client):
+        """
+        Count one error caused by ``client``. Returns False if it is part
+        of a flood and should not be sent on its own.
+        """
+        now = self.clock()
+        window = int(now // self.window)
+        state = self.clients.pop(client, None)
+        if state is None:
+            state = ClientState(window)
+        elif state.window != window:
+            state.previous = state.count if state.window == window - 1 else 0
+            state.count = 0
+            state.window = window
+        state.count += 1
+        state.seen = now
+        self.clients[client] = state
+        if len(self.clients) > self.max_clients:
+            self.clients.popitem(last=False)
+
+        flood = self.floods.get(client)
+        if flood is None:
+            if self.estimate(state, now) < self.threshold or (
+                len(self.floods) >= self.max_floods
+            ):
+                return True
+            flood = self.floods[client] = Flood(now)
+        flood.collapsed += 1
+        return False
+
+    def sweep(self):
+        """
+        At most once per window, forget clients idle for two windows and
+        return ``(client, count, seconds)`` for each flood that ended, or
+        has gone ``summary_interval`` seconds without a summary.
+        """
+        now = self.clock()
+        if now - self.swept < self.window:
+            return []
+        self.swept = now
+
+        # Least recently seen first, so the idle ones are all at the front.
+        while self.clients:
+            client = next(iter(self.clients))
+            if now - self.clients[client].seen < 2 * self.window:
+                break
+            del self.clients[client]
+
+        summaries = []
+        for client, flood in list(self.floods.items()):
+            state = self.clients.get(client)
+            ended = state is None or (
+                self.estimate(state, now) < self.threshold
+            )
+            if not ended and now - flood.since < self.summary_interval:
+                continue
+            if flood.collapsed:
+                summaries.append((client, flood.collapsed, now - flood.since))
+            if ended:
+                del self.floods[client]
+            else:
+                flood.collapsed = 0
+                flood.since = now
+        return summaries
+
+
+def format_flood(client, count, seconds):
+    return 'Client %s caused %d errors in %d minutes' % (
+        client, count, max(1, int(round(seconds / 60.0)))
+    )
@@ -0,0 +1,79 @@
+import time
+
+try:
+    import reprlib
+except ImportError:
+    import repr as reprlib
+
+from django.db.models.query import QuerySet
+from django.utils.functional import empty, LazyObject, Promise
+
+
+def bounded_repr(max_length):
+    r = reprlib.Repr()
+    r.maxstring = max_length
+    r.maxother = max_length
+    r.maxlong = max_length
+    r.maxlevel = 3
+    r.maxdict = r.maxlist = r.maxtuple = r.maxset = r.maxfrozenset = 10
+    return r
+
+
+def lazy_repr(value):
+    value_type = type(value)
+    if issubclass(value_type, QuerySet) and value._result_cache is None:
+        return '<unevaluated %s>' % value_type.__name__
+    if issubclass(value_type, LazyObject) and value._wrapped is empty:
+        return '<lazy object>'
+    if issubclass(value_type, Promise):
+        return '<lazy %s>' % value_type.__name__
+    return None
+
+
+def innermost_frames(tb, count):
+    frames = []
+    while tb is not None:
+        frames.append(tb)
+        tb = tb.tb_next
+    return reversed(frames[-count:])
+
+
+def format_locals(tb, max_frames=3, max_length=200, max_frame_length=2000,
+                  time_budget=0.05, filter=None, request=None,
+                  clock=time.time):
+    """
+    Yield the local variables of the innermost ``max_frames`` frames.
+
+    Every value goes through a bounded repr, each frame stops after
+    ``max_frame_length`` characters, and capturing stops once
+    ``time_budget`` seconds have been spent. Unevaluated querysets and lazy
+    objects are never forced.
+    """
+    deadline = clock() + time_budget
+    r = bounded_repr(max_length)
+
+    for tb in innermost_frames(tb, max_frames):
+        frame = tb.tb_frame
+        yield 'File "%s", line %d, in %s\n' % (
+            frame.f_code.co_filename, tb.tb_lineno, frame.f_code.co_name
+        )
+        if filter is not None:
+            variables = filter.get_traceback_frame_variables(request, frame)
+        else:
+            variables = frame.f_locals.items()
+
+        length = 0
+        for name, value in sorted(variables, key=lambda item: item[0]):
+            if clock() > deadline:
+                yield '    <time budget exceeded>\n'
+                return
+            if length > max_frame_length:
+                yield '    ...\n'
+                break
+            try:
+                value_repr = lazy_repr(value) or r.repr(value)
+            except Exception:
+                value_repr = '<repr() failed>'
+            line = '    %s = %s\n' % (name, value_repr)
+            length += len(line)
+            yield line
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+FILTERS = (
+    ('logger', 'logger'),
+    ('level', 'level'),
+    ('type', 'exception_type'),
+    ('fingerprint', 'fingerprint'),
+)
+
+
+def page_size(value, default=50, maximum=500):
+    try:
+        return max(1, min(int(value), maximum))
+    except (TypeError, ValueError):
+        return default
+
+
+def as_utc(value):
+    if settings.USE_TZ and timezone.is_naive(value):
+        return timezone.make_aware(value, timezone.utc)
+    return value
+
+
+def parse_time(value):
+    value = parse_datetime(value or '')
+    return as_utc(value) if value is not None else None
+
+
+def encode_cursor(event):
+    timestamp = event.timestamp
+    if timezone.is_aware(timestamp):
+        timestamp = timestamp.astimezone(timezone.utc)
+    return '%s_%d' % (timestamp.strftime('%Y%m%d%H%M%S%f'), event.pk)
+
+
+def decode_cursor(cursor):
+    try:
+        timestamp, pk = cursor.split('_')
+        timestamp = datetime.strptime(timestamp, '%Y%m%d%H%M%S%f')
+        return as_utc(timestamp), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def filter_events(queryset, params):
+    for param, field in FILTERS:
+        if params.get(param):
+            queryset = queryset.filter(**{field: params[param]})
+    since = parse_time(params.get('since'))
+    if since is not None:
+        queryset = queryset.filter(timestamp__gte=since)
+    until = parse_time(params.get('until'))
+    if until is not None:
+        queryset = queryset.filter(timestamp__lt=until)
+    return queryset
+
+
+def keyset_page(queryset, cursor=None, size=50):
+    """
+    Return ``(events, next_cursor)`` for the page after ``cursor``.
+
+    Pages are addressed by the ``(timestamp, id)`` of their last row, so
+    each page is an index range scan instead of an OFFSET over everything
+    before it.
+    """
+    queryset = queryset.order_by('-timestamp', '-id')
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        timestamp, pk = position
+        queryset = queryset.filter(
+            Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk)
+        )
+    events = list(queryset[:size + 1])
+    if len(events) > size:
+        return events[:size], encode_cursor(events[size - 1])
+    return events, None
+
+
+def approximate_count(queryset, limit=1000):
+    """
+    Count ``queryset`` without scanning more than ``limit`` rows. Returns
+    ``(count, exact)``. An unfiltered table on PostgreSQL is estimated
+    from the planner statistics.
+    """
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        cursor = connection.cursor()
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE relname = %s',
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+        if row is not None and row[0] > limit:
+            return int(row[0]), False
+    count = queryset[:limit + 1].count()
+    if count > limit:
+        return limit, False
+    return count, True
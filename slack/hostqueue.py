@@ -0,0 +1,302 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from contextlib import contextmanager
+
+from slack.fanout import SKIPPED, fan_out
+from slack.outbox import ChannelLimiter, decode_report, encode_report
+
+
+SCHEMA = (
+    # Must precede the first table to take effect.
+    'PRAGMA auto_vacuum = INCREMENTAL',
+    'PRAGMA journal_mode = WAL',
+    'CREATE TABLE IF NOT EXISTS alerts ('
+    'id INTEGER PRIMARY KEY, priority INTEGER NOT NULL, '
+    'enqueued REAL NOT NULL, available REAL NOT NULL, '
+    'attempts INTEGER NOT NULL DEFAULT 0, channel TEXT NOT NULL, '
+    'destination TEXT NOT NULL, report TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS alerts_priority '
+    'ON alerts (priority DESC, enqueued)',
+    'CREATE TABLE IF NOT EXISTS leader ('
+    'id INTEGER PRIMARY KEY, pid INTEGER NOT NULL, expires REAL NOT NULL)',
+    'INSERT OR IGNORE INTO leader VALUES (0, 0, 0)',
+)
+
+
+@contextmanager
+def immediate(connection):
+    # Take the write lock up front so a transaction never has to upgrade
+    # (and possibly deadlock) halfway through.
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        yield connection
+    except BaseException:
+        connection.execute('ROLLBACK')
+        raise
+    connection.execute('COMMIT')
+
+
+class HostQueue(object):
+    """
+    Alert queue shared by every process on the host, kept in a SQLite
+    database in WAL mode.
+
+    ``put`` only appends to an in-process buffer. A writer thread commits
+    the buffer every ``flush_interval`` seconds as one short ``BEGIN
+    IMMEDIATE`` transaction, so the logging call never waits on the
+    database lock; the buffer is also flushed at exit. At most
+    ``max_buffer`` rows are held if the database cannot be written.
+
+    One process at a time holds the ``leader`` lease and drains the queue
+    in priority order, so channel rate limits apply to the whole host and
+    queued alerts survive worker restarts. Rows older than ``max_age``
+    seconds are purged ``purge_batch`` at a time.
+    """
+    def __init__(self, path, flush_interval=0.01, max_buffer=10000,
+                 batch_size=50, lease=10, interval=0.5, max_attempts=5,
+                 retry_delay=10, max_age=86400, purge_batch=500, timeout=5,
+                 pool_size=4, limiter=None, busy_timeout=5, background=True,
+                 clock=time.time):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.lease = lease
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_age = max_age
+        self.purge_batch = purge_batch
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.limiter = limiter or ChannelLimiter()
+        self.busy_timeout = busy_timeout
+        self.background = background
+        self.clock = clock
+        self.buffer = []
+        self.dropped = 0
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.workers = None
+        self.workers_pid = None
+        atexit.register(self.flush)
+
+    def connect(self):
+        # sqlite3 connections must not cross threads or a fork.
+        local = self.local
+        if getattr(local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=self.busy_timeout, isolation_level=None
+            )
+            connection.execute('PRAGMA synchronous = NORMAL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
+
+    def put(self, report, destinations, priority=0):
+        """Queue ``report`` for each ``(destination, channel)`` pair."""
+        now = self.clock()
+        data = encode_report(report)
+        rows = [
+            (priority, now, now, channel, json.dumps(destination), data)
+            for destination, channel in destinations
+        ]
+        with self.lock:
+            if len(self.buffer) + len(rows) > self.max_buffer:
+                self.dropped += len(rows)
+                return
+            self.buffer.extend(rows)
+        if self.background:
+            self.wakeup.set()
+        else:
+            self.flush()
+
+    def flush(self):
+        # Serialized so that a flush at exit waits for one in progress.
+        with self.flush_lock:
+            return self.write_buffer()
+
+    def write_buffer(self):
+        with self.lock:
+            rows, self.buffer = self.buffer, []
+        if not rows:
+            return 0
+        try:
+            with immediate(self.connect()) as connection:
+                connection.executemany(
+                    'INSERT INTO alerts (priority, enqueued, available, '
+                    'channel, destination, report) VALUES (?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+        except sqlite3.Error:
+            with self.lock:
+                room = max(0, self.max_buffer - len(self.buffer))
+                self.buffer[:0] = rows[:room]
+                self.dropped += len(rows) - min(room, len(rows))
+            return 0
+        return len(rows)
+
+    def elect(self):
+        """Take or renew the drainer lease; returns True if we hold it."""
+        now = self.clock()
+        pid = os.getpid()
+        connection = self.connect()
+        # A plain read does not contend with writers in WAL mode, so the
+        # other processes only check the lease instead of writing it.
+        holder, expires = connection.execute(
+            'SELECT pid, expires FROM leader WHERE id = 0'
+        ).fetchone()
+        if holder != pid and expires >= now:
+            return False
+        cursor = connection.execute(
+            'UPDATE leader SET pid = ?, expires = ? '
+            'WHERE id = 0 AND (pid = ? OR expires < ?)',
+            (pid, now + self.lease, pid, now)
+        )
+        return cursor.rowcount == 1
+
+    def drain(self, send, give_up):
+        """
+        Send one batch of due alerts with ``send(report, destination,
+        timeout)`` and return ``(sent, failed, deferred)``. ``give_up`` is
+        called with reports that failed ``max_attempts`` times.
+        """
+        connection = self.connect()
+        now = self.clock()
+        with immediate(connection):
+            rows = connection.execute(
+                'SELECT id, attempts, channel, destination, report '
+                'FROM alerts WHERE available <= ? '
+                'ORDER BY priority DESC, enqueued LIMIT ?',
+                (now, self.batch_size)
+            ).fetchall()
+            # Hold the batch until the round is over, so a process taking
+            # the lease meanwhile does not send it again. A round takes at
+            # most twice the timeout; the rows come back by themselves if
+            # this process dies.
+            connection.executemany(
+                'UPDATE alerts SET available = ? WHERE id = ?',
+                [(now + self.lease + 2 * self.timeout, row[0]) for row in rows]
+            )
+
+        ready = []
+        deferred = []
+        for row in rows:
+            wait = self.limiter.delay(row[2])
+            if wait:
+                deferred.append((now + wait, row[0]))
+            else:
+                ready.append(row)
+
+        results = fan_out([
+            (send, (decode_report(row[4]), json.loads(row[3]), self.timeout),
+             self.timeout)
+            for row in ready
+        ], self.pool_size, skipped=SKIPPED) if ready else []
+
+        delivered = []
+        failed = []
+        for row, ok in zip(ready, results):
+            if ok is SKIPPED:
+                # Never sent, so not an attempt.
+                deferred.append((now, row[0]))
+            elif ok:
+                delivered.append(row)
+            else:
+                failed.append(row)
+        done = [(row[0],) for row in delivered]
+        retries = []
+        expired = []
+        for row in failed:
+            if row[1] + 1 >= self.max_attempts:
+                done.append((row[0],))
+                expired.append(row[4])
+            else:
+                retries.append((
+                    row[1] + 1, now + self.retry_delay * 2 ** row[1], row[0]
+                ))
+
+        with immediate(connection):
+            connection.executemany('DELETE FROM alerts WHERE id = ?', done)
+            connection.executemany(
+                'UPDATE alerts SET available = ? WHERE id = ?', deferred
+            )
+            connection.executemany(
+                'UPDATE alerts SET attempts = ?, available = ? WHERE id = ?',
+                retries
+            )
+
+        for data in expired:
+            give_up(decode_report(data))
+        return len(delivered), len(failed), len(deferred)
+
+    def purge(self):
+        """Drop up to ``purge_batch`` expired alerts and free their pages."""
+        connection = self.connect()
+        with immediate(connection):
+            deleted = connection.execute(
+                'DELETE FROM alerts WHERE id IN (SELECT id FROM alerts '
+                'WHERE enqueued < ? ORDER BY id LIMIT ?)',
+                (self.clock() - self.max_age, self.purge_batch)
+            ).rowcount
+        connection.execute('PRAGMA incremental_vacuum(%d)' % self.purge_batch)
+        return deleted
+
+    def start(self, send, give_up):
+        if self.workers is not None and self.workers_pid == os.getpid():
+            return
+        with self.lock:
+            if self.workers is None or self.workers_pid != os.getpid():
+                self.workers = [
+                    threading.Thread(target=self.run_writer),
+                    threading.Thread(
+                        target=self.run_drainer, args=(send, give_up)
+                    ),
+                ]
+                self.workers_pid = os.getpid()
+                for worker in self.workers:
+                    worker.daemon = True
+                    worker.start()
+
+    def run_writer(self):
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            # Let the rows logged in the meantime join this transaction.
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def run_drainer(self, send, give_up):
+        purged = 0
+        while True:
+            busy = False
+            try:
+                if self.elect():
+                    busy = any(self.drain(send, give_up))
+                    if self.clock() - purged >= 60:
+                        purged = self.clock()
+                        self.purge()
+            except sqlite3.Error:
+                pass
+            if not busy:
+                time.sleep(self.interval)
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_host_queue(path, **kwargs):
+    with _queues_lock:
+        if path not in _queues:
+            _queues[path] = HostQueue(path, **kwargs)
+        return _queues[path]
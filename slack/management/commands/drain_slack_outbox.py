@@ -0,0 +1,85 @@
+import time
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from slack.outbox import ChannelLimiter, Drainer, backlog
+from slack.utils import SlackHandler
+
+
+class Command(BaseCommand):
+    help = (
+        'Send the alerts queued in the Slack outbox. Run several copies to '
+        'send in parallel.'
+    )
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--batch-size', type='int', default=50,
+            help='Messages claimed per round.'
+        ),
+        make_option(
+            '--interval', type='float', default=1,
+            help='Seconds to wait when nothing is due.'
+        ),
+        make_option(
+            '--report-interval', type='float', default=60,
+            help='Seconds between throughput and lag reports.'
+        ),
+        make_option(
+            '--once', action='store_true', default=False,
+            help='Exit once nothing is due instead of waiting.'
+        ),
+        make_option(
+            '--transport', default=None,
+            help='Transport used for destinations that do not set one.'
+        ),
+    )
+
+    def handle(self, *args, **options):
+        handler = SlackHandler(transport=options['transport'])
+        using = handler.app_setting('OUTBOX_DATABASE', 'default')
+        drainer = Drainer(
+            handler,
+            batch_size=options['batch_size'],
+            lease=handler.app_setting('OUTBOX_LEASE', 60),
+            max_attempts=handler.app_setting('OUTBOX_MAX_ATTEMPTS', 5),
+            retry_delay=handler.app_setting('OUTBOX_RETRY_DELAY', 10),
+            timeout=handler.app_setting('FANOUT_TIMEOUT', 5),
+            pool_size=handler.app_setting('FANOUT_POOL_SIZE', 4),
+            limiter=ChannelLimiter(
+                rate=handler.app_setting('OUTBOX_CHANNEL_RATE', 1),
+                burst=handler.app_setting('OUTBOX_CHANNEL_BURST', 3)
+            ),
+            using=using
+        )
+
+        totals = [0, 0, 0]
+        started = reported = time.time()
+        while True:
+            counts = drainer.drain()
+            for index, count in enumerate(counts):
+                totals[index] += count
+
+            idle = not any(counts)
+            now = time.time()
+            if now - reported >= options['report_interval'] or (
+                idle and options['once']
+            ):
+                self.report(totals, now - started, using)
+                reported = now
+            if idle:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+
+    def report(self, totals, elapsed, using):
+        sent, failed, deferred = totals
+        pending, lag = backlog(using)
+        self.stdout.write(
+            '%d sent (%.1f/s), %d failed, %d deferred; %d pending, '
+            'lag %.1fs' % (
+                sent, sent / max(elapsed, 0.001), failed, deferred,
+                pending, lag
+            )
+        )
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'ErrorGroup'
+        db.create_table(u'slack_errorgroup', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('fingerprint', self.gf('django.db.models.fields.CharField')(unique=True, max_length=40)),
+            ('logger', self.gf('django.db.models.fields.CharField')(max_length=200)),
+            ('level', self.gf('django.db.models.fields.CharField')(max_length=20)),
+            ('label', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('first_seen', self.gf('django.db.models.fields.DateTimeField')()),
+            ('last_seen', self.gf('django.db.models.fields.DateTimeField')(db_index=True)),
+            ('count', self.gf('django.db.models.fields.PositiveIntegerField')(default=0)),
+        ))
+        db.send_create_signal(u'slack', ['ErrorGroup'])
+
+    def backwards(self, orm):
+        # Deleting model 'ErrorGroup'
+        db.delete_table(u'slack_errorgroup')
+
+    models = {
+        u'slack.errorgroup': {
+            'Meta': {'ordering': "('-last_seen',)", 'object_name': 'ErrorGroup'},
+            'count': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'fingerprint': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '40'}),
+            'first_seen': ('django.db.models.fields.DateTimeField', [], {}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'label': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'last_seen': ('django.db.models.fields.DateTimeField', [], {'db_index': 'True'}),
+            'level': ('django.db.models.fields.CharField', [], {'max_length': '20'}),
+            'logger': ('django.db.models.fields.CharField', [], {'max_length': '200'})
+        }
+    }
+
+    complete_apps = ['slack']
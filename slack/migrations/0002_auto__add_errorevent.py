@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'ErrorEvent'
+        db.create_table(u'slack_errorevent', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('fingerprint', self.gf('django.db.models.fields.CharField')(max_length=40)),
+            ('logger', self.gf('django.db.models.fields.CharField')(max_length=200)),
+            ('level', self.gf('django.db.models.fields.CharField')(max_length=20)),
+            ('exception_type', self.gf('django.db.models.fields.CharField')(max_length=200, blank=True)),
+            ('path', self.gf('django.db.models.fields.CharField')(max_length=255, blank=True)),
+            ('timestamp', self.gf('django.db.models.fields.DateTimeField')()),
+        ))
+        db.send_create_signal(u'slack', ['ErrorEvent'])
+
+        # Adding index on 'ErrorEvent', fields ['timestamp', 'id']
+        db.create_index(u'slack_errorevent', ['timestamp', u'id'])
+
+        # Adding index on 'ErrorEvent', fields ['fingerprint', 'timestamp']
+        db.create_index(u'slack_errorevent', ['fingerprint', 'timestamp'])
+
+        # Adding index on 'ErrorEvent', fields ['logger', 'timestamp']
+        db.create_index(u'slack_errorevent', ['logger', 'timestamp'])
+
+        # Adding index on 'ErrorEvent', fields ['level', 'timestamp']
+        db.create_index(u'slack_errorevent', ['level', 'timestamp'])
+
+        # Adding index on 'ErrorEvent', fields ['exception_type', 'timestamp']
+        db.create_index(u'slack_errorevent', ['exception_type', 'timestamp'])
+
+    def backwards(self, orm):
+        # Removing index on 'ErrorEvent', fields ['exception_type', 'timestamp']
+        db.delete_index(u'slack_errorevent', ['exception_type', 'timestamp'])
+
+        # Removing index on 'ErrorEvent', fields ['level', 'timestamp']
+        db.delete_index(u'slack_errorevent', ['level', 'timestamp'])
+
+        # Removing index on 'ErrorEvent', fields ['logger', 'timestamp']
+        db.delete_index(u'slack_errorevent', ['logger', 'timestamp'])
+
+        # Removing index on 'ErrorEvent', fields ['fingerprint', 'timestamp']
+        db.delete_index(u'slack_errorevent', ['fingerprint', 'timestamp'])
+
+        # Removing index on 'ErrorEvent', fields ['timestamp', 'id']
+        db.delete_index(u'slack_errorevent', ['timestamp', u'id'])
+
+        # Deleting model 'ErrorEvent'
+        db.delete_table(u'slack_errorevent')
+
+    models = {
+        u'slack.errorevent': {
+            'Meta': {'ordering': "('-timestamp', '-id')", 'object_name': 'ErrorEvent', 'index_together': "(('timestamp', 'id'), ('fingerprint', 'timestamp'), ('logger', 'timestamp'), ('level', 'timestamp'), ('exception_type', 'timestamp'))"},
+            'exception_type': ('django.db.models.fields.CharField', [], {'max_length': '200', 'blank': 'True'}),
+            'fingerprint': ('django.db.models.fields.CharField', [], {'max_length': '40'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'level': ('django.db.models.fields.CharField', [], {'max_length': '20'}),
+            'logger': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'path': ('django.db.models.fields.CharField', [], {'max_length': '255', 'blank': 'True'}),
+            'timestamp': ('django.db.models.fields.DateTimeField', [], {})
+        },
+        u'slack.errorgroup': {
+            'Meta': {'ordering': "('-last_seen',)", 'object_name': 'ErrorGroup'},
+            'count': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'fingerprint': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '40'}),
+            'first_seen': ('django.db.models.fields.DateTimeField', [], {}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'label': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'last_seen': ('django.db.models.fields.DateTimeField', [], {'db_index': 'True'}),
+            'level': ('django.db.models.fields.CharField', [], {'max_length': '20'}),
+            'logger': ('django.db.models.fields.CharField', [], {'max_length': '200'})
+        }
+    }
+
+    complete_apps = ['slack']
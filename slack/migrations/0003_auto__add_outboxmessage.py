@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'OutboxMessage'
+        db.create_table(u'slack_outboxmessage', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('destination', self.gf('django.db.models.fields.TextField')()),
+            ('channel', self.gf('django.db.models.fields.CharField')(max_length=200, blank=True)),
+            ('report', self.gf('django.db.models.fields.TextField')()),
+            ('created', self.gf('django.db.models.fields.DateTimeField')()),
+            ('available_at', self.gf('django.db.models.fields.DateTimeField')(db_index=True)),
+            ('attempts', self.gf('django.db.models.fields.PositiveIntegerField')(default=0)),
+            ('claimed_by', self.gf('django.db.models.fields.CharField')(db_index=True, max_length=32, blank=True)),
+        ))
+        db.send_create_signal(u'slack', ['OutboxMessage'])
+
+    def backwards(self, orm):
+        # Deleting model 'OutboxMessage'
+        db.delete_table(u'slack_outboxmessage')
+
+    models = {
+        u'slack.errorevent': {
+            'Meta': {'ordering': "('-timestamp', '-id')", 'object_name': 'ErrorEvent', 'index_together': "(('timestamp', 'id'), ('fingerprint', 'timestamp'), ('logger', 'timestamp'), ('level', 'timestamp'), ('exception_type', 'timestamp'))"},
+            'exception_type': ('django.db.models.fields.CharField', [], {'max_length': '200', 'blank': 'True'}),
+            'fingerprint': ('django.db.models.fields.CharField', [], {'max_length': '40'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'level': ('django.db.models.fields.CharField', [], {'max_length': '20'}),
+            'logger': ('django.db.models.fields.CharField', [], {'max_length': '200'}),
+            'path': ('django.db.models.fields.CharField', [], {'max_length': '255', 'blank': 'True'}),
+            'timestamp': ('django.db.models.fields.DateTimeField', [], {})
+        },
+        u'slack.errorgroup': {
+            'Meta': {'ordering': "('-last_seen',)", 'object_name': 'ErrorGroup'},
+            'count': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'fingerprint': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '40'}),
+            'first_seen': ('django.db.models.fields.DateTimeField', [], {}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'label': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'last_seen': ('django.db.models.fields.DateTimeField', [], {'db_index': 'True'}),
+            'level': ('django.db.models.fields.CharField', [], {'max_length': '20'}),
+            'logger': ('django.db.models.fields.CharField', [], {'max_length': '200'})
+        },
+        u'slack.outboxmessage': {
+            'Meta': {'ordering': "('id',)", 'object_name': 'OutboxMessage'},
+            'attempts': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'available_at': ('django.db.models.fields.DateTimeField', [], {'db_index': 'True'}),
+            'channel': ('django.db.models.fields.CharField', [], {'max_length': '200', 'blank': 'True'}),
+            'claimed_by': ('django.db.models.fields.CharField', [], {'db_index': 'True', 'max_length': '32', 'blank': 'True'}),
+            'created': ('django.db.models.fields.DateTimeField', [], {}),
+            'destination': ('django.db.models.fields.TextField', [], {}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'report': ('django.db.models.fields.TextField', [], {})
+        }
+    }
+
+    complete_apps = ['slack']
@@ -0,0 +1,59 @@
+from django.db import models
+from django.utils.encoding import python_2_unicode_compatible
+
+
+@python_2_unicode_compatible
+class ErrorGroup(models.Model):
+    fingerprint = models.CharField(max_length=40, unique=True)
+    logger = models.CharField(max_length=200)
+    level = models.CharField(max_length=20)
+    label = models.CharField(max_length=255)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField(db_index=True)
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.label
+
+    class Meta:
+        ordering = ('-last_seen',)
+
+
+@python_2_unicode_compatible
+class ErrorEvent(models.Model):
+    fingerprint = models.CharField(max_length=40)
+    logger = models.CharField(max_length=200)
+    level = models.CharField(max_length=20)
+    exception_type = models.CharField(max_length=200, blank=True)
+    path = models.CharField(max_length=255, blank=True)
+    timestamp = models.DateTimeField()
+
+    def __str__(self):
+        return '%s %s' % (self.level, self.exception_type or self.logger)
+
+    class Meta:
+        ordering = ('-timestamp', '-id')
+        index_together = (
+            ('timestamp', 'id'),
+            ('fingerprint', 'timestamp'),
+            ('logger', 'timestamp'),
+            ('level', 'timestamp'),
+            ('exception_type', 'timestamp'),
+        )
+
+
+@python_2_unicode_compatible
+class OutboxMessage(models.Model):
+    destination = models.TextField()
+    channel = models.CharField(max_length=200, blank=True)
+    report = models.TextField()
+    created = models.DateTimeField()
+    available_at = models.DateTimeField(db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    claimed_by = models.CharField(max_length=32, blank=True, db_index=True)
+
+    def __str__(self):
+        return '%s #%d' % (self.channel, self.pk)
+
+    class Meta:
+        ordering = ('id',)
@@ -0,0 +1,106 @@
+import binascii
+import socket
+
+from bisect import bisect_right
+
+
+BITS = {4: 32, 6: 128}
+
+
+def parse_address(address):
+    """
+    Return ``(version, value)`` for an IPv4 or IPv6 address. IPv4-mapped
+    IPv6 addresses are returned as IPv4.
+    """
+    try:
+        # Drop an IPv6 zone index such as "%eth0".
+        address = str(address).strip().split('%', 1)[0]
+        if ':' in address:
+            value = int(binascii.hexlify(
+                socket.inet_pton(socket.AF_INET6, address)
+            ), 16)
+            if value >> 32 == 0xffff:
+                return 4, value & 0xffffffff
+            return 6, value
+        return 4, int(binascii.hexlify(
+            socket.inet_pton(socket.AF_INET, address)
+        ), 16)
+    except (socket.error, ValueError):
+        raise ValueError('Invalid IP address: %r' % address)
+
+
+def parse_network(network):
+    """Return ``(version, first, last)`` for an address or CIDR network."""
+    address, _, prefix = str(network).partition('/')
+    version, value = parse_address(address)
+    bits = BITS[version]
+    if prefix:
+        try:
+            prefix = int(prefix)
+        except ValueError:
+            raise ValueError('Invalid network: %r' % network)
+        if ':' in address and version == 4:
+            prefix -= 96
+        if not 0 <= prefix <= bits:
+            raise ValueError('Invalid network: %r' % network)
+    else:
+        prefix = bits
+    host = (1 << (bits - prefix)) - 1
+    first = value & ~host
+    return version, first, first | host
+
+
+class NetworkIndex(object):
+    """
+    Set of IPv4 and IPv6 addresses and CIDR networks, compiled into sorted,
+    merged intervals per address family so a lookup is one binary search
+    however many networks there are. Invalid entries are ignored.
+    """
+    def __init__(self, networks):
+        ranges = dict((version, []) for version in BITS)
+        for network in networks:
+            try:
+                version, first, last = parse_network(network)
+            except ValueError:
+                continue
+            ranges[version].append((first, last))
+
+        self.firsts = {}
+        self.lasts = {}
+        for version, intervals in ranges.items():
+            merged = []
+            for first, last in sorted(intervals):
+                if merged and first <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], last)
+                else:
+                    merged.append([first, last])
+            self.firsts[version] = [first for first, last in merged]
+            self.lasts[version] = [last for first, last in merged]
+
+    def __contains__(self, address):
+        if not address:
+            return False
+        try:
+            version, value = parse_address(address)
+        except ValueError:
+            return False
+        index = bisect_right(self.firsts[version], value) - 1
+        return index >= 0 and value <= self.lasts[version][index]
+
+
+def client_address(meta, proxies):
+    """
+    Return the client address of a request. When ``REMOTE_ADDR`` is one of
+    the trusted ``proxies`` (a ``NetworkIndex``), ``X-Forwarded-For`` is
+    read from the right, skipping trusted proxies, since only the entries
+    they appended can be trusted.
+    """
+    remote = meta.get('REMOTE_ADDR')
+    forwarded = meta.get('HTTP_X_FORWARDED_FOR')
+    if not forwarded or remote not in proxies:
+        return remote
+    hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+    for hop in reversed(hops):
+        if hop not in proxies:
+            return hop
+    return hops[0] if hops else remote
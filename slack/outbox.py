@@ -0,0 +1,242 @@
+import json
+import time
+import uuid
+
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from slack.fanout import SKIPPED, fan_out
+from slack.registry import flushing
+from slack.reports import Report
+
+
+def encode_report(report):
+    fields = report._asdict()
+    if fields['attachment'] is not None:
+        fields['attachment'] = ''.join(fields['attachment'])
+    return json.dumps(fields)
+
+
+def decode_report(data):
+    fields = json.loads(data)
+    if fields.get('attachment') is not None:
+        fields['attachment'] = (fields['attachment'],)
+    return Report(**fields)
+
+
+def enqueue(report, destinations, using='default'):
+    """
+    Store ``report`` once for each ``(destination, channel)`` pair, in a
+    single multi-row INSERT.
+    """
+    from slack.models import OutboxMessage
+
+    now = timezone.now()
+    data = encode_report(report)
+    with flushing():
+        OutboxMessage.objects.using(using).bulk_create([
+            OutboxMessage(
+                destination=json.dumps(destination), channel=channel[:200],
+                report=data, created=now, available_at=now
+            )
+            for destination, channel in destinations
+        ])
+
+
+def supports_skip_locked(connection):
+    if connection.vendor == 'postgresql':
+        return connection.pg_version >= 90500
+    if connection.vendor == 'mysql':
+        return connection.mysql_version >= (8, 0, 1)
+    return False
+
+
+def claim(batch_size=50, lease=60, using='default'):
+    """
+    Lease up to ``batch_size`` due messages to this worker for ``lease``
+    seconds and return them.
+
+    Where the database supports it rows are picked with ``FOR UPDATE SKIP
+    LOCKED``, so concurrent drainers never wait on each other. SQLite has
+    no row locks; there the claim is a single ``UPDATE`` and concurrent
+    drainers are serialized by the database lock instead.
+    """
+    from slack.models import OutboxMessage
+
+    connection = connections[using]
+    messages = OutboxMessage.objects.using(using)
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    claimed = {
+        'available_at': now + timedelta(seconds=lease),
+        'claimed_by': token,
+    }
+    due = messages.filter(available_at__lte=now).order_by('id')
+
+    with transaction.atomic(using=using):
+        if supports_skip_locked(connection):
+            cursor = connection.cursor()
+            cursor.execute(
+                'SELECT id FROM %s WHERE available_at <= %%s ORDER BY id '
+                'LIMIT %%s FOR UPDATE SKIP LOCKED' % connection.ops.quote_name(
+                    OutboxMessage._meta.db_table
+                ),
+                [connection.ops.value_to_db_datetime(now), batch_size]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        elif connection.vendor == 'sqlite':
+            ids = due.values('id')[:batch_size]
+        else:
+            ids = list(due.select_for_update().values_list(
+                'id', flat=True
+            )[:batch_size])
+        # Re-checking available_at keeps a row that another worker claimed
+        # in the meantime from being claimed twice.
+        messages.filter(id__in=ids, available_at__lte=now).update(**claimed)
+
+    return list(messages.filter(claimed_by=token).order_by('id'))
+
+
+def backlog(using='default'):
+    """
+    Return ``(pending, lag)``: the number of queued messages and the age in
+    seconds of the oldest one.
+    """
+    from slack.models import OutboxMessage
+
+    stats = OutboxMessage.objects.using(using).aggregate(
+        pending=Count('id'), oldest=Min('created')
+    )
+    if stats['oldest'] is None:
+        return 0, 0.0
+    age = timezone.now() - stats['oldest']
+    return stats['pending'], age.days * 86400 + age.seconds + (
+        age.microseconds / 1e6
+    )
+
+
+class ChannelLimiter(object):
+    """
+    Token bucket per channel allowing ``rate`` messages per second with
+    bursts of up to ``burst``. At most ``max_channels`` buckets are kept.
+    """
+    def __init__(self, rate=1.0, burst=3, max_channels=1000, clock=time.time):
+        self.rate = rate
+        self.burst = burst
+        self.max_channels = max_channels
+        self.clock = clock
+        self.buckets = OrderedDict()
+
+    def delay(self, channel):
+        """
+        Take a token for ``channel`` and return 0, or return how many
+        seconds to wait until one is available.
+        """
+        now = self.clock()
+        tokens, updated = self.buckets.pop(channel, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0
+        else:
+            wait = (1 - tokens) / float(self.rate)
+        self.buckets[channel] = (tokens, now)
+        while len(self.buckets) > self.max_channels:
+            self.buckets.popitem(last=False)
+        return wait
+
+
+class Drainer(object):
+    """
+    Send messages from the outbox through ``handler``.
+
+    Each call to ``drain`` claims one batch, sends it in parallel on the
+    shared fan-out pool and deletes what was delivered. Failed messages are
+    retried with exponential backoff starting at ``retry_delay`` seconds;
+    after ``max_attempts`` the report is mailed to the admins instead.
+    Messages over their channel's rate limit are put back until a token is
+    available.
+    """
+    def __init__(self, handler, batch_size=50, lease=60, max_attempts=5,
+                 retry_delay=10, timeout=5, pool_size=4, limiter=None,
+                 using='default'):
+        self.handler = handler
+        self.batch_size = batch_size
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.limiter = limiter or ChannelLimiter()
+        self.using = using
+
+    def drain(self):
+        """Process one batch and return ``(sent, failed, deferred)``."""
+        from slack.models import OutboxMessage
+
+        try:
+            messages = claim(self.batch_size, self.lease, self.using)
+        except DatabaseError:
+            # SQLite reports "database is locked" when another drainer
+            # holds the write lock for too long; try again next round.
+            return 0, 0, 0
+
+        ready = []
+        deferred = []
+        for message in messages:
+            wait = self.limiter.delay(message.channel)
+            if wait:
+                deferred.append((message, wait))
+            else:
+                ready.append(message)
+
+        results = fan_out(
+            [(self.send, (message,), self.timeout) for message in ready],
+            self.pool_size, skipped=SKIPPED
+        ) if ready else []
+        sent = []
+        failed = []
+        for message, ok in zip(ready, results):
+            if ok is SKIPPED:
+                # Never sent, so not an attempt.
+                deferred.append((message, 0))
+            elif ok:
+                sent.append(message)
+            else:
+                failed.append(message)
+
+        now = timezone.now()
+        expired = []
+        queryset = OutboxMessage.objects.using(self.using)
+        with transaction.atomic(using=self.using):
+            queryset.filter(pk__in=[message.pk for message in sent]).delete()
+            for message, wait in deferred:
+                queryset.filter(pk=message.pk).update(
+                    available_at=now + timedelta(seconds=wait), claimed_by=''
+                )
+            for message in failed:
+                attempts = message.attempts + 1
+                if attempts >= self.max_attempts:
+                    expired.append(message)
+                    queryset.filter(pk=message.pk).delete()
+                else:
+                    queryset.filter(pk=message.pk).update(
+                        attempts=attempts, claimed_by='',
+                        available_at=now + timedelta(
+                            seconds=self.retry_delay * 2 ** (attempts - 1)
+                        )
+                    )
+
+        for message in expired:
+            self.handler.mail_admins(decode_report(message.report))
+        return len(sent), len(failed), len(deferred)
+
+    def send(self, message):
+        return self.handler.send_queued(
+            decode_report(message.report), json.loads(message.destination),
+            self.timeout
+        )
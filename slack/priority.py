@@ -0,0 +1,259 @@
+import heapq
+import logging
+import os
+import threading
+import time
+
+from collections import deque
+
+
+DEFAULT_CAPACITY = {
+    logging.CRITICAL: 1000,
+    logging.ERROR: 500,
+    logging.WARNING: 100,
+}
+
+POLICIES = ('drop-newest', 'drop-oldest', 'block', 'collapse')
+
+
+class DeliveryQueue(object):
+    """
+    Bounded in-memory delivery queue ordered by log level, then age.
+
+    Each level is a FIFO with its own capacity (``capacity``, falling back
+    to ``default_capacity``). The next item is chosen by merging the heads
+    of the levels on a heap keyed by ``enqueued + aging * (CRITICAL -
+    level) / 10``: a message one level lower ranks as if it had arrived
+    ``aging`` seconds later, so a flood of low-level messages can only
+    delay a higher one by the messages queued more than ``aging`` seconds
+    before it, and old low-level messages still drain.
+
+    ``policy`` decides what happens to a message for a full level:
+
+    * ``'drop-newest'`` drops the incoming message;
+    * ``'drop-oldest'`` evicts the oldest message of that level;
+    * ``'block'`` waits up to ``block_timeout`` seconds for room, then
+      drops the incoming message;
+    * ``'collapse'`` drops the incoming message but counts it under its
+      fingerprint (for at most ``max_collapsed`` fingerprints) so the
+      summary can say what was lost.
+
+    When the whole queue holds ``max_size`` items, a message of the lowest
+    queued level is evicted to make room for a higher-level one; otherwise
+    the same policy applies. Drops are counted per level for
+    ``drain_dropped``.
+    """
+    def __init__(self, capacity=None, default_capacity=100, max_size=2000,
+                 aging=30, policy='drop-newest', block_timeout=0.1,
+                 max_collapsed=100, summary_interval=60, clock=time.time):
+        if policy not in POLICIES:
+            raise ValueError('Unknown overflow policy %r' % policy)
+        self.capacity = dict(DEFAULT_CAPACITY)
+        self.capacity.update(capacity or {})
+        self.default_capacity = default_capacity
+        self.max_size = max_size
+        self.aging = aging
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.max_collapsed = max_collapsed
+        self.summary_interval = summary_interval
+        self.clock = clock
+        self.levels = {}
+        self.heads = []
+        self.size = 0
+        self.sequence = 0
+        self.dropped = {}
+        self.collapsed = {}
+        self.summarized = clock()
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        self.worker = None
+        self.worker_pid = None
+        self.stopping = threading.Event()
+
+    def rank(self, level, enqueued):
+        return enqueued + self.aging * (logging.CRITICAL - level) / 10.0
+
+    def level_full(self, level):
+        queue = self.levels.get(level)
+        return queue is not None and len(queue) >= self.capacity.get(
+            level, self.default_capacity
+        )
+
+    def lowest_level(self):
+        return min(level for level, queue in self.levels.items() if queue)
+
+    def would_drop(self, level):
+        if self.level_full(level):
+            return True
+        return self.size >= self.max_size and self.lowest_level() >= level
+
+    def reject(self, level, key=None, label=None):
+        """
+        Count and return True if a message at ``level`` would be dropped on
+        arrival, so the caller can skip building it.
+        """
+        if self.policy not in ('drop-newest', 'collapse'):
+            return False
+        with self.lock:
+            if not self.would_drop(level):
+                return False
+            self.drop(level, key, label)
+            return True
+
+    def put(self, level, item, key=None, label=None):
+        """Queue ``item``; returns False if it was dropped instead."""
+        with self.lock:
+            if self.policy == 'block' and self.would_drop(level):
+                deadline = time.time() + self.block_timeout
+                while self.would_drop(level):
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self.not_full.wait(remaining)
+
+            oldest = self.policy == 'drop-oldest'
+            if self.level_full(level):
+                if not oldest:
+                    self.drop(level, key, label)
+                    return False
+                self.evict(level, oldest)
+            elif self.size >= self.max_size:
+                victim = self.lowest_level()
+                if victim < level or (victim == level and oldest):
+                    self.evict(victim, oldest)
+                else:
+                    self.drop(level, key, label)
+                    return False
+
+            queue = self.levels.get(level)
+            if queue is None:
+                queue = self.levels[level] = deque()
+            self.sequence += 1
+            queue.append((self.clock(), self.sequence, item))
+            self.size += 1
+            if len(queue) == 1:
+                self.push_head(level)
+            self.not_empty.notify()
+            return True
+
+    def evict(self, level, oldest):
+        queue = self.levels[level]
+        if oldest:
+            queue.popleft()
+            if queue:
+                self.push_head(level)
+        else:
+            queue.pop()
+        self.size -= 1
+        self.drop(level)
+
+    def drop(self, level, key=None, label=None):
+        self.dropped[level] = self.dropped.get(level, 0) + 1
+        if self.policy == 'collapse' and key is not None:
+            counter = self.collapsed.get(key)
+            if counter is not None:
+                counter[0] += 1
+            elif len(self.collapsed) < self.max_collapsed:
+                self.collapsed[key] = [1, label]
+
+    def push_head(self, level):
+        enqueued, sequence, item = self.levels[level][0]
+        heapq.heappush(
+            self.heads, (self.rank(level, enqueued), sequence, level)
+        )
+
+    def pop(self):
+        """Return ``(level, item)`` for the next message, or None."""
+        with self.lock:
+            return self.pop_locked()
+
+    def pop_locked(self):
+        while self.heads:
+            rank, sequence, level = heapq.heappop(self.heads)
+            queue = self.levels[level]
+            # Evicting a head leaves its old heap entry behind.
+            if not queue or queue[0][1] != sequence:
+                continue
+            item = queue.popleft()[2]
+            self.size -= 1
+            if queue:
+                self.push_head(level)
+            self.not_full.notify()
+            return level, item
+        return None
+
+    def get(self, timeout=None):
+        """Block until a message is available, or ``timeout`` passes."""
+        with self.lock:
+            if not self.size:
+                self.not_empty.wait(timeout)
+            return self.pop_locked()
+
+    def drain_dropped(self):
+        """
+        Return and reset ``(dropped, collapsed)``: the ``{level: count}``
+        of dropped messages and, for the ``'collapse'`` policy, up to ten
+        ``(count, label)`` pairs for the most dropped fingerprints.
+        """
+        with self.lock:
+            dropped, self.dropped = self.dropped, {}
+            collapsed, self.collapsed = self.collapsed, {}
+            self.summarized = self.clock()
+        return dropped, heapq.nlargest(10, (
+            (count, label) for count, label in collapsed.values()
+        ))
+
+    def start(self, send, notify_dropped):
+        if self.worker is not None and self.worker_pid == os.getpid():
+            return
+        with self.lock:
+            if self.worker is None or self.worker_pid != os.getpid():
+                self.worker = threading.Thread(
+                    target=self.run, args=(send, notify_dropped)
+                )
+                self.worker.daemon = True
+                self.worker_pid = os.getpid()
+                self.stopping.clear()
+                self.worker.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop the worker once it has sent the message in hand, and wait up
+        to ``timeout`` for it to exit. Queued messages are kept.
+        """
+        with self.lock:
+            worker, self.worker = self.worker, None
+            self.stopping.set()
+            self.not_empty.notify_all()
+        if worker is not None and worker is not threading.current_thread():
+            worker.join(timeout)
+
+    def run(self, send, notify_dropped):
+        while not self.stopping.is_set():
+            entry = self.get(timeout=1)
+            try:
+                if entry is not None:
+                    send(*entry)
+                # Summarize once a flood is over, or periodically while it
+                # lasts.
+                if self.dropped and (
+                    entry is None or
+                    self.clock() - self.summarized >= self.summary_interval
+                ):
+                    notify_dropped(*self.drain_dropped())
+            except Exception:
+                pass
+
+
+def format_dropped(dropped, collapsed=()):
+    lines = ['%d alerts dropped (%s)' % (
+        sum(dropped.values()), ', '.join(
+            '%d %s' % (count, logging.getLevelName(level))
+            for level, count in sorted(dropped.items(), reverse=True)
+        )
+    )]
+    for count, label in collapsed:
+        lines.append('%6d  %s' % (count, label))
+    return '\n'.join(lines)
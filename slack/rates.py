@@ -0,0 +1,81 @@
+import time
+
+from collections import OrderedDict
+
+
+class RateState(object):
+    __slots__ = ('bucket', 'count', 'baseline', 'alerted')
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.count = 0
+        self.baseline = None
+        self.alerted = None
+
+
+class RateTracker(object):
+    """
+    Exponentially weighted moving average of the per-bucket rate of each
+    key, for at most ``max_keys`` keys (least recently seen are dropped).
+
+    ``observe`` is O(1): when a key moves to a new bucket the finished
+    bucket is folded into its baseline and the empty buckets in between are
+    applied as a single decay factor.
+    """
+    def __init__(self, bucket=60, alpha=0.1, threshold=20, min_count=10,
+                 max_keys=1000, clock=time.time):
+        self.bucket = bucket
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_count = min_count
+        self.max_keys = max_keys
+        self.clock = clock
+        self.states = OrderedDict()
+
+    def observe(self, key):
+        """
+        Count one occurrence of ``key``. Returns ``'new'`` for an unseen
+        key, ``'spike'`` the first time a bucket's count exceeds
+        ``threshold`` times the baseline, and ``None`` otherwise.
+        """
+        bucket = int(self.clock() // self.bucket)
+        state = self.states.pop(key, None)
+        result = None
+        if state is None:
+            state = RateState(bucket)
+            result = 'new'
+        elif state.bucket != bucket:
+            self.roll(state, bucket)
+        self.states[key] = state
+        if len(self.states) > self.max_keys:
+            self.states.popitem(last=False)
+
+        state.count += 1
+        if result is None and self.is_spike(state):
+            state.alerted = bucket
+            result = 'spike'
+        return result
+
+    def roll(self, state, bucket):
+        if state.baseline is None:
+            state.baseline = float(state.count)
+        else:
+            state.baseline += self.alpha * (state.count - state.baseline)
+        gap = bucket - state.bucket - 1
+        if gap > 0:
+            state.baseline *= (1 - self.alpha) ** gap
+        state.bucket = bucket
+        state.count = 0
+
+    def is_spike(self, state):
+        if state.alerted == state.bucket or state.count < self.min_count:
+            return False
+        if state.baseline is None:
+            return False
+        return state.count > self.threshold * state.baseline
+
+    def rate(self, key):
+        state = self.states.get(key)
+        if state is None:
+            return None
+        return state.count, state.baseline
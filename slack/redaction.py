@@ -0,0 +1,180 @@
+import re
+
+from django.views.debug import CLEANSED_SUBSTITUTE
+
+
+SENSITIVE_KEYS = re.compile(
+    'API|TOKEN|KEY|SECRET|PASS|SIGNATURE|AUTH|SESSION|CSRF|COOKIE', re.I
+)
+
+KEYWORDS = (
+    'password', 'passwd', 'secret', 'token', 'api_key', 'api-key', 'apikey',
+    'access_key', 'access-key', 'private_key', 'private-key',
+    'authorization', 'session_id', 'sessionid', 'signature', 'cookie',
+)
+
+
+def spellings(words, suffix=''):
+    """
+    Return one alternative per lower, upper, title and sentence case
+    spelling of each of ``words``, followed by ``suffix``.
+    """
+    variants = set()
+    for word in words:
+        variants.update((
+            word, word.upper(), word.title(), word.capitalize()
+        ))
+    return '|'.join(
+        variant + suffix
+        for variant in sorted(variants, key=lambda word: (-len(word), word))
+    )
+
+
+# Separator and value. Groups stay non-capturing here: the pattern is
+# repeated for every keyword spelling, and Python 2 allows at most 100
+# groups in a regex. ASSIGNMENT below captures them for replace().
+ASSIGNMENT_VALUE = (
+    r'''['"]?\s*[:=]\s*(?:u(?=['"]))?'''
+    r'''(?:'[^']*'|"[^"]*"|[^\s'"&,;)}\]]+)'''
+)
+
+# Every alternative of every pattern starts with a literal character. The
+# regex engine then only tries them where one of those characters occurs,
+# which makes the combined regex several times faster; hence keywords are
+# spelled out rather than matched with re.IGNORECASE.
+DEFAULT_PATTERNS = (
+    # "password=...", "'HTTP_AUTHORIZATION': '...'" and the like. Only the
+    # keyword ending the name is matched, so "KeyError: 'x'" is left alone.
+    ('assignment', spellings(KEYWORDS, ASSIGNMENT_VALUE)),
+    ('slack_token', r'xox[abeoprs]-[0-9A-Za-z-]{10,}'),
+    ('bearer', spellings(['bearer'], r'\s+[0-9A-Za-z._~+/-]{8,}=*')),
+    ('aws_access_key', '|'.join(
+        prefix + r'[0-9A-Z]{16}(?![0-9A-Z])' for prefix in ('AKIA', 'ASIA')
+    )),
+    ('private_key', (
+        r'-----BEGIN [A-Z ]*PRIVATE KEY-----[\s\S]*?'
+        r'-----END [A-Z ]*PRIVATE KEY-----'
+    )),
+    ('url_password', r'://[^/\s:@]+:[^/\s@]+@'),
+    # Card numbers start with 2 to 6, and not in the middle of a number.
+    # The lookbehind follows the first digit to keep it a literal.
+    ('card', '|'.join(
+        r'%d(?<![0-9]%d)(?:[ -]?[0-9]){12,18}(?![0-9])' % (digit, digit)
+        for digit in range(2, 7)
+    )),
+)
+
+ASSIGNMENT = re.compile(
+    r'''(%s)(['"]?\s*[:=]\s*(?:u(?=['"]))?)'''
+    r'''('[^']*'|"[^"]*"|[^\s'"&,;)}\]]+)''' % '|'.join(KEYWORDS), re.I
+)
+
+
+def luhn(digits):
+    total = 0
+    for index, digit in enumerate(reversed(digits)):
+        value = int(digit)
+        if index % 2:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return total % 10 == 0
+
+
+class Redactor(object):
+    """
+    Replace secrets in outgoing text with ``substitute``.
+
+    ``patterns`` (``(name, regex)`` pairs) are compiled into one regex, so
+    ``redact`` is a single pass over the text whatever their number. A
+    credential-like ``name=value`` assignment keeps its name, and card
+    numbers are only redacted if they pass the Luhn check.
+
+    ``scrub`` cleanses the values of a mapping (such as ``request.GET``)
+    whose keys match ``keys``.
+    """
+    def __init__(self, patterns=DEFAULT_PATTERNS, keys=SENSITIVE_KEYS,
+                 substitute=CLEANSED_SUBSTITUTE):
+        self.patterns = tuple(patterns)
+        self.keys = keys
+        self.substitute = substitute
+        # Joined without a group around each pattern, which would hide
+        # their first characters from the engine. The pattern a match came
+        # from is found again by matching each one at the same span.
+        self.regex = re.compile('|'.join(
+            pattern for name, pattern in self.patterns
+        ))
+        self.kinds = [
+            (name, re.compile(r'(?:%s)\Z' % pattern))
+            for name, pattern in self.patterns
+        ]
+
+    def kind(self, match):
+        for name, regex in self.kinds:
+            if regex.match(match.string, match.start(), match.end()):
+                return name
+        return None
+
+    def replace(self, match):
+        kind = self.kind(match)
+        if kind == 'assignment':
+            name, separator, value = ASSIGNMENT.match(match.group(0)).groups()
+            quote = value[0] if value[0] in '\'"' else ''
+            return '%s%s%s%s%s' % (
+                name, separator, quote, self.substitute, quote
+            )
+        if kind == 'url_password':
+            return '://%s@' % self.substitute
+        if kind == 'card':
+            return self.replace_card(match.group(0))
+        return self.substitute
+
+    def replace_card(self, text):
+        """
+        Redact the card number in ``text``. A match is greedy, so it may
+        run into a neighbouring group of digits ("4111 1111 1111 1111
+        12/25"); if the whole of it fails the Luhn check, the longest
+        valid number ending or starting at a separator is redacted.
+        """
+        if luhn(re.sub(r'\D', '', text)):
+            return self.substitute
+        best = None
+        for index, char in enumerate(text):
+            if char not in ' -':
+                continue
+            prefix, suffix = text[:index], text[index + 1:]
+            for number, replaced in (
+                (prefix, self.substitute + text[index:]),
+                (suffix, text[:index + 1] + self.substitute),
+            ):
+                digits = re.sub(r'\D', '', number)
+                if 13 <= len(digits) and digits[0] in '23456' and luhn(
+                    digits
+                ) and (best is None or len(digits) > best[0]):
+                    best = len(digits), replaced
+        return text if best is None else best[1]
+
+    def redact(self, text):
+        if not text:
+            return text
+        return self.regex.sub(self.replace, text)
+
+    def is_sensitive(self, key):
+        return bool(self.keys.search(key))
+
+    def scrub(self, mapping):
+        """
+        Return ``mapping``, or a copy of it with the values of sensitive
+        keys replaced. ``QueryDict`` copies keep their type.
+        """
+        sensitive = [key for key in mapping if self.is_sensitive(key)]
+        if not sensitive:
+            return mapping
+        mapping = mapping.copy()
+        for key in sensitive:
+            if hasattr(mapping, 'setlist'):
+                mapping.setlist(key, [self.substitute])
+            else:
+                mapping[key] = self.substitute
+        return mapping
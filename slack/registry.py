@@ -0,0 +1,229 @@
+import os
+import sqlite3
+import threading
+
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+_local = threading.local()
+
+# Rows per upsert statement, at 7 parameters each within SQLite's default
+# limit of 999.
+UPSERT_CHUNK = 100
+
+
+def in_flush():
+    return getattr(_local, 'flushing', False)
+
+
+@contextmanager
+def flushing():
+    # Records logged by the database layer while we write are not reported,
+    # or a failing database would feed itself.
+    _local.flushing = True
+    try:
+        yield
+    finally:
+        _local.flushing = False
+
+
+class ErrorRegistry(object):
+    """
+    Buffer ErrorGroup updates and ErrorEvent rows in memory and write them
+    in bulk.
+
+    ``add`` only touches a dict. A flush happens every ``interval`` seconds
+    or once ``batch_size`` records are pending, in a background thread, as
+    one multi-row upsert per ``UPSERT_CHUNK`` groups plus one bulk insert
+    of events. At most ``max_keys`` fingerprints and ``max_events`` events
+    are buffered; if the database is unavailable new entries are dropped
+    rather than letting the buffer grow.
+    """
+    def __init__(self, interval=5, batch_size=500, max_keys=10000,
+                 max_events=10000, background=True):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_keys = max_keys
+        self.max_events = max_events
+        self.background = background
+        self.pending = {}
+        self.pending_records = 0
+        self.events = []
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.worker = None
+        self.worker_pid = None
+
+    def add(self, key, logger, level, label, seen=None):
+        seen = seen or timezone.now()
+        with self.lock:
+            group = self.pending.get(key)
+            if group is None:
+                if len(self.pending) >= self.max_keys:
+                    self.dropped += 1
+                    return
+                self.pending[key] = [logger, level, label[:255], seen, seen, 1]
+            else:
+                group[4] = max(group[4], seen)
+                group[5] += 1
+            self.pending_records += 1
+            full = self.pending_records >= self.batch_size
+        self.notify(full)
+
+    def add_event(self, key, logger, level, exception_type, path,
+                  timestamp=None):
+        with self.lock:
+            if len(self.events) >= self.max_events:
+                self.dropped += 1
+                return
+            self.events.append((
+                key, logger, level, exception_type[:200], path[:255],
+                timestamp or timezone.now()
+            ))
+            full = len(self.events) >= self.batch_size
+        self.notify(full)
+
+    def notify(self, full):
+        if self.background:
+            self.ensure_worker()
+            if full:
+                self.wakeup.set()
+
+    def ensure_worker(self):
+        if self.worker is not None and self.worker_pid == os.getpid():
+            return
+        with self.lock:
+            if self.worker is None or self.worker_pid != os.getpid():
+                self.worker = threading.Thread(target=self.run)
+                self.worker.daemon = True
+                self.worker_pid = os.getpid()
+                self.worker.start()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            events, self.events = self.events, []
+            self.pending_records = 0
+        if not pending and not events:
+            return 0
+
+        try:
+            with flushing(), transaction.atomic():
+                if pending:
+                    self.upsert(pending)
+                if events:
+                    self.insert_events(events)
+        except Exception:
+            self.restore(pending, events)
+            try:
+                connection.close()
+            except Exception:
+                pass
+            return 0
+        return len(pending) + len(events)
+
+    def insert_events(self, events):
+        from slack.models import ErrorEvent
+
+        ErrorEvent.objects.bulk_create([
+            ErrorEvent(
+                fingerprint=key, logger=logger, level=level,
+                exception_type=exception_type, path=path, timestamp=timestamp
+            )
+            for key, logger, level, exception_type, path, timestamp in events
+        ])
+
+    def restore(self, pending, events=()):
+        with self.lock:
+            room = max(0, self.max_events - len(self.events))
+            self.events[:0] = events[:room]
+            for key, group in pending.items():
+                current = self.pending.get(key)
+                if current is not None:
+                    current[3] = min(current[3], group[3])
+                    current[4] = max(current[4], group[4])
+                    current[5] += group[5]
+                elif len(self.pending) < self.max_keys:
+                    self.pending[key] = group
+
+    def upsert(self, pending):
+        from slack.models import ErrorGroup
+
+        table = connection.ops.quote_name(ErrorGroup._meta.db_table)
+        vendor = connection.vendor
+        if vendor == 'postgresql' or (
+            vendor == 'sqlite' and sqlite3.sqlite_version_info >= (3, 24)
+        ):
+            suffix = (
+                'ON CONFLICT (fingerprint) DO UPDATE SET '
+                'count = {table}.count + excluded.count, '
+                'last_seen = CASE WHEN excluded.last_seen > {table}.last_seen '
+                'THEN excluded.last_seen ELSE {table}.last_seen END'
+            )
+        elif vendor == 'mysql':
+            suffix = (
+                'ON DUPLICATE KEY UPDATE count = count + VALUES(count), '
+                'last_seen = GREATEST(last_seen, VALUES(last_seen))'
+            )
+        else:
+            return self.upsert_orm(pending)
+
+        to_db = connection.ops.value_to_db_datetime
+        rows = [
+            (key, logger, level, label, to_db(first), to_db(last), count)
+            for key, (logger, level, label, first, last, count)
+            in pending.items()
+        ]
+        cursor = connection.cursor()
+        for start in range(0, len(rows), UPSERT_CHUNK):
+            chunk = rows[start:start + UPSERT_CHUNK]
+            sql = (
+                'INSERT INTO {table} (fingerprint, logger, level, label, '
+                'first_seen, last_seen, count) VALUES ' + ', '.join(
+                    ['(%s, %s, %s, %s, %s, %s, %s)'] * len(chunk)
+                ) + ' ' + suffix
+            ).format(table=table)
+            cursor.execute(sql, [value for row in chunk for value in row])
+
+    def upsert_orm(self, pending):
+        from slack.models import ErrorGroup
+
+        existing = set(ErrorGroup.objects.filter(
+            fingerprint__in=list(pending)
+        ).values_list('fingerprint', flat=True))
+        for key in existing:
+            logger, level, label, first, last, count = pending[key]
+            ErrorGroup.objects.filter(fingerprint=key).update(
+                count=F('count') + count, last_seen=last
+            )
+        ErrorGroup.objects.bulk_create([
+            ErrorGroup(
+                fingerprint=key, logger=logger, level=level, label=label,
+                first_seen=first, last_seen=last, count=count
+            )
+            for key, (logger, level, label, first, last, count)
+            in pending.items() if key not in existing
+        ])
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry(**kwargs):
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ErrorRegistry(**kwargs)
+        return _registry
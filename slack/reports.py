@@ -0,0 +1,8 @@
+from collections import namedtuple
+
+
+Report = namedtuple('Report', [
+    'subject', 'text', 'message', 'html_message', 'fingerprint', 'attachment',
+    'clients', 'level'
+])
+Report.__new__.__defaults__ = (None, None, None, None)
@@ -0,0 +1,80 @@
+import random
+import time
+
+
+class LoggerVolume(object):
+    __slots__ = ('window', 'count', 'average')
+
+    def __init__(self, window):
+        self.window = window
+        self.count = 0
+        self.average = None
+
+
+class AdaptiveSampler(object):
+    """
+    Sample records of the loggers in ``budgets`` (a mapping of logger name
+    to messages per minute) so each sends about its budget.
+
+    Volume is counted per ``window`` seconds. The expected volume is the
+    larger of an exponentially weighted average of past windows and the
+    count so far in the current one, so a sudden burst is sampled down
+    before its window ends. A budget applies to the named logger and its
+    children together.
+    """
+    def __init__(self, budgets, window=60, alpha=0.3, clock=time.time,
+                 random=random.random):
+        self.budgets = dict(budgets)
+        self.window = window
+        self.alpha = alpha
+        self.clock = clock
+        self.random = random
+        self.states = {}
+        self.names = {}
+
+    def budget_name(self, name):
+        try:
+            return self.names[name]
+        except KeyError:
+            pass
+        match = name
+        while match and match not in self.budgets:
+            match = match.rpartition('.')[0]
+        self.names[name] = match or None
+        return match or None
+
+    def sample(self, name):
+        """
+        Return None if a record of logger ``name`` should be dropped,
+        otherwise ``N`` for a record kept as "1 of ~N" (1 when the logger
+        is within its budget or not sampled at all).
+        """
+        match = self.budget_name(name)
+        if match is None:
+            return 1
+
+        window = int(self.clock() // self.window)
+        state = self.states.get(match)
+        if state is None:
+            state = self.states[match] = LoggerVolume(window)
+        elif state.window != window:
+            self.roll(state, window)
+        state.count += 1
+
+        limit = self.budgets[match] * self.window / 60.0
+        expected = max(state.average or 0, state.count)
+        if expected <= limit:
+            return 1
+        if self.random() * expected >= limit:
+            return None
+        return int(round(expected / limit))
+
+    def roll(self, state, window):
+        if state.average is None:
+            state.average = float(state.count)
+        else:
+            state.average += self.alpha * (state.count - state.average)
+        # Windows without records count as zero.
+        state.average *= (1 - self.alpha) ** (window - state.window - 1)
+        state.window = window
+        state.count = 0
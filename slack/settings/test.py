@@ -18,3 +18,10 @@ DATABASES = {
 PASSWORD_HASHERS = (
     'django.contrib.auth.hashers.MD5PasswordHasher',
 )
+
+########## TEST APPS
+# test_project.settings is rewritten by the admin_scripts test cases, so the
+# app under test is added here, with staticfiles for the site's base.html.
+INSTALLED_APPS = tuple(INSTALLED_APPS) + (
+    'django.contrib.staticfiles', 'slack',
+)
@@ -0,0 +1,150 @@
+import hashlib
+import heapq
+import math
+
+from collections import OrderedDict
+
+from django.utils.encoding import force_bytes
+
+
+class SpaceSaving(object):
+    """
+    Space-Saving heavy hitters: approximate counts of the most frequent
+    keys of a stream in at most ``capacity`` counters.
+
+    A new key replaces the smallest counter and inherits its count, which is
+    remembered as the maximum overestimation (``error``) of the new key.
+    """
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counters = {}
+        self.total = 0
+
+    def __len__(self):
+        return len(self.counters)
+
+    def add(self, key, label=None, count=1):
+        self.total += count
+        counter = self.counters.get(key)
+        if counter is not None:
+            counter[0] += count
+            return
+        if len(self.counters) < self.capacity:
+            self.counters[key] = [count, 0, label]
+            return
+        victim = min(self.counters, key=lambda k: self.counters[k][0])
+        minimum = self.counters.pop(victim)[0]
+        self.counters[key] = [minimum + count, minimum, label]
+
+    def top(self, k=10):
+        """
+        Return up to ``k`` ``(key, count, error, label)`` tuples, most
+        frequent first.
+        """
+        return [
+            (key, counter[0], counter[1], counter[2])
+            for key, counter in heapq.nlargest(
+                k, self.counters.items(), key=lambda item: item[1][0]
+            )
+        ]
+
+
+class HyperLogLog(object):
+    """
+    Cardinality estimate in ``2 ** precision`` one-byte registers (1KB at
+    the default precision, ~3% standard error). Sketches of the same
+    precision merge by taking the register-wise maximum.
+    """
+    __slots__ = ('precision', 'registers', 'cached')
+
+    def __init__(self, precision=10, registers=None):
+        self.precision = precision
+        if registers is None:
+            self.registers = bytearray(1 << precision)
+        else:
+            self.registers = bytearray(registers)
+        self.cached = None
+
+    def add(self, value):
+        hashed = int(hashlib.sha1(force_bytes(value)).hexdigest()[:16], 16)
+        bits = 64 - self.precision
+        index = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            self.cached = None
+            return True
+        return False
+
+    def merge(self, registers):
+        merged = bytearray(map(max, self.registers, bytearray(registers)))
+        if merged != self.registers:
+            self.registers = merged
+            self.cached = None
+
+    def estimate(self):
+        if self.cached is None:
+            m = len(self.registers)
+            alpha = 0.7213 / (1 + 1.079 / m)
+            estimate = alpha * m * m / sum(
+                2.0 ** -register for register in self.registers
+            )
+            zeros = self.registers.count(b'\x00')
+            if estimate <= 2.5 * m and zeros:
+                estimate = m * math.log(float(m) / zeros)
+            self.cached = int(round(estimate))
+        return self.cached
+
+
+class DistinctCounter(object):
+    """
+    HyperLogLog sketches per key, for at most ``max_keys`` keys (least
+    recently updated keys are dropped).
+
+    ``sync`` merges the sketches changed since the last sync with the copies
+    in a Django cache, so every worker converges on cluster-wide estimates.
+    """
+    def __init__(self, name, max_keys=1000, precision=10):
+        self.name = name
+        self.max_keys = max_keys
+        self.precision = precision
+        self.sketches = OrderedDict()
+        self.dirty = set()
+
+    def add(self, key, value):
+        sketch = self.sketches.pop(key, None)
+        if sketch is None:
+            sketch = HyperLogLog(self.precision)
+        self.sketches[key] = sketch
+        while len(self.sketches) > self.max_keys:
+            self.dirty.discard(self.sketches.popitem(last=False)[0])
+        if sketch.add(value):
+            self.dirty.add(key)
+
+    def estimate(self, key):
+        sketch = self.sketches.get(key)
+        return sketch.estimate() if sketch is not None else None
+
+    def cache_key(self, key):
+        return 'slack:hll:%s:%s' % (self.name, key)
+
+    def sync(self, cache, timeout=None):
+        # Two round trips whatever the number of keys.
+        dirty, self.dirty = self.dirty, set()
+        sketches = dict(
+            (self.cache_key(key), self.sketches[key])
+            for key in dirty if key in self.sketches
+        )
+        if not sketches:
+            return
+        shared = cache.get_many(list(sketches))
+        for cache_key, sketch in sketches.items():
+            registers = shared.get(cache_key)
+            if registers is not None and (
+                len(registers) == len(sketch.registers)
+            ):
+                sketch.merge(registers)
+        cache.set_many(dict(
+            (cache_key, bytes(sketch.registers))
+            for cache_key, sketch in sketches.items()
+        ), timeout)
@@ -0,0 +1,62 @@
+from itertools import islice
+
+from django.utils import six
+from django.utils.encoding import force_text
+from django.views.debug import CLEANSED_SUBSTITUTE
+
+from slack.redaction import SENSITIVE_KEYS
+
+
+FIELDS = ('GET', 'POST', 'COOKIES', 'META')
+
+
+def truncate(value, max_length):
+    if isinstance(value, six.string_types):
+        value = value[:max_length + 1]
+    value = force_text(value, errors='replace')
+    if len(value) > max_length:
+        return value[:max_length] + '...'
+    return value
+
+
+def summarize_request(request, fields, filter, max_length=200,
+                      max_items=50):
+    """
+    Yield a compact description of ``request`` piece by piece.
+
+    Only the parts named in ``fields`` are included: ``{'GET': True}`` takes
+    every parameter, ``{'META': {'REMOTE_ADDR': True}}`` only the listed
+    keys. POST goes through the exception reporter filter, and keys that
+    look like credentials are cleansed everywhere. Values are cut to
+    ``max_length`` characters and each part to ``max_items`` entries, so the
+    output size does not depend on the size of the request.
+    """
+    yield 'path: %s\n' % truncate(request.path, max_length)
+
+    is_active = filter.is_active(request)
+    for name in FIELDS:
+        spec = fields.get(name)
+        if not spec:
+            continue
+
+        if name == 'POST' and is_active:
+            source = filter.get_post_parameters(request)
+        else:
+            source = getattr(request, name)
+
+        if isinstance(spec, dict):
+            keys = [key for key in spec if spec[key] and key in source]
+        else:
+            keys = islice(source, max_items + 1)
+
+        yield '%s: {' % name
+        for index, key in enumerate(keys):
+            if index == max_items:
+                yield '...'
+                break
+            if is_active and SENSITIVE_KEYS.search(key):
+                value = CLEANSED_SUBSTITUTE
+            else:
+                value = truncate(source[key], max_length)
+            yield '%s: %s, ' % (key, value)
+        yield '}\n'
@@ -0,0 +1,69 @@
+import hashlib
+
+from django.test import SimpleTestCase
+
+from slack.backoff import BackoffTable
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class BackoffTableTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.table = BackoffTable(size=1024, reset=3600, clock=self.clock)
+
+    def test_should_notify_on_powers_of_ten(self):
+        notified = [
+            count for count in (
+                self.table.observe('f1') for _ in range(1500)
+            ) if count is not None
+        ]
+
+        self.assertEqual(notified, [1, 10, 100, 1000])
+
+    def test_should_start_over_after_a_quiet_period(self):
+        for _ in range(5):
+            self.table.observe('f1')
+        self.clock.now += 3601
+
+        self.assertEqual(self.table.count('f1'), 0)
+        self.assertEqual(self.table.observe('f1'), 1)
+
+    def test_fingerprints_should_be_counted_separately(self):
+        self.table.observe('f1')
+        self.table.observe('f1')
+        self.table.observe('f2')
+
+        self.assertEqual(self.table.count('f1'), 2)
+        self.assertEqual(self.table.count('f2'), 1)
+        self.assertEqual(self.table.count('f3'), 0)
+
+    def test_full_window_should_replace_least_recently_seen(self):
+        table = BackoffTable(size=4, probes=4, clock=self.clock)
+        for index in range(4):
+            self.clock.now = index
+            table.observe('key%d' % index)
+        self.clock.now = 10
+        table.observe('key4')
+
+        self.assertEqual(table.count('key0'), 0)
+        self.assertEqual(table.count('key4'), 1)
+
+    def test_100k_fingerprints_should_fit_in_a_few_megabytes(self):
+        table = BackoffTable(clock=self.clock)
+        keys = [
+            hashlib.sha1(str(index).encode('ascii')).hexdigest()
+            for index in range(100000)
+        ]
+        for key in keys:
+            table.observe(key)
+
+        self.assertLess(table.nbytes(), 4 * 1024 * 1024)
+        kept = sum(1 for key in keys if table.count(key) == 1)
+        self.assertGreater(kept, 97000)
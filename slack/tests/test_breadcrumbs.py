@@ -0,0 +1,72 @@
+import logging
+import threading
+
+from django.http import request, HttpResponse
+from django.test import SimpleTestCase
+
+from slack import breadcrumbs
+from slack.breadcrumbs import BreadcrumbHandler, BreadcrumbMiddleware
+
+
+class BreadcrumbsTest(SimpleTestCase):
+    def setUp(self):
+        breadcrumbs.clear()
+        self.logger = logging.getLogger('slack.tests.breadcrumbs')
+        self.logger.setLevel(logging.DEBUG)
+        self.handler = BreadcrumbHandler(size=3)
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        breadcrumbs.clear()
+
+    def test_should_keep_only_last_entries(self):
+        for i in range(10):
+            self.logger.info('step %d', i)
+
+        crumbs = breadcrumbs.snapshot()
+
+        self.assertEqual(len(crumbs), 3)
+        self.assertTrue(
+            crumbs[0].endswith(' INFO slack.tests.breadcrumbs: step 7\n')
+        )
+        self.assertTrue(crumbs[2].endswith('step 9\n'))
+
+    def test_buffer_should_follow_handler_size(self):
+        breadcrumbs.add('INFO', 'test', 'created with the default size')
+        for i in range(5):
+            self.logger.info('step %d', i)
+
+        crumbs = breadcrumbs.snapshot()
+
+        self.assertEqual(len(crumbs), 3)
+        self.assertTrue(crumbs[0].endswith('step 2\n'))
+
+    def test_buffers_should_be_per_thread(self):
+        self.logger.info('main thread')
+
+        other = []
+        thread = threading.Thread(
+            target=lambda: other.extend(breadcrumbs.snapshot())
+        )
+        thread.start()
+        thread.join()
+
+        self.assertEqual(other, [])
+        self.assertEqual(len(breadcrumbs.snapshot()), 1)
+
+    def test_bad_format_arguments_should_not_raise(self):
+        breadcrumbs.add('INFO', 'test', 'value %d', ('x',))
+
+        self.assertIn("value %d ('x',)", breadcrumbs.snapshot()[0])
+
+    def test_middleware_should_clear_buffer_between_requests(self):
+        middleware = BreadcrumbMiddleware()
+        self.logger.info('previous request')
+
+        middleware.process_request(request.HttpRequest())
+        self.assertEqual(breadcrumbs.snapshot(), [])
+
+        self.logger.info('this request')
+        middleware.process_response(request.HttpRequest(), HttpResponse())
+        self.assertEqual(breadcrumbs.snapshot(), [])
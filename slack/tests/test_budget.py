@@ -0,0 +1,73 @@
+import sys
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from slack.budget import CpuBudget, innermost_frame, thread_cpu_time
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CpuBudgetTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.budget = CpuBudget(
+            budget=0.02, window=10, recover=0.5, clock=self.clock
+        )
+
+    def test_usage_should_be_fraction_of_window(self):
+        self.budget.record(0.05)
+        self.clock.now = 5
+        self.budget.record(0.05)
+
+        self.assertAlmostEqual(self.budget.usage(), 0.01)
+
+    def test_should_degrade_once_over_budget(self):
+        self.assertIsNone(self.budget.record(0.15))
+        self.assertEqual(self.budget.record(0.1), 'degraded')
+        self.assertIsNone(self.budget.record(0.1))
+        self.assertTrue(self.budget.degraded)
+        self.assertEqual(self.budget.stats()['degraded_records'], 1)
+
+    def test_should_recover_once_load_subsides(self):
+        self.budget.record(0.3)
+        self.clock.now = 5
+        self.assertIsNone(self.budget.record(0.01))
+
+        self.clock.now = 10
+        self.assertEqual(self.budget.record(0.01), 'recovered')
+        self.assertFalse(self.budget.degraded)
+        self.assertEqual(self.budget.transitions, 2)
+        self.assertEqual(self.budget.stats()['degraded_seconds'], 10)
+
+    def test_thread_cpu_time_should_not_count_other_threads(self):
+        def spin():
+            deadline = time.time() + 0.2
+            while time.time() < deadline:
+                pass
+
+        started = thread_cpu_time()
+        thread = threading.Thread(target=spin)
+        thread.start()
+        thread.join()
+
+        self.assertLess(thread_cpu_time() - started, 0.1)
+
+    def test_innermost_frame_should_name_raising_function(self):
+        def fail():
+            raise ValueError('boom')
+
+        try:
+            fail()
+        except ValueError:
+            tb = sys.exc_info()[2]
+
+        self.assertTrue(innermost_frame(tb).endswith(' in fail'))
+        self.assertIn('test_budget.py:', innermost_frame(tb))
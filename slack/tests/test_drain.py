@@ -0,0 +1,67 @@
+from django.test import SimpleTestCase
+
+from slack.drain import TemplateMiner
+
+
+class TemplateMinerTest(SimpleTestCase):
+    def setUp(self):
+        self.miner = TemplateMiner(depth=4, similarity=0.4, max_clusters=5)
+
+    def test_numbers_should_be_masked(self):
+        self.assertEqual(
+            self.miner.add('Payment 8812 failed for user 19'),
+            'Payment <*> failed for user <*>'
+        )
+        self.assertEqual(
+            self.miner.add('Payment 77 failed for user 3'),
+            'Payment <*> failed for user <*>'
+        )
+        self.assertEqual(len(self.miner.clusters), 1)
+
+    def test_differing_words_should_become_wildcards(self):
+        self.miner.add('Login failed for alice from web')
+        template = self.miner.add('Login failed for bob from web')
+
+        self.assertEqual(template, 'Login failed for <*> from web')
+        self.assertEqual(
+            self.miner.add('Login failed for carol from web'), template
+        )
+
+    def test_dissimilar_messages_should_not_be_merged(self):
+        self.miner.add('Login failed for alice from web')
+
+        self.assertEqual(
+            self.miner.add('Login took too long to complete'),
+            'Login took too long to complete'
+        )
+        self.assertEqual(len(self.miner.clusters), 2)
+
+    def test_different_lengths_should_not_be_merged(self):
+        self.miner.add('Cache miss for key')
+
+        self.assertEqual(
+            self.miner.add('Cache miss for key today'),
+            'Cache miss for key today'
+        )
+
+    def test_templates_should_be_bounded(self):
+        for index in range(20):
+            self.miner.add(' '.join(['word%s' % chr(97 + index)] * 3))
+
+        self.assertEqual(len(self.miner.clusters), 5)
+        self.assertEqual(
+            sum(len(cluster.leaf) for cluster in self.miner.clusters), 5
+        )
+        self.assertEqual(len(self.miner.root[3]), 5)
+
+    def test_empty_message(self):
+        self.assertEqual(self.miner.add(''), '')
+        self.assertEqual(self.miner.add('   '), '')
+
+    def test_cluster_id_should_not_change_as_it_generalizes(self):
+        first = self.miner.learn('Payment failed for alice')
+        second = self.miner.learn('Payment failed for bob')
+
+        self.assertIs(first, second)
+        self.assertEqual(second.template, 'Payment failed for <*>')
+        self.assertEqual(second.id, 'Payment failed for alice')
@@ -0,0 +1,54 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from slack.fanout import SKIPPED, fan_out, get_pool
+
+
+class FanOutTest(SimpleTestCase):
+    def test_should_return_result_of_each_task_in_order(self):
+        results = fan_out([
+            (lambda x: x * 2, (1,), 1),
+            (lambda x: x * 3, (2,), 1),
+        ])
+
+        self.assertEqual(results, [2, 6])
+
+    def test_slow_task_should_not_delay_the_others(self):
+        started = time.time()
+        results = fan_out([
+            (time.sleep, (2,), 0.1),
+            (lambda: 'fast', (), 1),
+        ])
+
+        self.assertEqual(results, [None, 'fast'])
+        self.assertLess(time.time() - started, 1)
+
+    def test_task_raising_should_be_reported_as_none(self):
+        def broken():
+            raise ValueError()
+
+        results = fan_out([(broken, (), 1), (lambda: 'ok', (), 1)])
+
+        self.assertEqual(results, [None, 'ok'])
+
+    def test_task_still_queued_at_its_deadline_should_never_run(self):
+        release = threading.Event()
+        ran = []
+        # Keep every worker busy past the deadline of the last task.
+        busy = [
+            (release.wait, (2,), 0.1)
+            for _ in range(get_pool(4)._processes)
+        ]
+
+        try:
+            results = fan_out(
+                busy + [(ran.append, (1,), 0.1)], skipped=SKIPPED
+            )
+        finally:
+            release.set()
+        time.sleep(0.1)
+
+        self.assertIs(results[-1], SKIPPED)
+        self.assertEqual(ran, [])
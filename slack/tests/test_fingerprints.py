@@ -0,0 +1,61 @@
+import logging
+import sys
+
+from django.test import SimpleTestCase
+
+from slack.fingerprints import describe, fingerprint
+
+
+def make_record(msg, args=(), exc_info=None):
+    return logging.LogRecord(
+        'django.request', logging.ERROR, __file__, 1, msg, args, exc_info
+    )
+
+
+def raise_value_error(value):
+    try:
+        raise ValueError(value)
+    except ValueError:
+        return sys.exc_info()
+
+
+class FingerprintTest(SimpleTestCase):
+    def test_same_exception_location_should_share_fingerprint(self):
+        first = make_record('a', exc_info=raise_value_error(1))
+        second = make_record('b', exc_info=raise_value_error(2))
+
+        self.assertEqual(fingerprint(first), fingerprint(second))
+
+    def test_different_exception_types_should_not_share_fingerprint(self):
+        try:
+            raise KeyError()
+        except KeyError:
+            other = make_record('a', exc_info=sys.exc_info())
+
+        self.assertNotEqual(
+            fingerprint(make_record('a', exc_info=raise_value_error(1))),
+            fingerprint(other)
+        )
+
+    def test_message_records_should_be_keyed_on_unformatted_message(self):
+        self.assertEqual(
+            fingerprint(make_record('Payment %s failed', (1,))),
+            fingerprint(make_record('Payment %s failed', (2,)))
+        )
+
+    def test_mined_template_should_replace_message(self):
+        first = make_record('Payment 8812 failed')
+        second = make_record('Payment 77 failed')
+        first.slack_template = second.slack_template = 'Payment <*> failed'
+
+        self.assertEqual(fingerprint(first), fingerprint(second))
+        self.assertEqual(describe(first), 'ERROR: Payment <*> failed')
+
+    def test_mined_template_id_should_outlast_generalization(self):
+        first = make_record('Payment failed for alice')
+        second = make_record('Payment failed for bob')
+        first.slack_template = 'Payment failed for alice'
+        second.slack_template = 'Payment failed for <*>'
+        first.slack_template_id = second.slack_template_id = first.msg
+
+        self.assertEqual(fingerprint(first), fingerprint(second))
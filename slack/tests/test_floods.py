@@ -0,0 +1,78 @@
+from django.test import SimpleTestCase
+
+from slack.floods import ClientFloods, format_flood
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ClientFloodsTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.floods = ClientFloods(
+            window=60, threshold=5, max_clients=3, summary_interval=600,
+            clock=self.clock
+        )
+
+    def observe(self, client, count, start=0, step=1):
+        results = []
+        for index in range(count):
+            self.clock.now = start + index * step
+            results.append(self.floods.observe(client))
+        return results
+
+    def test_should_collapse_a_client_over_threshold(self):
+        results = self.observe('IP 10.0.0.1', 8)
+
+        self.assertEqual(results, [True] * 4 + [False] * 4)
+        self.assertEqual(self.observe('IP 10.0.0.2', 1, start=8), [True])
+
+    def test_slow_client_should_not_be_collapsed(self):
+        results = self.observe('IP 10.0.0.1', 20, step=30)
+
+        self.assertTrue(all(results))
+
+    def test_window_should_slide_across_boundary(self):
+        self.observe('IP 10.0.0.1', 4, start=50)
+
+        self.assertEqual(self.observe('IP 10.0.0.1', 1, start=60), [False])
+
+    def test_sweep_should_summarize_finished_flood_once(self):
+        self.observe('IP 10.0.0.1', 25)
+        self.clock.now = 30
+        self.assertEqual(self.floods.sweep(), [])
+
+        self.clock.now = 200
+        self.assertEqual(self.floods.sweep(), [('IP 10.0.0.1', 21, 196)])
+        self.clock.now = 300
+        self.assertEqual(self.floods.sweep(), [])
+
+    def test_ongoing_flood_should_be_summarized_periodically(self):
+        self.observe('IP 10.0.0.1', 700)
+        self.clock.now = 699
+
+        summaries = self.floods.sweep()
+
+        self.assertEqual(summaries, [('IP 10.0.0.1', 696, 695)])
+        self.assertFalse(self.floods.observe('IP 10.0.0.1'))
+
+    def test_memory_should_be_bounded(self):
+        for index in range(10):
+            self.floods.observe('IP 10.0.0.%d' % index)
+
+        self.assertEqual(len(self.floods.clients), 3)
+        self.assertEqual(
+            list(self.floods.clients),
+            ['IP 10.0.0.7', 'IP 10.0.0.8', 'IP 10.0.0.9']
+        )
+
+    def test_format_flood(self):
+        self.assertEqual(
+            format_flood('IP 10.0.0.1', 1234, 300),
+            'Client IP 10.0.0.1 caused 1234 errors in 5 minutes'
+        )
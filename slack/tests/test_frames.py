@@ -0,0 +1,73 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from django.utils.functional import SimpleLazyObject
+
+from slack.frames import format_locals, lazy_repr
+
+
+class FakeClock(object):
+    def __init__(self, step):
+        self.now = 0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+class FormatLocalsTest(SimpleTestCase):
+    def test_should_include_locals_of_innermost_frame(self):
+        def view():
+            answer = 42
+            try:
+                raise ValueError()
+            except ValueError:
+                return sys.exc_info()[2]
+
+        output = ''.join(format_locals(view(), max_frames=1))
+
+        self.assertIn('in view\n', output)
+        self.assertIn('    answer = 42\n', output)
+        self.assertNotIn('test_should_include_locals', output)
+
+    def test_should_cap_value_length(self):
+        def view():
+            big = 'x' * 10000
+            try:
+                raise ValueError()
+            except ValueError:
+                return sys.exc_info()[2]
+
+        output = ''.join(format_locals(view(), max_frames=1, max_length=20))
+
+        self.assertLess(len(output), 200)
+
+    def test_should_stop_when_time_budget_is_spent(self):
+        def view():
+            a = b = c = 1
+            try:
+                raise ValueError()
+            except ValueError:
+                return sys.exc_info()[2]
+
+        output = ''.join(format_locals(
+            view(), max_frames=1, time_budget=1.5, clock=FakeClock(1)
+        ))
+
+        self.assertIn('    a = 1\n', output)
+        self.assertNotIn('    c = 1\n', output)
+        self.assertIn('<time budget exceeded>', output)
+
+    def test_lazy_objects_should_not_be_evaluated(self):
+        def evaluate():
+            raise AssertionError('evaluated')
+
+        self.assertEqual(
+            lazy_repr(User.objects.all()), '<unevaluated QuerySet>'
+        )
+        self.assertEqual(
+            lazy_repr(SimpleLazyObject(evaluate)), '<lazy object>'
+        )
+        self.assertIsNone(lazy_repr(42))
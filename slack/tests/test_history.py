@@ -0,0 +1,118 @@
+import logging
+import sys
+
+from datetime import timedelta
+from mock import patch
+
+from django.http import HttpRequest
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from slack.history import (
+    approximate_count, decode_cursor, filter_events, keyset_page, page_size
+)
+from slack.models import ErrorEvent
+from slack.registry import ErrorRegistry
+from slack.utils import SlackHandler
+
+
+class ErrorHistoryTest(TestCase):
+    def setUp(self):
+        self.now = timezone.now().replace(microsecond=0)
+        for index in range(7):
+            ErrorEvent.objects.create(
+                fingerprint='f%d' % (index % 2),
+                logger='django.request' if index % 2 else 'app',
+                level='ERROR',
+                exception_type='ValueError' if index < 4 else 'KeyError',
+                path='/%d/' % index,
+                timestamp=self.now - timedelta(minutes=index // 2)
+            )
+
+    def test_keyset_pages_should_cover_every_event_once(self):
+        seen = []
+        cursor = None
+        while True:
+            events, cursor = keyset_page(
+                ErrorEvent.objects.all(), cursor, size=3
+            )
+            seen.extend(event.pk for event in events)
+            if cursor is None:
+                break
+
+        expected = list(ErrorEvent.objects.order_by(
+            '-timestamp', '-id'
+        ).values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_should_filter_by_params(self):
+        events = filter_events(ErrorEvent.objects.all(), {
+            'logger': 'app',
+            'type': 'KeyError',
+            'since': (self.now - timedelta(minutes=2)).isoformat(),
+        })
+        self.assertEqual(
+            sorted(events.values_list('path', flat=True)), ['/4/']
+        )
+
+    def test_invalid_cursor_should_start_from_the_top(self):
+        self.assertIsNone(decode_cursor('nonsense'))
+        events, _ = keyset_page(ErrorEvent.objects.all(), 'nonsense', 2)
+        self.assertEqual(events[0].path, '/1/')
+
+    def test_page_size_should_be_bounded(self):
+        self.assertEqual(page_size('10'), 10)
+        self.assertEqual(page_size('100000'), 500)
+        self.assertEqual(page_size('x'), 50)
+        self.assertEqual(page_size(None), 50)
+
+    def test_approximate_count_should_stop_at_limit(self):
+        self.assertEqual(approximate_count(ErrorEvent.objects.all()), (7, True))
+        self.assertEqual(
+            approximate_count(ErrorEvent.objects.all(), limit=5), (5, False)
+        )
+
+    def test_registry_should_write_events_on_flush(self):
+        registry = ErrorRegistry(background=False)
+        registry.add_event('f9', 'app', 'ERROR', 'TypeError', '/x/')
+
+        self.assertEqual(registry.flush(), 1)
+        event = ErrorEvent.objects.get(fingerprint='f9')
+        self.assertEqual(event.exception_type, 'TypeError')
+        self.assertEqual(event.path, '/x/')
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        SLACK_ERROR_HISTORY=True,
+        IS_SLACK_ENABLED=True
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_handler_should_record_events_when_enabled(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {'ok': True}
+        registry = ErrorRegistry(background=False)
+        req = HttpRequest()
+        req.path = '/broken/'
+        try:
+            raise TypeError('boom')
+        except TypeError:
+            exc_info = sys.exc_info()
+        record = logging.LogRecord(
+            'django.request', logging.ERROR, __file__, 1, 'Internal error',
+            None, exc_info
+        )
+        record.request = req
+
+        with patch('slack.utils.get_registry', return_value=registry):
+            SlackHandler().handle(record)
+            with override_settings(SLACK_ERROR_HISTORY=False):
+                SlackHandler().handle(record)
+
+        self.assertEqual(registry.flush(), 1)
+        event = ErrorEvent.objects.get(path='/broken/')
+        self.assertEqual(event.logger, 'django.request')
+        self.assertEqual(event.level, 'ERROR')
+        self.assertEqual(event.exception_type, 'TypeError')
+        self.assertTrue(event.fingerprint)
@@ -0,0 +1,125 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from mock import patch
+
+from django.test import SimpleTestCase
+
+from slack.hostqueue import HostQueue
+from slack.outbox import ChannelLimiter
+from slack.reports import Report
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class HostQueueTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.clock = Clock()
+        self.queue = self.make_queue()
+        self.sent = []
+        self.given_up = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_queue(self, **kwargs):
+        kwargs.setdefault('limiter', ChannelLimiter(burst=100))
+        kwargs.setdefault('background', False)
+        return HostQueue(
+            os.path.join(self.directory, 'queue.sqlite3'), clock=self.clock,
+            **kwargs
+        )
+
+    def report(self, text, level=40):
+        return Report(
+            subject=text, text=text, message=text, html_message=None,
+            level=level
+        )
+
+    def send(self, report, destination, timeout):
+        self.sent.append(report.text)
+        return True
+
+    def test_should_use_wal_journal(self):
+        mode = self.queue.connect().execute(
+            'PRAGMA journal_mode'
+        ).fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_should_drain_highest_priority_first(self):
+        self.queue.put(self.report('warning'), [({}, '#a')], 30)
+        self.clock.now += 1
+        self.queue.put(self.report('critical'), [({}, '#a')], 50)
+        self.queue.put(self.report('error'), [({}, '#a')], 40)
+
+        self.assertEqual(self.queue.drain(self.send, None), (3, 0, 0))
+        self.assertEqual(self.sent, ['critical', 'error', 'warning'])
+        self.assertEqual(self.queue.drain(self.send, None), (0, 0, 0))
+
+    def test_only_one_process_should_hold_the_lease(self):
+        self.assertTrue(self.queue.elect())
+        self.queue.connect().execute('UPDATE leader SET pid = pid + 1')
+
+        self.assertFalse(self.queue.elect())
+        self.clock.now += self.queue.lease + 1
+        self.assertTrue(self.queue.elect())
+
+    def test_batch_should_not_be_sent_again_by_the_next_leaseholder(self):
+        other = self.make_queue()
+        self.queue.put(self.report('critical'), [({}, '#a')], 50)
+
+        def send(report, destination, timeout):
+            # The lease expires and another process drains mid-round.
+            self.clock.now += 11
+            other.drain(self.send, self.given_up.append)
+            return self.send(report, destination, timeout)
+
+        self.assertEqual(self.queue.drain(send, self.given_up.append), (
+            1, 0, 0
+        ))
+        self.assertEqual(self.sent, ['critical'])
+
+    def test_failed_alerts_should_be_retried_then_given_up(self):
+        queue = self.make_queue(max_attempts=2, retry_delay=10)
+        queue.put(self.report('boom'), [({}, '#a')])
+
+        self.assertEqual(
+            queue.drain(lambda *args: False, self.given_up.append), (0, 1, 0)
+        )
+        self.assertEqual(queue.drain(self.send, None), (0, 0, 0))
+
+        self.clock.now += 10
+        queue.drain(lambda *args: False, self.given_up.append)
+        self.assertEqual([r.text for r in self.given_up], ['boom'])
+        self.assertEqual(queue.drain(self.send, None), (0, 0, 0))
+
+    def test_unflushed_rows_should_be_kept_on_write_errors(self):
+        queue = self.make_queue(background=True)
+        queue.put(self.report('boom'), [({}, '#a'), ({}, '#b')])
+        self.assertEqual(len(queue.buffer), 2)
+
+        with patch.object(
+            queue, 'connect', side_effect=sqlite3.OperationalError('locked')
+        ):
+            self.assertEqual(queue.flush(), 0)
+        self.assertEqual(len(queue.buffer), 2)
+
+        self.assertEqual(queue.flush(), 2)
+        self.assertEqual(queue.buffer, [])
+
+    def test_purge_should_drop_old_alerts(self):
+        queue = self.make_queue(max_age=60, purge_batch=1)
+        queue.put(self.report('old'), [({}, '#a'), ({}, '#b')])
+        self.clock.now += 120
+
+        self.assertEqual(queue.purge(), 1)
+        self.assertEqual(queue.purge(), 1)
+        self.assertEqual(queue.purge(), 0)
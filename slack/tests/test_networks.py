@@ -0,0 +1,105 @@
+from django.test import SimpleTestCase
+
+from slack.networks import (
+    NetworkIndex, client_address, parse_address, parse_network
+)
+
+
+class ParseTest(SimpleTestCase):
+    def test_parse_address(self):
+        self.assertEqual(parse_address('10.0.0.1'), (4, 0x0a000001))
+        self.assertEqual(parse_address('::1'), (6, 1))
+        self.assertEqual(parse_address('fe80::1%eth0'), (6, 0xfe80 << 112 | 1))
+        self.assertEqual(parse_address('::ffff:10.0.0.1'), (4, 0x0a000001))
+
+    def test_parse_address_should_reject_invalid(self):
+        for address in ('10.0.0', '10.0.0.256', 'example.com', '', ':::'):
+            self.assertRaises(ValueError, parse_address, address)
+
+    def test_parse_network(self):
+        self.assertEqual(
+            parse_network('10.1.2.3/16'), (4, 0x0a010000, 0x0a01ffff)
+        )
+        self.assertEqual(
+            parse_network('2001:db8::/32'),
+            (6, 0x20010db8 << 96, (0x20010db8 << 96) | ((1 << 96) - 1))
+        )
+        self.assertEqual(
+            parse_network('127.0.0.1'), (4, 0x7f000001, 0x7f000001)
+        )
+        self.assertEqual(
+            parse_network('::ffff:10.0.0.0/104'), (4, 0x0a000000, 0x0affffff)
+        )
+        self.assertRaises(ValueError, parse_network, '10.0.0.0/33')
+        self.assertRaises(ValueError, parse_network, '10.0.0.0/x')
+
+
+class NetworkIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = NetworkIndex([
+            '127.0.0.1', '10.1.0.0/16', '10.2.0.0/16', '10.1.128.0/17',
+            '192.168.0.0/24', 'fd00::/8', 'not an address',
+        ])
+
+    def test_should_match_addresses_and_networks(self):
+        for address in (
+            '127.0.0.1', '10.1.0.0', '10.1.255.255', '10.2.3.4',
+            '192.168.0.99', 'fd12:3456::1', '::ffff:10.1.2.3',
+        ):
+            self.assertIn(address, self.index)
+
+    def test_should_not_match_other_addresses(self):
+        for address in (
+            '127.0.0.2', '10.0.255.255', '10.3.0.0', '192.168.1.1', '::1',
+            'fe80::1', None, '', 'garbage',
+        ):
+            self.assertNotIn(address, self.index)
+
+    def test_overlapping_networks_should_be_merged(self):
+        self.assertEqual(
+            self.index.firsts[4], [0x0a010000, 0x7f000001, 0xc0a80000]
+        )
+
+    def test_many_networks(self):
+        index = NetworkIndex(
+            '10.%d.%d.0/24' % (i // 256, i % 256) for i in range(0, 20000, 2)
+        )
+
+        self.assertIn('10.0.4.1', index)
+        self.assertNotIn('10.0.5.1', index)
+        self.assertIn('10.78.30.200', index)
+
+
+class ClientAddressTest(SimpleTestCase):
+    def setUp(self):
+        self.proxies = NetworkIndex(['10.0.0.0/8'])
+
+    def test_untrusted_remote_should_ignore_forwarded_for(self):
+        meta = {
+            'REMOTE_ADDR': '203.0.113.9',
+            'HTTP_X_FORWARDED_FOR': '127.0.0.1',
+        }
+
+        self.assertEqual(client_address(meta, self.proxies), '203.0.113.9')
+
+    def test_should_take_rightmost_untrusted_hop(self):
+        meta = {
+            'REMOTE_ADDR': '10.0.0.2',
+            'HTTP_X_FORWARDED_FOR': '127.0.0.1, 198.51.100.7, 10.0.0.1',
+        }
+
+        self.assertEqual(client_address(meta, self.proxies), '198.51.100.7')
+
+    def test_only_trusted_hops_should_return_leftmost(self):
+        meta = {
+            'REMOTE_ADDR': '10.0.0.2',
+            'HTTP_X_FORWARDED_FOR': '10.0.0.3, 10.0.0.1',
+        }
+
+        self.assertEqual(client_address(meta, self.proxies), '10.0.0.3')
+
+    def test_without_forwarded_for_should_return_remote(self):
+        self.assertEqual(
+            client_address({'REMOTE_ADDR': '10.0.0.2'}, self.proxies),
+            '10.0.0.2'
+        )
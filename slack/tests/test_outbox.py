@@ -0,0 +1,119 @@
+from datetime import timedelta
+from mock import Mock, patch
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from slack.models import OutboxMessage
+from slack.outbox import (
+    ChannelLimiter, Drainer, claim, decode_report, encode_report, enqueue
+)
+from slack.reports import Report
+from slack.utils import SlackHandler
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class OutboxTest(TestCase):
+    def setUp(self):
+        self.report = Report(
+            subject='ERROR: boom', text='```boom```', message='boom',
+            html_message=None, fingerprint='f1'
+        )
+        self.handler = Mock()
+        self.handler.send_queued.return_value = True
+
+    def test_report_should_survive_encoding(self):
+        report = self.report._replace(attachment=('a', 'b'))
+        decoded = decode_report(encode_report(report))
+
+        self.assertEqual(decoded.text, report.text)
+        self.assertEqual(''.join(decoded.attachment), 'ab')
+
+    def test_rows_should_only_be_claimed_once(self):
+        enqueue(self.report, [({}, '#a'), ({'channel': '#b'}, '#b')])
+        enqueue(self.report, [({}, '#a')])
+
+        first = claim(batch_size=2)
+        second = claim(batch_size=2)
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse(
+            set(m.pk for m in first) & set(m.pk for m in second)
+        )
+        self.assertEqual(claim(batch_size=2), [])
+
+    def test_drain_should_send_and_delete(self):
+        enqueue(self.report, [({'channel': '#a'}, '#a')])
+
+        drainer = Drainer(self.handler, limiter=ChannelLimiter(burst=10))
+        self.assertEqual(drainer.drain(), (1, 0, 0))
+
+        report, destination, timeout = self.handler.send_queued.call_args[0]
+        self.assertEqual(report.text, '```boom```')
+        self.assertEqual(destination, {'channel': '#a'})
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_failed_messages_should_back_off_then_mail_admins(self):
+        self.handler.send_queued.return_value = False
+        enqueue(self.report, [({}, '#a')])
+        drainer = Drainer(
+            self.handler, max_attempts=2, retry_delay=10,
+            limiter=ChannelLimiter(burst=10)
+        )
+
+        self.assertEqual(drainer.drain(), (0, 1, 0))
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.attempts, 1)
+        self.assertGreater(
+            message.available_at, timezone.now() + timedelta(seconds=5)
+        )
+
+        OutboxMessage.objects.update(available_at=timezone.now())
+        drainer.drain()
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.assertEqual(self.handler.mail_admins.call_count, 1)
+
+    def test_channel_over_its_rate_should_be_deferred(self):
+        enqueue(self.report, [({}, '#a'), ({}, '#a'), ({}, '#b')])
+        drainer = Drainer(
+            self.handler, limiter=ChannelLimiter(rate=1, burst=1)
+        )
+
+        self.assertEqual(drainer.drain(), (2, 0, 1))
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.channel, '#a')
+        self.assertEqual(message.claimed_by, '')
+
+    def test_limiter_should_refill_over_time(self):
+        clock = Clock()
+        limiter = ChannelLimiter(rate=2, burst=2, clock=clock)
+
+        self.assertEqual(limiter.delay('#a'), 0)
+        self.assertEqual(limiter.delay('#a'), 0)
+        self.assertAlmostEqual(limiter.delay('#a'), 0.5)
+        clock.now += 0.5
+        self.assertEqual(limiter.delay('#a'), 0)
+
+    @override_settings(
+        SLACK_OUTBOX=True, SLACK_CHANNEL='#errors',
+        SLACK_DESTINATIONS=[{}, {'type': 'email'}]
+    )
+    def test_handler_should_write_to_outbox_instead_of_posting(self):
+        handler = SlackHandler()
+        with patch.object(handler, 'deliver') as mock_deliver:
+            handler.dispatch(self.report)
+
+        self.assertFalse(mock_deliver.called)
+        self.assertEqual(
+            list(OutboxMessage.objects.values_list('channel', flat=True)),
+            ['#errors', 'email']
+        )
@@ -0,0 +1,212 @@
+import logging
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from slack.priority import DeliveryQueue, format_dropped
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class DeliveryQueueTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def flood(self, queue, milliseconds, critical_at, send_every=5):
+        """
+        Put 10 WARNING records per millisecond (10k/s) while sending one
+        message every ``send_every`` milliseconds, with a CRITICAL record
+        at millisecond ``critical_at``. Returns when it was sent.
+        """
+        for step in range(milliseconds):
+            self.clock.now = step / 1000.0
+            for _ in range(10):
+                queue.put(logging.WARNING, 'warning')
+            if step == critical_at:
+                queue.put(logging.CRITICAL, 'critical')
+            if step % send_every == 0:
+                if queue.pop() == (logging.CRITICAL, 'critical'):
+                    return step
+        return None
+
+    def test_critical_should_not_wait_behind_a_warning_flood(self):
+        queue = DeliveryQueue(clock=self.clock)
+
+        sent_at = self.flood(queue, 5000, critical_at=2001)
+
+        # Sent in the next delivery slot, whatever the flood queued.
+        self.assertIsNotNone(sent_at)
+        self.assertLessEqual(sent_at - 2001, 5)
+        self.assertGreater(queue.drain_dropped()[0][logging.WARNING], 15000)
+
+    def test_warning_should_drain_eventually_under_an_error_flood(self):
+        queue = DeliveryQueue(aging=1, clock=self.clock)
+        queue.put(logging.WARNING, 'warning')
+
+        sent = None
+        for step in range(10000):
+            self.clock.now = step / 1000.0
+            queue.put(logging.ERROR, 'error')
+            if step % 5 == 0 and queue.pop() == (logging.WARNING, 'warning'):
+                sent = self.clock.now
+                break
+
+        self.assertIsNotNone(sent)
+        self.assertLess(sent, 5)
+
+    def test_same_level_should_be_first_in_first_out(self):
+        queue = DeliveryQueue(clock=self.clock)
+        for index in range(3):
+            self.clock.now = index
+            queue.put(logging.ERROR, index)
+
+        self.assertEqual(
+            [queue.pop()[1] for _ in range(3)], [0, 1, 2]
+        )
+        self.assertIsNone(queue.pop())
+
+    def test_full_level_should_drop_incoming(self):
+        queue = DeliveryQueue(capacity={logging.WARNING: 2}, clock=self.clock)
+        results = [queue.put(logging.WARNING, i) for i in range(3)]
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(queue.drain_dropped(), ({logging.WARNING: 1}, []))
+        self.assertEqual(queue.drain_dropped(), ({}, []))
+
+    def test_full_queue_should_evict_lowest_level_first(self):
+        queue = DeliveryQueue(max_size=3, clock=self.clock)
+        queue.put(logging.WARNING, 'w1')
+        queue.put(logging.WARNING, 'w2')
+        queue.put(logging.ERROR, 'e1')
+
+        self.assertTrue(queue.put(logging.CRITICAL, 'c1'))
+        self.assertFalse(queue.put(logging.INFO, 'i1'))
+        self.assertEqual(
+            [queue.pop()[1] for _ in range(3)], ['c1', 'e1', 'w1']
+        )
+        self.assertEqual(
+            queue.drain_dropped()[0], {logging.WARNING: 1, logging.INFO: 1}
+        )
+
+    def test_evicting_a_whole_level_should_not_break_ordering(self):
+        queue = DeliveryQueue(max_size=1, clock=self.clock)
+        queue.put(logging.WARNING, 'w1')
+        queue.put(logging.ERROR, 'e1')
+        queue.pop()
+        queue.put(logging.WARNING, 'w2')
+
+        self.assertEqual(queue.pop(), (logging.WARNING, 'w2'))
+        self.assertIsNone(queue.pop())
+
+    def test_drop_oldest_should_evict_the_head_of_the_level(self):
+        queue = DeliveryQueue(
+            capacity={logging.WARNING: 2}, policy='drop-oldest',
+            clock=self.clock
+        )
+        for index in range(4):
+            self.assertTrue(queue.put(logging.WARNING, index))
+
+        self.assertEqual([queue.pop()[1] for _ in range(2)], [2, 3])
+        self.assertEqual(queue.drain_dropped()[0], {logging.WARNING: 2})
+
+    def test_block_should_wait_for_room_then_drop(self):
+        queue = DeliveryQueue(
+            capacity={logging.WARNING: 1}, policy='block', block_timeout=0.05
+        )
+        queue.put(logging.WARNING, 'w1')
+
+        started = time.time()
+        self.assertFalse(queue.put(logging.WARNING, 'w2'))
+        self.assertGreaterEqual(time.time() - started, 0.05)
+
+        threading.Timer(0.01, queue.pop).start()
+        queue.block_timeout = 1
+        self.assertTrue(queue.put(logging.WARNING, 'w3'))
+        self.assertEqual(queue.pop(), (logging.WARNING, 'w3'))
+
+    def test_collapse_should_summarize_dropped_fingerprints(self):
+        queue = DeliveryQueue(
+            capacity={logging.WARNING: 1}, policy='collapse', max_collapsed=2,
+            clock=self.clock
+        )
+        queue.put(logging.WARNING, 'w')
+        for key in ('a', 'a', 'a', 'b', 'c'):
+            queue.reject(logging.WARNING, key, 'label %s' % key)
+
+        dropped, collapsed = queue.drain_dropped()
+        self.assertEqual(dropped, {logging.WARNING: 5})
+        self.assertEqual(collapsed, [(3, 'label a'), (1, 'label b')])
+        self.assertEqual(
+            format_dropped(dropped, collapsed),
+            '5 alerts dropped (5 WARNING)\n     3  label a\n     1  label b'
+        )
+
+    def test_reject_should_leave_room_checks_to_put_for_drop_oldest(self):
+        queue = DeliveryQueue(
+            capacity={logging.WARNING: 1}, policy='drop-oldest',
+            clock=self.clock
+        )
+        queue.put(logging.WARNING, 'w1')
+
+        self.assertFalse(queue.reject(logging.WARNING))
+        self.assertEqual(queue.drain_dropped(), ({}, []))
+
+    def test_unknown_policy_should_raise(self):
+        self.assertRaises(ValueError, DeliveryQueue, policy='drop-random')
+
+    def test_format_dropped_should_list_highest_level_first(self):
+        self.assertEqual(
+            format_dropped({logging.WARNING: 9900, logging.ERROR: 3}),
+            '9903 alerts dropped (3 ERROR, 9900 WARNING)'
+        )
+
+    def test_worker_should_send_critical_promptly_during_a_flood(self):
+        queue = DeliveryQueue()
+        sent = {}
+
+        def send(level, item):
+            if item == 'critical':
+                sent['at'] = time.time()
+            time.sleep(0.001)
+
+        queue.start(send, lambda dropped, collapsed: None)
+        self.addCleanup(queue.stop)
+        stop = threading.Event()
+
+        def flood():
+            while not stop.is_set():
+                for _ in range(10):
+                    queue.put(logging.WARNING, 'warning')
+                time.sleep(0.001)
+
+        flooder = threading.Thread(target=flood)
+        flooder.start()
+        try:
+            time.sleep(0.2)
+            queued_at = time.time()
+            queue.put(logging.CRITICAL, 'critical')
+            time.sleep(0.5)
+        finally:
+            stop.set()
+            flooder.join()
+
+        self.assertIn('at', sent)
+        self.assertLess(sent['at'] - queued_at, 0.25)
+
+    def test_stop_should_end_the_worker(self):
+        queue = DeliveryQueue()
+        queue.start(lambda level, item: None, lambda dropped, collapsed: None)
+        worker = queue.worker
+
+        queue.stop(timeout=2)
+
+        self.assertFalse(worker.is_alive())
+        queue.put(logging.ERROR, 'kept')
+        self.assertEqual(queue.pop(), (logging.ERROR, 'kept'))
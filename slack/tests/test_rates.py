@@ -0,0 +1,65 @@
+from django.test import SimpleTestCase
+
+from slack.rates import RateTracker
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RateTrackerTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.tracker = RateTracker(
+            bucket=60, alpha=0.1, threshold=20, min_count=10,
+            clock=self.clock
+        )
+
+    def steady(self, key, per_bucket, buckets):
+        results = []
+        for bucket in range(buckets):
+            for i in range(per_bucket):
+                self.clock.now = bucket * 60 + i
+                results.append(self.tracker.observe(key))
+        return results
+
+    def test_first_occurrence_should_be_new(self):
+        self.assertEqual(self.tracker.observe('f'), 'new')
+        self.assertIsNone(self.tracker.observe('f'))
+
+    def test_steady_rate_should_not_alert(self):
+        results = self.steady('f', 2, 60)
+
+        self.assertEqual([r for r in results if r], ['new'])
+        self.assertEqual(self.tracker.rate('f'), (2, 2.0))
+
+    def test_sudden_increase_should_alert_once_per_bucket(self):
+        self.steady('f', 2, 60)
+
+        results = []
+        for i in range(100):
+            self.clock.now = 3600 + i * 0.5
+            results.append(self.tracker.observe('f'))
+
+        self.assertEqual(results.count('spike'), 1)
+        self.assertEqual(results.index('spike'), 40)
+
+    def test_quiet_buckets_should_decay_baseline(self):
+        self.steady('f', 10, 10)
+        self.clock.now = 100 * 60
+        self.tracker.observe('f')
+
+        count, baseline = self.tracker.rate('f')
+        self.assertLess(baseline, 10 * 0.9 ** 80)
+
+    def test_memory_should_be_bounded(self):
+        tracker = RateTracker(max_keys=100, clock=self.clock)
+        for i in range(1000):
+            tracker.observe(i)
+
+        self.assertEqual(len(tracker.states), 100)
+        self.assertIsNone(tracker.rate(0))
@@ -0,0 +1,88 @@
+from datetime import timedelta
+from mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from slack.models import ErrorGroup
+from slack.registry import ErrorRegistry
+
+
+class ErrorRegistryTest(TestCase):
+    def setUp(self):
+        self.registry = ErrorRegistry(background=False)
+        self.now = timezone.now()
+
+    def test_should_buffer_until_flush(self):
+        for _ in range(3):
+            self.registry.add('f1', 'django.request', 'ERROR', 'ValueError')
+
+        self.assertEqual(ErrorGroup.objects.count(), 0)
+        self.assertEqual(self.registry.flush(), 1)
+
+        group = ErrorGroup.objects.get(fingerprint='f1')
+        self.assertEqual(group.count, 3)
+        self.assertEqual(group.logger, 'django.request')
+
+    def test_flush_should_update_existing_groups(self):
+        later = self.now + timedelta(minutes=5)
+        self.registry.add('f1', 'django.request', 'ERROR', 'a', self.now)
+        self.registry.add('f2', 'django.request', 'ERROR', 'b', self.now)
+        self.registry.flush()
+
+        self.registry.add('f1', 'django.request', 'ERROR', 'a', later)
+        self.registry.add('f3', 'django.request', 'ERROR', 'c', later)
+        self.registry.flush()
+
+        f1 = ErrorGroup.objects.get(fingerprint='f1')
+        self.assertEqual(f1.count, 2)
+        self.assertEqual(f1.first_seen, self.now)
+        self.assertEqual(f1.last_seen, later)
+        self.assertEqual(ErrorGroup.objects.count(), 3)
+
+    @patch('slack.registry.UPSERT_CHUNK', 2)
+    def test_upsert_should_write_groups_in_chunks(self):
+        for key in ('f1', 'f2', 'f3'):
+            self.registry.add(key, 'django.request', 'ERROR', key, self.now)
+        self.registry.flush()
+        for key in ('f1', 'f2', 'f3'):
+            self.registry.add(key, 'django.request', 'ERROR', key, self.now)
+
+        with self.assertNumQueries(2):
+            self.registry.upsert(self.registry.pending)
+
+        self.assertEqual(
+            sorted(ErrorGroup.objects.values_list('fingerprint', 'count')),
+            [('f1', 2), ('f2', 2), ('f3', 2)]
+        )
+
+    def test_orm_fallback_should_match_upsert(self):
+        self.registry.add('f1', 'django.request', 'ERROR', 'a', self.now)
+        self.registry.flush()
+        self.registry.add('f1', 'django.request', 'ERROR', 'a', self.now)
+
+        with patch('slack.registry.connection') as mock_connection:
+            mock_connection.vendor = 'oracle'
+            self.registry.upsert(self.registry.pending)
+
+        self.assertEqual(ErrorGroup.objects.get(fingerprint='f1').count, 2)
+
+    def test_failed_flush_should_keep_pending_updates(self):
+        self.registry.add('f1', 'django.request', 'ERROR', 'a')
+
+        with patch.object(
+            self.registry, 'upsert', side_effect=Exception('db is down')
+        ):
+            self.assertEqual(self.registry.flush(), 0)
+
+        self.assertEqual(self.registry.pending['f1'][5], 1)
+        self.registry.flush()
+        self.assertEqual(ErrorGroup.objects.get(fingerprint='f1').count, 1)
+
+    def test_should_drop_new_fingerprints_when_buffer_is_full(self):
+        registry = ErrorRegistry(max_keys=2, background=False)
+        for key in ('f1', 'f2', 'f3'):
+            registry.add(key, 'django.request', 'ERROR', key)
+
+        self.assertEqual(sorted(registry.pending), ['f1', 'f2'])
+        self.assertEqual(registry.dropped, 1)
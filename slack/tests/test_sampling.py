@@ -0,0 +1,70 @@
+from django.test import SimpleTestCase
+
+from slack.sampling import AdaptiveSampler
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRandom(object):
+    """Cycles through evenly spread values in [0, 1)."""
+    def __init__(self, steps=1000):
+        self.steps = steps
+        self.index = 0
+
+    def __call__(self):
+        self.index = (self.index + 1) % self.steps
+        return self.index / float(self.steps)
+
+
+class AdaptiveSamplerTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.sampler = AdaptiveSampler(
+            {'django.security': 10}, clock=self.clock, random=FakeRandom()
+        )
+
+    def run_minutes(self, name, per_minute, minutes):
+        kept = []
+        for minute in range(minutes):
+            sent = []
+            for index in range(per_minute):
+                self.clock.now = minute * 60 + index * 60.0 / per_minute
+                rate = self.sampler.sample(name)
+                if rate is not None:
+                    sent.append(rate)
+            kept.append(sent)
+        return kept
+
+    def test_other_loggers_should_not_be_sampled(self):
+        self.assertEqual(self.sampler.sample('django.request'), 1)
+
+    def test_within_budget_should_keep_everything(self):
+        kept = self.run_minutes('django.security', 5, 3)
+
+        self.assertEqual([len(sent) for sent in kept], [5, 5, 5])
+        self.assertEqual(set(kept[-1]), set([1]))
+
+    def test_should_converge_on_budget_and_report_rate(self):
+        kept = self.run_minutes('django.security.DisallowedHost', 2500, 5)
+
+        for sent in kept[1:]:
+            self.assertGreaterEqual(len(sent), 7)
+            self.assertLessEqual(len(sent), 13)
+        self.assertEqual(set(kept[-1]), set([250]))
+
+    def test_burst_should_be_sampled_within_its_first_window(self):
+        kept = self.run_minutes('django.security', 2500, 1)
+
+        self.assertLess(len(kept[0]), 200)
+
+    def test_quiet_minutes_should_lower_the_estimate(self):
+        self.run_minutes('django.security', 2500, 2)
+        self.clock.now = 20 * 60
+
+        self.assertEqual(self.sampler.sample('django.security'), 1)
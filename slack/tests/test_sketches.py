@@ -0,0 +1,130 @@
+import random
+
+from django.test import SimpleTestCase
+
+from slack.sketches import DistinctCounter, HyperLogLog, SpaceSaving
+
+
+class SpaceSavingTest(SimpleTestCase):
+    def test_should_count_exactly_below_capacity(self):
+        sketch = SpaceSaving(capacity=10)
+        for key in 'aaabbc':
+            sketch.add(key)
+
+        self.assertEqual(
+            [(key, count, error) for key, count, error, _ in sketch.top(3)],
+            [('a', 3, 0), ('b', 2, 0), ('c', 1, 0)]
+        )
+        self.assertEqual(sketch.total, 6)
+
+    def test_memory_should_be_bounded_by_capacity(self):
+        sketch = SpaceSaving(capacity=50)
+        for i in range(10000):
+            sketch.add(i)
+
+        self.assertEqual(len(sketch), 50)
+
+    def test_should_find_heavy_hitters_among_noise(self):
+        rng = random.Random(42)
+        sketch = SpaceSaving(capacity=20)
+        for i in range(20000):
+            if i % 4 == 0:
+                sketch.add('heavy', label='ValueError: heavy')
+            elif i % 10 == 1:
+                sketch.add('medium')
+            else:
+                sketch.add(rng.randint(0, 100000))
+
+        top = sketch.top(2)
+        self.assertEqual([key for key, _, _, _ in top], ['heavy', 'medium'])
+        self.assertGreaterEqual(top[0][1], 5000)
+        self.assertLessEqual(top[0][1] - top[0][2], 5000)
+        self.assertEqual(top[0][3], 'ValueError: heavy')
+
+
+class FakeCache(dict):
+    def __init__(self):
+        super(FakeCache, self).__init__()
+        self.round_trips = 0
+
+    def get_many(self, keys):
+        self.round_trips += 1
+        return dict((key, self[key]) for key in keys if key in self)
+
+    def set_many(self, data, timeout=None):
+        self.round_trips += 1
+        self.update(data)
+
+
+class HyperLogLogTest(SimpleTestCase):
+    def test_estimate_should_be_close_to_true_cardinality(self):
+        for cardinality in (100, 2300, 50000):
+            sketch = HyperLogLog()
+            for i in range(cardinality):
+                sketch.add('10.%d.%d.%d' % (i >> 16, (i >> 8) & 255, i & 255))
+
+            self.assertAlmostEqual(
+                sketch.estimate(), cardinality, delta=cardinality * 0.1
+            )
+
+    def test_duplicates_should_not_change_estimate(self):
+        sketch = HyperLogLog()
+        for _ in range(1000):
+            sketch.add('10.0.0.1')
+
+        self.assertEqual(sketch.estimate(), 1)
+
+    def test_merge_should_estimate_union(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        for i in range(3000):
+            first.add(i)
+        for i in range(2000, 5000):
+            second.add(i)
+
+        first.merge(bytes(second.registers))
+
+        self.assertAlmostEqual(first.estimate(), 5000, delta=500)
+
+    def test_should_use_fixed_memory(self):
+        sketch = HyperLogLog(precision=10)
+        for i in range(10000):
+            sketch.add(i)
+
+        self.assertEqual(len(sketch.registers), 1024)
+
+
+class DistinctCounterTest(SimpleTestCase):
+    def test_should_drop_least_recently_updated_keys(self):
+        counter = DistinctCounter('ip', max_keys=2)
+        counter.add('a', '10.0.0.1')
+        counter.add('b', '10.0.0.1')
+        counter.add('a', '10.0.0.2')
+        counter.add('c', '10.0.0.1')
+
+        self.assertEqual(counter.estimate('a'), 2)
+        self.assertIsNone(counter.estimate('b'))
+
+    def test_sync_should_merge_sketches_across_workers(self):
+        cache = FakeCache()
+        first, second = DistinctCounter('ip'), DistinctCounter('ip')
+        for i in range(1000):
+            first.add('f', i)
+        for i in range(1000, 2000):
+            second.add('f', i)
+
+        first.sync(cache)
+        second.sync(cache)
+
+        self.assertAlmostEqual(second.estimate('f'), 2000, delta=200)
+
+    def test_sync_should_batch_cache_round_trips(self):
+        cache = FakeCache()
+        counter = DistinctCounter('ip')
+        for key in range(100):
+            counter.add(key, '10.0.0.1')
+
+        counter.sync(cache)
+        counter.sync(cache)
+
+        self.assertEqual(cache.round_trips, 2)
+        self.assertEqual(len(cache), 100)
@@ -0,0 +1,69 @@
+from django.http import request, QueryDict
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+from django.views.debug import SafeExceptionReporterFilter
+from django.views.decorators.debug import sensitive_post_parameters
+
+from slack.summaries import summarize_request, truncate
+
+
+@override_settings(DEBUG=False)
+class SummarizeRequestTest(SimpleTestCase):
+    def setUp(self):
+        self.req = request.HttpRequest()
+        self.req.path = '/checkout/'
+        self.req.GET = QueryDict('page=2')
+        self.req.POST = QueryDict('card=4111111111111111&amount=10')
+        self.req.COOKIES['sessionid'] = '2441'
+        self.req.META['REMOTE_ADDR'] = '10.0.0.1'
+        self.req.META['wsgi.input'] = 'x' * 10000
+        self.filter = SafeExceptionReporterFilter()
+
+    def summarize(self, fields, **kwargs):
+        return ''.join(
+            summarize_request(self.req, fields, self.filter, **kwargs)
+        )
+
+    def test_should_only_include_whitelisted_fields(self):
+        summary = self.summarize({
+            'GET': True,
+            'META': {'REMOTE_ADDR': True, 'SERVER_NAME': True}
+        })
+
+        self.assertEqual(
+            summary,
+            'path: /checkout/\n'
+            'GET: {page: 2, }\n'
+            'META: {REMOTE_ADDR: 10.0.0.1, }\n'
+        )
+
+    def test_should_cleanse_sensitive_post_parameters(self):
+        @sensitive_post_parameters('card')
+        def view(request):
+            return request
+        view(self.req)
+
+        summary = self.summarize({'POST': True})
+
+        self.assertNotIn('4111111111111111', summary)
+        self.assertIn('amount: 10, ', summary)
+
+    def test_should_cleanse_credential_like_keys(self):
+        summary = self.summarize({'COOKIES': True})
+
+        self.assertEqual(
+            summary,
+            'path: /checkout/\nCOOKIES: {sessionid: ********************, }\n'
+        )
+
+    def test_should_cap_value_length_and_item_count(self):
+        summary = self.summarize(
+            {'META': True}, max_length=10, max_items=1
+        )
+
+        self.assertLess(len(summary), 100)
+        self.assertTrue(summary.endswith('...}\n'))
+
+    def test_truncate_should_mark_cut_values(self):
+        self.assertEqual(truncate('abcdef', 3), 'abc...')
+        self.assertEqual(truncate('abc', 3), 'abc')
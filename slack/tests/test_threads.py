@@ -0,0 +1,127 @@
+import time
+from mock import MagicMock
+
+from django.test import SimpleTestCase
+
+from slack.reports import Report
+from slack.threads import ThreadCache, ThreadedFollowUps
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeTransport(object):
+    supports_threads = True
+
+    def __init__(self):
+        self.sent = []
+        self.updates = []
+
+    def payload(self, report, destination):
+        return {'channel': destination['channel'], 'text': report.text}
+
+    def send(self, payload, destination, timeout=None):
+        self.sent.append(payload)
+        return MagicMock(status_code=200)
+
+    def message_ref(self, response):
+        return 'C024BE91L', '1405894322.002768'
+
+    def update(self, destination, channel, ts, text, timeout=None):
+        self.updates.append((channel, ts, text))
+
+
+class ThreadCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_should_expire_entries_after_ttl(self):
+        cache = ThreadCache(ttl=60, clock=self.clock)
+        cache.set('a', 'C1', '1.0', 'text')
+
+        self.clock.now += 59
+        self.assertEqual(cache.get('a').ts, '1.0')
+
+        self.clock.now += 2
+        self.assertIsNone(cache.get('a'))
+
+    def test_should_evict_least_recently_used_entry(self):
+        cache = ThreadCache(max_size=2, clock=self.clock)
+        cache.set('a', 'C1', '1.0', 'text')
+        cache.set('b', 'C1', '2.0', 'text')
+        cache.get('a')
+        cache.set('c', 'C1', '3.0', 'text')
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_should_share_entries_through_django_cache(self):
+        shared = {}
+        django_cache = MagicMock()
+        django_cache.set.side_effect = (
+            lambda key, value, timeout: shared.__setitem__(key, value)
+        )
+        django_cache.get.side_effect = shared.get
+
+        ThreadCache(cache=django_cache, clock=self.clock).set(
+            'a', 'C1', '1.0', 'text'
+        )
+        entry = ThreadCache(cache=django_cache, clock=self.clock).get('a')
+
+        self.assertEqual((entry.channel, entry.ts), ('C1', '1.0'))
+
+
+class ThreadedFollowUpsTest(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.transport = FakeTransport()
+        self.destination = {'channel': '#pw-errors'}
+        self.report = Report('subject', '```error```', '', None, 'f1')
+
+    def test_reply_mode_should_post_repeats_into_thread(self):
+        follow_ups = ThreadedFollowUps(
+            'reply', ThreadCache(clock=self.clock), clock=self.clock
+        )
+
+        follow_ups.deliver(self.transport, self.report, self.destination)
+        follow_ups.deliver(self.transport, self.report, self.destination)
+
+        self.assertEqual(len(self.transport.sent), 2)
+        self.assertNotIn('thread_ts', self.transport.sent[0])
+        self.assertEqual(
+            self.transport.sent[1]['thread_ts'], '1405894322.002768'
+        )
+
+    def test_reply_should_include_distinct_client_estimates(self):
+        follow_ups = ThreadedFollowUps(
+            'reply', ThreadCache(clock=self.clock), clock=self.clock
+        )
+        report = self.report._replace(clients='~2,300 IPs, ~12 users')
+
+        follow_ups.deliver(self.transport, report, self.destination)
+        follow_ups.deliver(self.transport, report, self.destination)
+
+        self.assertEqual(
+            self.transport.sent[1]['text'],
+            '```error```\n~2,300 IPs, ~12 users'
+        )
+
+    def test_update_mode_should_coalesce_bursts_into_one_update(self):
+        follow_ups = ThreadedFollowUps(
+            'update', ThreadCache(), update_interval=0.2
+        )
+
+        for _ in range(5):
+            follow_ups.deliver(self.transport, self.report, self.destination)
+        time.sleep(0.5)
+
+        self.assertEqual(len(self.transport.sent), 1)
+        self.assertEqual(self.transport.updates, [(
+            'C024BE91L', '1405894322.002768', '```error```\nOccurred 5 times'
+        )])
@@ -0,0 +1,119 @@
+import os
+import sys
+
+from django.test import SimpleTestCase
+from django.utils import six
+
+from slack.tracebacks import (
+    compact_frames, exception_chain, format_chained_exception,
+    format_compact_exception, fold_cycles, is_library_path
+)
+
+
+def recurse(depth):
+    if depth == 0:
+        raise ValueError('bottom')
+    return recurse(depth - 1)
+
+
+class FoldCyclesTest(SimpleTestCase):
+    def test_should_fold_repeated_cycle(self):
+        frames = ['a', 'b', 'c', 'b', 'c', 'b', 'c', 'd']
+
+        self.assertEqual(
+            fold_cycles(frames),
+            [(0, 0, 1), (1, 2, 3), (7, 7, 1)]
+        )
+
+    def test_should_not_fold_short_repeats(self):
+        self.assertEqual(
+            fold_cycles(['a', 'a', 'b']),
+            [(0, 0, 1), (1, 1, 1), (2, 2, 1)]
+        )
+
+
+class CompactFramesTest(SimpleTestCase):
+    def test_should_fold_recursion(self):
+        try:
+            recurse(500)
+        except ValueError:
+            output = format_compact_exception(*sys.exc_info())
+
+        self.assertIn('repeated 499 times]', output)
+        self.assertTrue(output.endswith('ValueError: bottom\n'))
+        self.assertLess(output.count('\n'), 20)
+
+    def test_should_collapse_library_frames(self):
+        library = os.sep.join(['', 'venv', 'site-packages', 'lib.py'])
+        frames = [
+            ('/app/views.py', 1, 'view'),
+            (library, 1, 'a'),
+            (library, 2, 'b'),
+            (library, 3, 'c'),
+            ('/app/models.py', 1, 'save'),
+        ]
+
+        output = ''.join(compact_frames(frames))
+
+        self.assertIn('[3 library frames: %s ... %s]' % (library, library),
+                      output)
+        self.assertIn('in view', output)
+        self.assertIn('in save', output)
+
+    def test_should_cap_rendered_entries(self):
+        frames = [('/app/f%d.py' % i, 1, 'f') for i in range(1000)]
+
+        output = ''.join(compact_frames(frames, max_frames=10))
+
+        self.assertIn('[990 entries omitted]', output)
+        self.assertEqual(output.count('File "'), 10)
+
+    def test_is_library_path_should_classify_paths(self):
+        self.assertTrue(
+            is_library_path(os.sep.join(['', 'x', 'site-packages', 'y.py']))
+        )
+        self.assertFalse(is_library_path('/app/views.py'))
+
+
+class FakeException(Exception):
+    pass
+
+
+class ChainedExceptionTest(SimpleTestCase):
+    def raise_chain(self):
+        try:
+            try:
+                recurse(0)
+            except ValueError as exc:
+                tb = exc.__traceback__ = sys.exc_info()[2]
+                wrapped = FakeException('wrapped')
+                wrapped.__cause__ = exc
+                six.reraise(FakeException, wrapped, tb)
+        except FakeException:
+            return sys.exc_info()
+
+    def test_exception_chain_should_start_with_root_cause(self):
+        exc_info = self.raise_chain()
+
+        chain = exception_chain(exc_info[1])
+
+        self.assertEqual(
+            [(type(value), relation) for value, relation in chain],
+            [(ValueError, 'cause'), (FakeException, None)]
+        )
+
+    def test_should_reference_frames_shared_with_previous_exception(self):
+        output = format_chained_exception(*self.raise_chain())
+
+        self.assertTrue(output.startswith('Traceback'))
+        self.assertIn('ValueError: bottom\n', output)
+        self.assertIn('The above exception was the direct cause of', output)
+        self.assertIn('frames shared with the exception above]', output)
+        self.assertTrue(output.endswith('FakeException: wrapped\n'))
+
+    def test_should_drop_links_over_budget_but_keep_final_exception(self):
+        output = format_chained_exception(*self.raise_chain(), budget=10)
+
+        self.assertIn('ValueError: bottom\n', output)
+        self.assertIn('[1 chained exceptions omitted]', output)
+        self.assertTrue(output.endswith('FakeException: wrapped\n'))
@@ -0,0 +1,107 @@
+import json
+from mock import patch
+
+from django.test import SimpleTestCase
+
+from slack.reports import Report
+from slack.transports import (
+    get_transport, WebAPITransport, WebhookTransport
+)
+
+
+class TransportTest(SimpleTestCase):
+    def setUp(self):
+        self.report = Report(
+            subject='ERROR: Test 500',
+            text='```ERROR: Test 500```',
+            message='',
+            html_message=None
+        )
+        self.destination = {
+            'token': 'fsk33',
+            'channel': '#pw-errors',
+            'icon_url': None,
+            'icon_emoji': ':fire:',
+            'username': 'django',
+            'url': 'https://hooks.slack.com/services/T0/B0/x',
+        }
+
+    @patch('slack.transports.requests.Session.post')
+    def test_web_api_should_post_form_data_to_chat_post_message(
+        self, mock_request
+    ):
+        transport = WebAPITransport()
+
+        transport.send(
+            transport.payload(self.report, self.destination),
+            self.destination
+        )
+
+        mock_request.assert_called_once_with(
+            'https://slack.com/api/chat.postMessage',
+            data={
+                'username': 'django',
+                'icon_url': None,
+                'token': 'fsk33',
+                'icon_emoji': ':fire:',
+                'text': '```ERROR: Test 500```',
+                'channel': '#pw-errors'
+            }
+        )
+
+    def test_webhook_payload_should_be_json_bytes_without_empty_fields(self):
+        payload = WebhookTransport().payload(self.report, self.destination)
+
+        self.assertIsInstance(payload, bytes)
+        self.assertEqual(json.loads(payload.decode('utf-8')), {
+            'text': '```ERROR: Test 500```',
+            'channel': '#pw-errors',
+            'username': 'django',
+            'icon_emoji': ':fire:',
+        })
+
+    def test_webhook_should_post_payload_through_pooled_session(self):
+        transport = WebhookTransport()
+
+        with patch.object(transport.session, 'post') as mock_post:
+            transport.send(b'{}', self.destination, timeout=3)
+
+        mock_post.assert_called_once_with(
+            'https://hooks.slack.com/services/T0/B0/x',
+            data=b'{}',
+            headers={'Content-Type': 'application/json'},
+            timeout=3
+        )
+
+    def test_webhook_should_fail_on_non_200_response(self):
+        transport = WebhookTransport()
+
+        with patch.object(transport.session, 'post') as mock_post:
+            mock_post.return_value.status_code = 404
+            response = transport.send(b'{}', self.destination)
+
+        self.assertTrue(transport.failed(response))
+
+    def test_get_transport_should_reuse_instances(self):
+        self.assertIs(get_transport('webhook'), get_transport('webhook'))
+        self.assertIsInstance(
+            get_transport('slack.transports.WebAPITransport'),
+            WebAPITransport
+        )
+
+    @patch('slack.transports.requests.Session.post')
+    def test_web_api_upload_should_stream_multipart_body(self, mock_request):
+        transport = WebAPITransport()
+
+        transport.upload(
+            self.destination, 'traceback.txt', ['Traceback\n', 'ValueError']
+        )
+
+        args, kwargs = mock_request.call_args
+        self.assertEqual(args, ('https://slack.com/api/files.upload',))
+        self.assertTrue(
+            kwargs['headers']['Content-Type'].startswith(
+                'multipart/form-data; boundary='
+            )
+        )
+        self.assertIn(b'Traceback\nValueError', b''.join(kwargs['data']))
@@ -0,0 +1,32 @@
+import types
+
+from django.test import SimpleTestCase
+
+from slack.uploads import encode_chunks, multipart_body
+
+
+class UploadTest(SimpleTestCase):
+    def test_encode_chunks_should_split_large_chunks(self):
+        chunks = list(encode_chunks(['a' * 5, 'bb'], chunk_size=2))
+
+        self.assertEqual(chunks, [b'aa', b'aa', b'a', b'bb'])
+
+    def test_multipart_body_should_be_a_generator(self):
+        body = multipart_body('xyz', [], 'traceback.txt', ['a'])
+
+        self.assertIsInstance(body, types.GeneratorType)
+
+    def test_multipart_body_should_contain_fields_and_file(self):
+        body = b''.join(multipart_body(
+            'xyz', [('token', 'fsk33')], 'traceback.txt',
+            ['Traceback\n', 'ValueError']
+        ))
+
+        self.assertEqual(body, (
+            b'--xyz\r\nContent-Disposition: form-data; name="token"\r\n\r\n'
+            b'fsk33\r\n'
+            b'--xyz\r\nContent-Disposition: form-data; name="file"; '
+            b'filename="traceback.txt"\r\nContent-Type: text/plain\r\n\r\n'
+            b'Traceback\nValueError'
+            b'\r\n--xyz--\r\n'
+        ))
@@ -1,12 +1,20 @@
+import itertools
 import logging
-from mock import patch
+import threading
+import time
+from mock import Mock, patch
 
 from django.core import mail
 from django.http import request, QueryDict
 from django.test import SimpleTestCase
 from django.test.utils import override_settings
+from django.views.debug import CLEANSED_SUBSTITUTE
 from admin_scripts.tests import AdminScriptTestCase
 
+from slack.fanout import get_pool
+from slack.reports import Report
+from slack.sampling import AdaptiveSampler
+
 
 class SlackHandlerTest(SimpleTestCase, AdminScriptTestCase):
     def setUp(self):
@@ -69,7 +77,7 @@ class SlackHandlerTest(SimpleTestCase, AdminScriptTestCase):
         },
         IS_SLACK_ENABLED=True
     )
-    @patch('slack.utils.requests.post')
+    @patch('slack.transports.requests.Session.post')
     def test_should_send_message_to_slack_with_correct_parameter(
         self, mock_request
     ):
@@ -118,7 +126,7 @@ class SlackHandlerTest(SimpleTestCase, AdminScriptTestCase):
         SLACK_PARAMS=None,
         IS_SLACK_ENABLED=True
     )
-    @patch('slack.utils.requests.post')
+    @patch('slack.transports.requests.Session.post')
     def test_should_send_all_parameter_when_not_set_slack_param(
         self, mock_request
     ):
@@ -177,7 +185,7 @@ class SlackHandlerTest(SimpleTestCase, AdminScriptTestCase):
         },
         IS_SLACK_ENABLED=True
     )
-    @patch('slack.utils.requests.post')
+    @patch('slack.transports.requests.Session.post')
     def test_not_set_get_should_not_send_get_query_string_data_to_slack(
         self, mock_request
     ):
@@ -231,7 +239,7 @@ class SlackHandlerTest(SimpleTestCase, AdminScriptTestCase):
         },
         IS_SLACK_ENABLED=True
     )
-    @patch('slack.utils.requests.post')
+    @patch('slack.transports.requests.Session.post')
     def test_not_post_should_not_send_post_query_string_data_to_slack(
         self, mock_request
     ):
@@ -284,7 +292,7 @@ class SlackHandlerTest(SimpleTestCase, AdminScriptTestCase):
         },
         IS_SLACK_ENABLED=True
     )
-    @patch('slack.utils.requests.post')
+    @patch('slack.transports.requests.Session.post')
     def test_not_set_meta_should_not_send_meta_data_to_slack(
         self, mock_request
     ):
@@ -336,7 +344,7 @@ class SlackHandlerTest(SimpleTestCase, AdminScriptTestCase):
         },
         IS_SLACK_ENABLED=True
     )
-    @patch('slack.utils.requests.post')
+    @patch('slack.transports.requests.Session.post')
     def test_not_set_cookie_should_not_send_cookie_data_to_slack(
         self, mock_request
     ):
@@ -392,7 +400,7 @@ class SlackHandlerTest(SimpleTestCase, AdminScriptTestCase):
         },
         IS_SLACK_ENABLED=True
     )
-    @patch('slack.utils.requests.post')
+    @patch('slack.transports.requests.Session.post')
     def test_set_get_false_should_not_send_get_query_string_data_to_slack(
         self, mock_request
     ):
@@ -445,7 +453,7 @@ class SlackHandlerTest(SimpleTestCase, AdminScriptTestCase):
         },
         IS_SLACK_ENABLED=True
     )
-    @patch('slack.utils.requests.post')
+    @patch('slack.transports.requests.Session.post')
     def test_set_meta_false_should_not_send_meta_data_to_slack(
         self, mock_request
     ):
@@ -498,7 +506,7 @@ class SlackHandlerTest(SimpleTestCase, AdminScriptTestCase):
         },
         IS_SLACK_ENABLED=True
     )
-    @patch('slack.utils.requests.post')
+    @patch('slack.transports.requests.Session.post')
     def test_set_meta_with_empty_list_should_not_send_meta_data_to_slack(
         self, mock_request
     ):
@@ -551,7 +559,7 @@ class SlackHandlerTest(SimpleTestCase, AdminScriptTestCase):
         },
         IS_SLACK_ENABLED=True
     )
-    @patch('slack.utils.requests.post')
+    @patch('slack.transports.requests.Session.post')
     def test_status_from_slack_false_should_send_email(
         self, mock_request
     ):
@@ -604,7 +612,7 @@ class SlackHandlerTest(SimpleTestCase, AdminScriptTestCase):
         },
         IS_SLACK_ENABLED=True
     )
-    @patch('slack.utils.requests.post')
+    @patch('slack.transports.requests.Session.post')
     def test_send_to_slack_error_should_send_email(
         self, mock_request
     ):
@@ -655,7 +663,7 @@ class SlackHandlerTest(SimpleTestCase, AdminScriptTestCase):
         },
         IS_SLACK_ENABLED=True
     )
-    @patch('slack.utils.requests.post')
+    @patch('slack.transports.requests.Session.post')
     def test_should_not_error_when_no_meta_data_in_request(
         self, mock_request
     ):
@@ -697,3 +705,825 @@ class SlackHandlerTest(SimpleTestCase, AdminScriptTestCase):
             self.assertEqual(len(mail.outbox), 1)
         finally:
             slack_handler.filters = orig_filters
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        SLACK_PARAMS={'GET': True},
+        SLACK_DESTINATIONS=[
+            {'channel': '#pw-errors'},
+            {'channel': '#ops', 'token': 'ops77', 'timeout': 2},
+            {'type': 'email'},
+        ],
+        IS_SLACK_ENABLED=True
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_destinations_should_render_once_and_send_to_each_destination(
+        self, mock_request
+    ):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {'ok': True}
+
+        slack_handler = self.get_slack_handler(self.logger)
+
+        orig_filters = slack_handler.filters
+        try:
+            with patch.object(
+                slack_handler, 'render', wraps=slack_handler.render
+            ) as mock_render:
+                self.logger.error(
+                    "Test 500",
+                    extra={
+                        'status_code': 500,
+                        'request': self.req,
+                    }
+                )
+                self.assertEqual(mock_render.call_count, 1)
+
+            text = "```ERROR (EXTERNAL IP): Test 500\n"
+            text += "No stack trace available\n"
+            text += "GET: <QueryDict: {u'test_get': [u'1']}>\n```"
+            data = {
+                'username': 'django',
+                'icon_url': None,
+                'token': 'fsk33',
+                'icon_emoji': None,
+                'text': text,
+                'channel': '#pw-errors'
+            }
+            mock_request.assert_any_call(
+                'https://slack.com/api/chat.postMessage',
+                data=data, timeout=5
+            )
+            data.update({'token': 'ops77', 'channel': '#ops'})
+            mock_request.assert_any_call(
+                'https://slack.com/api/chat.postMessage',
+                data=data, timeout=2
+            )
+            self.assertEqual(mock_request.call_count, 2)
+
+            self.assertEqual(len(mail.outbox), 2)
+        finally:
+            slack_handler.filters = orig_filters
+
+    @override_settings(
+        SLACK_WEBHOOK_URL='https://hooks.slack.com/services/T0/B0/x',
+        SLACK_PARAMS={'GET': True},
+        IS_SLACK_ENABLED=True
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_webhook_transport_should_not_use_web_api(self, mock_request):
+        slack_handler = self.get_slack_handler(self.logger)
+
+        orig_filters = slack_handler.filters
+        orig_transport = slack_handler.transport
+        try:
+            slack_handler.filters = []
+            slack_handler.transport = 'webhook'
+
+            with patch(
+                'slack.transports.WebhookTransport.send'
+            ) as mock_send:
+                mock_send.return_value.status_code = 200
+                self.logger.error(
+                    "Test 500",
+                    extra={
+                        'status_code': 500,
+                        'request': self.req,
+                    }
+                )
+
+            self.assertEqual(mock_request.call_count, 0)
+            self.assertEqual(mock_send.call_count, 1)
+            payload, destination, timeout = mock_send.call_args[0]
+            self.assertEqual(
+                destination['url'], 'https://hooks.slack.com/services/T0/B0/x'
+            )
+            self.assertEqual(len(mail.outbox), 1)
+        finally:
+            slack_handler.filters = orig_filters
+            slack_handler.transport = orig_transport
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        SLACK_PARAMS={'GET': True},
+        SLACK_UPLOAD_THRESHOLD=10,
+        IS_SLACK_ENABLED=True
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_oversized_report_should_be_uploaded_as_file(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {
+            'ok': True,
+            'file': {'permalink': 'https://slack.com/files/F1'}
+        }
+
+        slack_handler = self.get_slack_handler(self.logger)
+
+        orig_filters = slack_handler.filters
+        try:
+            slack_handler.filters = []
+
+            self.logger.error(
+                "Test 500",
+                extra={
+                    'status_code': 500,
+                    'request': self.req,
+                }
+            )
+
+            upload, post = mock_request.call_args_list
+            self.assertEqual(
+                upload[0], ('https://slack.com/api/files.upload',)
+            )
+            body = b''.join(upload[1]['data'])
+            self.assertIn(b"GET: <QueryDict: {u'test_get': [u'1']}>", body)
+            self.assertIn(b'name="channels"\r\n\r\n#pw-errors', body)
+            self.assertEqual(
+                post[1]['data']['text'],
+                "```ERROR (EXTERNAL IP): Test 500```\n"
+                "<https://slack.com/files/F1|Full report>"
+            )
+            self.assertEqual(len(mail.outbox), 1)
+        finally:
+            slack_handler.filters = orig_filters
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        SLACK_PARAMS={'GET': True},
+        SLACK_UPLOAD_THRESHOLD=10,
+        SLACK_THREADS='update',
+        IS_SLACK_ENABLED=True
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_repeats_should_not_upload_again_in_update_mode(
+        self, mock_request
+    ):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {
+            'ok': True, 'channel': 'C1', 'ts': '1.2',
+            'file': {'permalink': 'https://slack.com/files/F1'}
+        }
+
+        slack_handler = self.get_slack_handler(self.logger)
+
+        orig_filters = slack_handler.filters
+        slack_handler.follow_ups = None
+        try:
+            slack_handler.filters = []
+
+            for _ in range(3):
+                self.logger.error(
+                    "Test 500",
+                    extra={
+                        'status_code': 500,
+                        'request': self.req,
+                    }
+                )
+
+            self.assertEqual(
+                [args[0] for args, kwargs in mock_request.call_args_list],
+                ['https://slack.com/api/files.upload',
+                 'https://slack.com/api/chat.postMessage']
+            )
+        finally:
+            slack_handler.filters = orig_filters
+            for entry in slack_handler.follow_ups.cache.entries.values():
+                if entry.timer is not None:
+                    entry.timer.cancel()
+            slack_handler.follow_ups = None
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        SLACK_PARAMS={'GET': True},
+        SLACK_UPLOAD_THRESHOLD=10,
+        SLACK_THREADS='reply',
+        IS_SLACK_ENABLED=True
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_repeats_should_upload_into_thread_in_reply_mode(
+        self, mock_request
+    ):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {
+            'ok': True, 'channel': 'C1', 'ts': '1.2',
+            'file': {'permalink': 'https://slack.com/files/F1'}
+        }
+
+        slack_handler = self.get_slack_handler(self.logger)
+
+        orig_filters = slack_handler.filters
+        slack_handler.follow_ups = None
+        try:
+            slack_handler.filters = []
+
+            bodies = []
+
+            def post(url, data, **kwargs):
+                if url.endswith('files.upload'):
+                    bodies.append(b''.join(data))
+                return mock_request.return_value
+
+            mock_request.side_effect = post
+            for _ in range(2):
+                self.logger.error(
+                    "Test 500",
+                    extra={
+                        'status_code': 500,
+                        'request': self.req,
+                    }
+                )
+
+            self.assertEqual(len(bodies), 2)
+            self.assertNotIn(b'name="thread_ts"', bodies[0])
+            self.assertIn(b'name="thread_ts"\r\n\r\n1.2', bodies[1])
+            self.assertEqual(
+                mock_request.call_args[1]['data']['thread_ts'], '1.2'
+            )
+        finally:
+            slack_handler.filters = orig_filters
+            slack_handler.follow_ups = None
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        SLACK_PARAMS={'GET': True},
+        SLACK_UPLOAD_THRESHOLD=10,
+        IS_SLACK_ENABLED=True
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_failed_upload_should_email_full_report(self, mock_request):
+        failed, sent = Mock(status_code=200), Mock(status_code=200)
+        failed.json.return_value = {'ok': False, 'error': 'not_allowed'}
+        sent.json.return_value = {'ok': True}
+        mock_request.side_effect = [failed, sent]
+
+        slack_handler = self.get_slack_handler(self.logger)
+
+        orig_filters = slack_handler.filters
+        try:
+            slack_handler.filters = []
+
+            self.logger.error(
+                "Test 500",
+                extra={
+                    'status_code': 500,
+                    'request': self.req,
+                }
+            )
+
+            upload, post = mock_request.call_args_list
+            self.assertEqual(
+                post[1]['data']['text'],
+                "```ERROR (EXTERNAL IP): Test 500```\n"
+            )
+            # One from Django's own handler, one with the full report.
+            self.assertEqual(len(mail.outbox), 2)
+            self.assertIn("test_get", mail.outbox[1].body)
+        finally:
+            slack_handler.filters = orig_filters
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        SLACK_PARAMS=None,
+        SLACK_REQUEST_SUMMARY={'GET': True, 'META': {'SERVER_NAME': True}},
+        IS_SLACK_ENABLED=True
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_request_summary_should_replace_full_request_repr(
+        self, mock_request
+    ):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {'ok': True}
+
+        slack_handler = self.get_slack_handler(self.logger)
+
+        orig_filters = slack_handler.filters
+        try:
+            slack_handler.filters = []
+
+            self.logger.error(
+                "Test 500",
+                extra={
+                    'status_code': 500,
+                    'request': self.req,
+                }
+            )
+
+            text = "```ERROR (EXTERNAL IP): Test 500\n"
+            text += "No stack trace available\n\n"
+            text += "path: \n"
+            text += "GET: {test_get: 1, }\n"
+            text += "META: {SERVER_NAME: server_name, }\n```"
+            self.assertEqual(
+                mock_request.call_args[1]['data']['text'], text
+            )
+        finally:
+            slack_handler.filters = orig_filters
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        SLACK_PARAMS={'GET': True},
+        SLACK_DIGEST_INTERVAL=600,
+        IS_SLACK_ENABLED=True
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_should_send_top_errors_digest_after_interval(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {'ok': True}
+
+        slack_handler = self.get_slack_handler(self.logger)
+
+        orig_filters = slack_handler.filters
+        try:
+            slack_handler.filters = []
+            slack_handler.heavy_hitters = None
+            slack_handler.digest_started = time.time() - 601
+
+            self.logger.error(
+                "Test 500",
+                extra={
+                    'status_code': 500,
+                    'request': self.req,
+                }
+            )
+
+            self.assertEqual(mock_request.call_count, 2)
+            digest = mock_request.call_args_list[0][1]['data']['text']
+            self.assertEqual(
+                digest,
+                "```Top errors in the last 10 minutes (1 records):\n"
+                "     1  ERROR: Test 500```"
+            )
+        finally:
+            slack_handler.filters = orig_filters
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        SLACK_DIGEST_INTERVAL=0.2,
+        IS_SLACK_ENABLED=True
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_digest_should_be_sent_without_further_records(
+        self, mock_request
+    ):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {'ok': True}
+
+        slack_handler = self.get_slack_handler(self.logger)
+
+        orig_filters = slack_handler.filters
+        try:
+            slack_handler.filters = []
+            slack_handler.heavy_hitters = None
+            slack_handler.digest_started = time.time()
+
+            self.logger.error("Test 500")
+
+            deadline = time.time() + 2
+            while mock_request.call_count < 2 and time.time() < deadline:
+                time.sleep(0.05)
+
+            self.assertIn(
+                'Top errors', mock_request.call_args[1]['data']['text']
+            )
+            self.assertIsNone(slack_handler.heavy_hitters)
+        finally:
+            slack_handler.filters = orig_filters
+            if slack_handler.housekeeping_timer is not None:
+                slack_handler.housekeeping_timer.cancel()
+                slack_handler.housekeeping_timer = None
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        SLACK_PARAMS={'GET': True},
+        SLACK_DIGEST_INTERVAL=600,
+        SLACK_SAMPLING={'django.request': 1},
+        IS_SLACK_ENABLED=True
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_sampled_out_records_should_still_be_counted(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {'ok': True}
+
+        slack_handler = self.get_slack_handler(self.logger)
+
+        orig_filters = slack_handler.filters
+        try:
+            slack_handler.filters = []
+            slack_handler.heavy_hitters = None
+            slack_handler.digest_started = time.time()
+            slack_handler.sampler = AdaptiveSampler(
+                {'django.request': 1}, random=lambda: 0.99
+            )
+
+            for _ in range(5):
+                self.logger.error(
+                    "Test 500",
+                    extra={
+                        'status_code': 500,
+                        'request': self.req,
+                    }
+                )
+
+            self.assertEqual(mock_request.call_count, 1)
+            self.assertEqual(slack_handler.heavy_hitters.total, 5)
+        finally:
+            slack_handler.filters = orig_filters
+            slack_handler.sampler = None
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        SLACK_PARAMS={'GET': True},
+        SLACK_SPIKE_DETECTION=True,
+        IS_SLACK_ENABLED=True
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_spike_detection_should_only_send_new_errors_and_spikes(
+        self, mock_request
+    ):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {'ok': True}
+
+        slack_handler = self.get_slack_handler(self.logger)
+
+        orig_filters = slack_handler.filters
+        try:
+            slack_handler.filters = []
+            slack_handler.rate_tracker = None
+
+            for _ in range(3):
+                self.logger.error(
+                    "Test 500",
+                    extra={
+                        'status_code': 500,
+                        'request': self.req,
+                    }
+                )
+
+            self.assertEqual(mock_request.call_count, 1)
+        finally:
+            slack_handler.filters = orig_filters
+            slack_handler.rate_tracker = None
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        IS_SLACK_ENABLED=True,
+        SLACK_NOTIFY_BACKOFF=True
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_notify_backoff_should_send_1st_and_10th_occurrence(
+        self, mock_request
+    ):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {'ok': True}
+
+        slack_handler = self.get_slack_handler(self.logger)
+
+        orig_filters = slack_handler.filters
+        try:
+            slack_handler.filters = []
+            slack_handler.backoff = None
+
+            for _ in range(12):
+                self.logger.error(
+                    "Test 500",
+                    extra={
+                        'status_code': 500,
+                        'request': self.req,
+                    }
+                )
+
+            self.assertEqual(mock_request.call_count, 2)
+            text = mock_request.call_args[1]['data']['text']
+            self.assertIn('(10 occurrences)', text)
+        finally:
+            slack_handler.filters = orig_filters
+            slack_handler.backoff = None
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        IS_SLACK_ENABLED=True,
+        SLACK_CPU_BUDGET=1e-9
+    )
+    @patch('slack.transports.requests.Session.post')
+    # The thread clock may tick in whole milliseconds; spend 10ms per call.
+    @patch('slack.utils.thread_cpu_time', side_effect=itertools.count(0, 0.01))
+    def test_over_cpu_budget_should_notify_once_and_send_minimal_reports(
+        self, mock_clock, mock_request
+    ):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {'ok': True}
+
+        slack_handler = self.get_slack_handler(self.logger)
+        transitions = []
+        budget_logger = logging.getLogger('slack.budget')
+        budget_handler = logging.Handler()
+        budget_handler.emit = transitions.append
+        budget_logger.addHandler(budget_handler)
+
+        orig_filters = slack_handler.filters
+        try:
+            slack_handler.filters = []
+            slack_handler.cpu_budget = None
+
+            for _ in range(3):
+                try:
+                    raise ValueError('boom')
+                except ValueError:
+                    self.logger.exception(
+                        "Test 500",
+                        extra={
+                            'status_code': 500,
+                            'request': self.req,
+                        }
+                    )
+
+            texts = [
+                call[1]['data']['text'] for call in mock_request.call_args_list
+            ]
+            self.assertEqual(len(texts), 4)
+            self.assertIn('Slack handler degraded', texts[1])
+            self.assertIn('ERROR: Test 500', texts[-1])
+            self.assertIn('ValueError: boom', texts[-1])
+            self.assertIn('in test_over_cpu_budget', texts[-1])
+            self.assertNotIn('Traceback', texts[-1])
+            self.assertTrue(slack_handler.cpu_budget.degraded)
+            self.assertEqual(len(transitions), 1)
+            self.assertTrue(transitions[0].slack_cpu_budget['degraded'])
+        finally:
+            budget_logger.removeHandler(budget_handler)
+            slack_handler.filters = orig_filters
+            slack_handler.cpu_budget = None
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        IS_SLACK_ENABLED=True,
+        SLACK_CLIENT_FLOODS=True,
+        SLACK_CLIENT_FLOODS_THRESHOLD=3
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_client_flood_should_be_collapsed(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {'ok': True}
+
+        slack_handler = self.get_slack_handler(self.logger)
+        self.req.META['REMOTE_ADDR'] = '203.0.113.9'
+
+        orig_filters = slack_handler.filters
+        try:
+            slack_handler.filters = []
+            slack_handler.floods = None
+
+            for _ in range(10):
+                self.logger.error(
+                    "Test 500",
+                    extra={
+                        'status_code': 500,
+                        'request': self.req,
+                    }
+                )
+
+            self.assertEqual(mock_request.call_count, 2)
+            self.assertEqual(
+                slack_handler.floods.floods['IP 203.0.113.9'].collapsed, 8
+            )
+        finally:
+            slack_handler.filters = orig_filters
+            slack_handler.floods = None
+            if slack_handler.housekeeping_timer is not None:
+                slack_handler.housekeeping_timer.cancel()
+                slack_handler.housekeeping_timer = None
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        IS_SLACK_ENABLED=True,
+        SLACK_CLIENT_FLOODS=True,
+        SLACK_CLIENT_FLOODS_THRESHOLD=3,
+        SLACK_CLIENT_FLOODS_WINDOW=0.2
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_flood_summary_should_be_sent_without_further_records(
+        self, mock_request
+    ):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {'ok': True}
+
+        slack_handler = self.get_slack_handler(self.logger)
+        self.req.META['REMOTE_ADDR'] = '203.0.113.9'
+
+        orig_filters = slack_handler.filters
+        try:
+            slack_handler.filters = []
+            slack_handler.floods = None
+
+            for _ in range(5):
+                self.logger.error(
+                    "Test 500",
+                    extra={
+                        'status_code': 500,
+                        'request': self.req,
+                    }
+                )
+
+            deadline = time.time() + 2
+            while slack_handler.floods.floods and time.time() < deadline:
+                time.sleep(0.05)
+
+            self.assertEqual(slack_handler.floods.floods, {})
+            self.assertIn(
+                'Client IP 203.0.113.9 caused 3 errors',
+                mock_request.call_args[1]['data']['text']
+            )
+        finally:
+            slack_handler.filters = orig_filters
+            slack_handler.floods = None
+            if slack_handler.housekeeping_timer is not None:
+                slack_handler.housekeeping_timer.cancel()
+                slack_handler.housekeeping_timer = None
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        IS_SLACK_ENABLED=True,
+        INTERNAL_IPS=['10.1.0.0/16', 'fd00::/8'],
+        SLACK_TRUSTED_PROXIES=['192.168.0.0/24']
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_internal_ips_should_match_networks_behind_trusted_proxy(
+        self, mock_request
+    ):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {'ok': True}
+
+        slack_handler = self.get_slack_handler(self.logger)
+        self.req.META['REMOTE_ADDR'] = '192.168.0.5'
+        self.req.META['HTTP_X_FORWARDED_FOR'] = '10.1.2.3'
+
+        orig_filters = slack_handler.filters
+        try:
+            slack_handler.filters = []
+            self.logger.error(
+                "Test 500",
+                extra={
+                    'status_code': 500,
+                    'request': self.req,
+                }
+            )
+
+            text = mock_request.call_args[1]['data']['text']
+            self.assertIn('ERROR (internal IP): Test 500', text)
+        finally:
+            slack_handler.filters = orig_filters
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        SLACK_PARAMS={'GET': True, 'COOKIES': {'sessionid': True}},
+        IS_SLACK_ENABLED=True,
+        SLACK_REDACT=True
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_redact_should_remove_secrets_from_params_and_text(
+        self, mock_request
+    ):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {'ok': True}
+
+        slack_handler = self.get_slack_handler(self.logger)
+        self.req.GET = QueryDict('page=2&token=abc123')
+
+        orig_filters = slack_handler.filters
+        try:
+            slack_handler.filters = []
+            self.logger.error(
+                "Login failed for postgres://app:s3cret@db/app",
+                extra={
+                    'status_code': 500,
+                    'request': self.req,
+                }
+            )
+
+            text = mock_request.call_args[1]['data']['text']
+            self.assertNotIn('s3cret', text)
+            self.assertNotIn('abc123', text)
+            self.assertNotIn('2441', text)
+            self.assertIn("u'page': [u'2']", text)
+            self.assertIn('sessionid: ********************', text)
+        finally:
+            slack_handler.filters = orig_filters
+
+    @override_settings(SLACK_FANOUT_TIMEOUT=0.1)
+    def test_fan_out_should_send_inline_when_pool_is_saturated(self):
+        slack_handler = self.get_slack_handler(self.logger)
+        release = threading.Event()
+        busy = [
+            get_pool(4).apply_async(release.wait, (2,))
+            for _ in range(get_pool(4)._processes)
+        ]
+
+        try:
+            slack_handler.fan_out(Report(
+                subject='ERROR: Test 500', text='```ERROR: Test 500```',
+                message='Traceback', html_message=None, fingerprint='f'
+            ), [{'type': 'email'}])
+            self.assertEqual(len(mail.outbox), 1)
+        finally:
+            release.set()
+            for result in busy:
+                result.wait()
+
+    @override_settings(SLACK_REDACT=True)
+    def test_redact_should_keep_attachment_chunks(self):
+        slack_handler = self.get_slack_handler(self.logger)
+
+        report = slack_handler.redact(Report(
+            subject='ERROR: Test 500', text='```ERROR: Test 500```',
+            message='Traceback', html_message=None, fingerprint='f',
+            attachment=('Traceback\n', 'password=abc123\n')
+        ))
+
+        self.assertEqual(report.attachment, (
+            'Traceback\n', 'password=%s\n' % CLEANSED_SUBSTITUTE
+        ))
+
+    @override_settings(
+        SLACK_TOKEN='fsk33',
+        SLACK_CHANNEL='#pw-errors',
+        IS_SLACK_ENABLED=True,
+        SLACK_NOTIFY_BACKOFF=True,
+        SLACK_TEMPLATE_MINING=True
+    )
+    @patch('slack.transports.requests.Session.post')
+    def test_template_mining_should_group_formatted_messages(
+        self, mock_request
+    ):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {'ok': True}
+
+        slack_handler = self.get_slack_handler(self.logger)
+
+        orig_filters = slack_handler.filters
+        try:
+            slack_handler.filters = []
+            slack_handler.backoff = None
+            slack_handler.template_miner = None
+
+            for payment, user in ((8812, 19), (77, 3), (5, 1024)):
+                self.logger.error(
+                    "Payment %d failed for user %d" % (payment, user)
+                )
+
+            self.assertEqual(mock_request.call_count, 1)
+        finally:
+            slack_handler.filters = orig_filters
+            slack_handler.backoff = None
+            slack_handler.template_miner = None
+
+    @override_settings(
+        SLACK_PARAMS={'GET': True, 'META': {'SERVER_NAME': True}},
+        IS_SLACK_ENABLED=True
+    )
+    def test_render_with_params_should_keep_fingerprint(self):
+        slack_handler = self.get_slack_handler(self.logger)
+        record = self.logger.makeRecord(
+            'django.request', logging.ERROR, __file__, 1, 'Test 500', (),
+            None, extra={'request': self.req}
+        )
+
+        report = slack_handler.render(record, 'f' * 40)
+
+        self.assertEqual(report.fingerprint, 'f' * 40)
+
+    @override_settings(
+        SLACK_UPLOAD_THRESHOLD=10,
+        SLACK_REQUEST_SUMMARY={'GET': True},
+        IS_SLACK_ENABLED=True
+    )
+    def test_oversized_report_should_keep_sections_as_chunks(self):
+        slack_handler = self.get_slack_handler(self.logger)
+        record = self.logger.makeRecord(
+            'django.request', logging.ERROR, __file__, 1, 'Test 500', (),
+            None, extra={'request': self.req}
+        )
+
+        report = slack_handler.render(record, 'f' * 40)
+
+        self.assertIsNone(report.message)
+        self.assertIn('No stack trace available', report.attachment)
+        self.assertIn('path: \n', report.attachment)
+
+        slack_handler.mail_admins(report)
+        self.assertEqual(mail.outbox[0].body, ''.join(report.attachment))
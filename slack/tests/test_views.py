@@ -0,0 +1,74 @@
+import re
+
+from datetime import timedelta
+from mock import patch
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.urlresolvers import reverse
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from slack.models import ErrorEvent
+from slack.views import error_history
+
+
+class ErrorHistoryViewTest(TestCase):
+    def setUp(self):
+        self.now = timezone.now().replace(microsecond=0)
+        for index in range(5):
+            ErrorEvent.objects.create(
+                fingerprint='f%d' % index, logger='django.request',
+                level='ERROR', exception_type='ValueError',
+                path='/%d/' % index,
+                timestamp=self.now - timedelta(minutes=index)
+            )
+        self.factory = RequestFactory()
+        self.staff = User(username='staff', is_staff=True, is_active=True)
+
+    def get(self, user, **params):
+        request = self.factory.get(reverse('slack_error_history'), params)
+        request.user = user
+        request.session = {}
+        return error_history(request)
+
+    def test_url_should_resolve_to_view(self):
+        self.assertEqual(reverse('slack_error_history'), '/errors/')
+
+    @patch('django.contrib.admin.views.decorators.login')
+    def test_non_staff_should_get_the_login_page(self, mock_login):
+        mock_login.return_value = HttpResponse('login')
+
+        for user in (AnonymousUser(), User(username='user', is_active=True)):
+            response = self.get(user)
+
+            self.assertEqual(response.content, b'login')
+            self.assertNotContains(response, '/0/')
+
+    def test_staff_should_page_through_events_by_cursor(self):
+        paths = []
+        params = {'size': 2, 'logger': 'django.request'}
+        while True:
+            response = self.get(self.staff, **params)
+            self.assertContains(response, '5 errors')
+            content = response.content.decode('utf-8')
+            paths.extend(re.findall(r'<td>(/\d/)</td>', content))
+            older = re.search(r'href="\?([^"]*)cursor=([^"&]+)"', content)
+            if older is None:
+                break
+            # The link keeps the filters.
+            self.assertIn('logger=django.request', older.group(1))
+            params['cursor'] = older.group(2)
+
+        self.assertEqual(paths, ['/0/', '/1/', '/2/', '/3/', '/4/'])
+
+    def test_staff_should_filter_events(self):
+        ErrorEvent.objects.create(
+            fingerprint='k1', logger='app', level='ERROR',
+            exception_type='KeyError', path='/key/', timestamp=self.now
+        )
+
+        response = self.get(self.staff, type='KeyError')
+
+        self.assertContains(response, '/key/')
+        self.assertNotContains(response, '/0/')
@@ -0,0 +1,168 @@
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class ThreadEntry(object):
+    __slots__ = ('channel', 'ts', 'text', 'count', 'expires', 'updated',
+                 'timer', 'note')
+
+    def __init__(self, channel, ts, text, count, expires, updated):
+        self.channel = channel
+        self.ts = ts
+        self.text = text
+        self.count = count
+        self.expires = expires
+        self.updated = updated
+        self.timer = None
+        self.note = None
+
+
+class ThreadCache(object):
+    """
+    Bounded LRU of the Slack message posted for each fingerprint.
+
+    Entries expire ``ttl`` seconds after the first occurrence. When a Django
+    cache is given, messages are shared with the other workers through it.
+    """
+    def __init__(self, max_size=1000, ttl=3600, cache=None, clock=time.time):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.cache = cache
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def cache_key(self, key):
+        return 'slack:thread:%s' % key
+
+    def get(self, key):
+        now = self.clock()
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None and entry.expires > now:
+                self.entries[key] = entry
+                return entry
+
+        if self.cache is None:
+            return None
+        shared = self.cache.get(self.cache_key(key))
+        if shared is None:
+            return None
+        channel, ts, text, expires = shared
+        return self.store(
+            key, ThreadEntry(channel, ts, text, 1, expires, now)
+        )
+
+    def set(self, key, channel, ts, text):
+        now = self.clock()
+        expires = now + self.ttl
+        entry = self.store(
+            key, ThreadEntry(channel, ts, text, 1, expires, now)
+        )
+        if self.cache is not None:
+            self.cache.set(
+                self.cache_key(key), (channel, ts, text, expires), self.ttl
+            )
+            self.cache.set(self.cache_key(key) + ':count', 1, self.ttl)
+        return entry
+
+    def store(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return entry
+
+    def increment(self, key, entry):
+        with self.lock:
+            entry.count += 1
+            count = entry.count
+        if self.cache is not None:
+            try:
+                count = self.cache.incr(self.cache_key(key) + ':count')
+            except ValueError:
+                pass
+            else:
+                entry.count = count
+        return count
+
+
+class ThreadedFollowUps(object):
+    """
+    Post the first occurrence of an error as a message and fold repeats
+    into it, either as thread replies (``'reply'``) or by editing an
+    occurrence counter into the original message (``'update'``).
+
+    Updates are coalesced: at most one ``chat.update`` is sent per
+    ``update_interval`` for each message, carrying the latest count.
+    """
+    def __init__(self, mode, cache, update_interval=10, clock=time.time):
+        self.mode = mode
+        self.cache = cache
+        self.update_interval = update_interval
+        self.clock = clock
+        self.lock = threading.Lock()
+
+    def key(self, report, destination):
+        return '%s:%s' % (destination['channel'], report.fingerprint)
+
+    def find(self, report, destination):
+        """Return the message ``report`` would be folded into, if any."""
+        return self.cache.get(self.key(report, destination))
+
+    def deliver(self, transport, report, destination, timeout=None):
+        key = self.key(report, destination)
+        entry = self.cache.get(key)
+
+        if entry is None:
+            response = transport.send(
+                transport.payload(report, destination), destination, timeout
+            )
+            ref = transport.message_ref(response)
+            if ref is not None:
+                self.cache.set(key, ref[0], ref[1], report.text)
+            return response
+
+        self.cache.increment(key, entry)
+        entry.note = report.clients
+        if self.mode == 'reply':
+            if report.clients:
+                report = report._replace(
+                    text='%s\n%s' % (report.text, report.clients)
+                )
+            payload = dict(transport.payload(report, destination))
+            payload['thread_ts'] = entry.ts
+            return transport.send(payload, destination, timeout)
+
+        self.schedule_update(transport, destination, entry, timeout)
+        return None
+
+    def schedule_update(self, transport, destination, entry, timeout):
+        with self.lock:
+            if entry.timer is not None:
+                return
+            delay = max(0, entry.updated + self.update_interval - self.clock())
+            entry.timer = threading.Timer(
+                delay, self.flush_update,
+                (transport, destination, entry, timeout)
+            )
+            entry.timer.daemon = True
+            entry.timer.start()
+
+    def flush_update(self, transport, destination, entry, timeout=None):
+        with self.lock:
+            entry.timer = None
+            entry.updated = self.clock()
+            count = entry.count
+            note = entry.note
+        text = '%s\nOccurred %d times' % (entry.text, count)
+        if note:
+            text += ', %s' % note
+        try:
+            transport.update(
+                destination, entry.channel, entry.ts, text, timeout
+            )
+        except Exception:
+            pass
@@ -0,0 +1,240 @@
+import linecache
+import os
+import traceback
+
+from itertools import groupby
+
+import django
+
+
+LIBRARY_MARKERS = (
+    os.sep + 'site-packages' + os.sep,
+    os.sep + 'dist-packages' + os.sep,
+    os.path.dirname(django.__file__) + os.sep,
+    os.path.dirname(os.__file__) + os.sep,
+)
+
+_library_paths = {}
+_library_paths_limit = 10000
+
+
+def is_library_path(filename):
+    try:
+        return _library_paths[filename]
+    except KeyError:
+        pass
+    if len(_library_paths) >= _library_paths_limit:
+        _library_paths.clear()
+    result = _library_paths[filename] = any(
+        marker in filename for marker in LIBRARY_MARKERS
+    )
+    return result
+
+
+def extract_frames(tb):
+    frames = []
+    while tb is not None:
+        code = tb.tb_frame.f_code
+        frames.append((code.co_filename, tb.tb_lineno, code.co_name))
+        tb = tb.tb_next
+    return frames
+
+
+def fold_cycles(frames, max_period=10, min_repeats=3):
+    """
+    Fold repeated runs of frames, as produced by recursion.
+
+    Returns a list of ``(start, end, repeats)`` entries: a single frame is
+    ``(i, i, 1)``; a cycle of frames ``start..end`` that is immediately
+    repeated ``repeats`` times in total is ``(start, end, repeats)``.
+    """
+    entries = []
+    count = len(frames)
+    i = 0
+    while i < count:
+        best = None
+        for period in range(1, max_period + 1):
+            j = i
+            while j + period < count and frames[j] == frames[j + period]:
+                j += 1
+            repeats = (j - i) // period + 1
+            if repeats >= min_repeats and (
+                best is None or repeats * period > best[0] * best[1]
+            ):
+                best = (repeats, period)
+        if best is None:
+            entries.append((i, i, 1))
+            i += 1
+        else:
+            repeats, period = best
+            entries.append((i, i + period - 1, repeats))
+            i += repeats * period
+    return entries
+
+
+def format_frame(frame):
+    filename, lineno, name = frame
+    line = '  File "%s", line %d, in %s\n' % (filename, lineno, name)
+    source = linecache.getline(filename, lineno).strip()
+    if source:
+        line += '    %s\n' % source
+    return line
+
+
+def compact_frames(frames, max_frames=40, **kwargs):
+    """
+    Yield formatted lines for ``frames`` with recursion cycles folded and
+    runs of library frames collapsed to one line each.
+
+    At most ``max_frames`` entries are rendered (half from each end of the
+    stack), so the output size does not grow with the depth of the stack.
+    """
+    entries = []
+    library_run = []
+    for start, end, repeats in fold_cycles(frames, **kwargs):
+        if repeats == 1 and start < len(frames) - 1 and is_library_path(
+            frames[start][0]
+        ):
+            library_run.append(start)
+            continue
+        if library_run:
+            entries.append(('library', library_run))
+            library_run = []
+        entries.append(('frames', (start, end, repeats)))
+    if library_run:
+        entries.append(('library', library_run))
+
+    if len(entries) > max_frames:
+        head = max_frames // 2
+        omitted = len(entries) - max_frames
+        entries = (
+            entries[:head] + [('omitted', omitted)] +
+            entries[-(max_frames - head):]
+        )
+
+    for kind, value in entries:
+        if kind == 'library':
+            if len(value) == 1:
+                yield format_frame(frames[value[0]])
+            else:
+                yield '  [%d library frames: %s ... %s]\n' % (
+                    len(value), frames[value[0]][0], frames[value[-1]][0]
+                )
+        elif kind == 'omitted':
+            yield '  [%d entries omitted]\n' % value
+        else:
+            start, end, repeats = value
+            for index in range(start, end + 1):
+                yield format_frame(frames[index])
+            if repeats > 1:
+                period = end - start + 1
+                yield '  [frames %d-%d repeated %d times]\n' % (
+                    end + 1, start + repeats * period - 1, repeats - 1
+                )
+
+
+def format_compact_exception(exc_type, exc_value, tb, **kwargs):
+    lines = ['Traceback (most recent call last):\n']
+    lines.extend(compact_frames(extract_frames(tb), **kwargs))
+    lines.extend(traceback.format_exception_only(exc_type, exc_value))
+    return ''.join(lines)
+
+
+CHAIN_HEADERS = {
+    'cause': '\nThe above exception was the direct cause of:\n\n',
+    'context': '\nDuring handling of the above exception, another '
+               'exception occurred:\n\n',
+}
+
+
+def exception_chain(exc_value):
+    """
+    Return ``(exception, relation)`` pairs from the root cause to
+    ``exc_value``, where ``relation`` says how each exception led to the
+    next one (``'cause'``, ``'context'`` or ``None`` for the last).
+    """
+    chain = []
+    seen = set()
+    relation = None
+    while exc_value is not None and id(exc_value) not in seen:
+        seen.add(id(exc_value))
+        chain.append((exc_value, relation))
+        cause = getattr(exc_value, '__cause__', None)
+        if cause is not None:
+            exc_value, relation = cause, 'cause'
+        elif not getattr(exc_value, '__suppress_context__', False):
+            exc_value = getattr(exc_value, '__context__', None)
+            relation = 'context'
+        else:
+            break
+    chain.reverse()
+    return chain
+
+
+def chained_frames(tb, seen, **kwargs):
+    frames = []
+    shared = []
+    while tb is not None:
+        key = (id(tb.tb_frame), tb.tb_lineno)
+        shared.append(key in seen)
+        seen.add(key)
+        code = tb.tb_frame.f_code
+        frames.append((code.co_filename, tb.tb_lineno, code.co_name))
+        tb = tb.tb_next
+
+    for is_shared, group in groupby(range(len(frames)), shared.__getitem__):
+        indexes = list(group)
+        if is_shared:
+            yield '  [%d frames shared with the exception above]\n' % (
+                len(indexes)
+            )
+        else:
+            for line in compact_frames(
+                [frames[index] for index in indexes], **kwargs
+            ):
+                yield line
+
+
+def format_chained_exception(exc_type, exc_value, tb, budget=8000,
+                             **kwargs):
+    """
+    Format an exception together with its ``__cause__``/``__context__``
+    chain, root cause first.
+
+    Frames already printed for an earlier exception in the chain are
+    replaced by a one-line reference. Once ``budget`` characters have been
+    used the remaining links are dropped, keeping only the final exception
+    line.
+    """
+    chain = exception_chain(exc_value)
+    if not chain:
+        return format_compact_exception(exc_type, exc_value, tb, **kwargs)
+
+    pieces = []
+    used = 0
+    seen = set()
+    for index, (value, relation) in enumerate(chain):
+        lines = []
+        if index:
+            lines.append(CHAIN_HEADERS[chain[index - 1][1]])
+        lines.append('Traceback (most recent call last):\n')
+        lines.extend(chained_frames(
+            tb if value is exc_value else getattr(
+                value, '__traceback__', None
+            ),
+            seen, **kwargs
+        ))
+        lines.extend(traceback.format_exception_only(type(value), value))
+        text = ''.join(lines)
+
+        if index and used + len(text) > budget:
+            pieces.append(
+                '\n[%d chained exceptions omitted]\n' % (len(chain) - index)
+            )
+            pieces.extend(
+                traceback.format_exception_only(exc_type, exc_value)
+            )
+            break
+        pieces.append(text)
+        used += len(text)
+    return ''.join(pieces)
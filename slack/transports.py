@@ -0,0 +1,144 @@
+import importlib
+import json
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from slack.uploads import multipart_body, new_boundary
+
+
+class WebAPITransport(object):
+    api_url = 'https://slack.com/api/'
+    supports_threads = True
+    supports_uploads = True
+
+    def __init__(self, api_url=None, pool_maxsize=10):
+        if api_url is not None:
+            self.api_url = api_url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def payload(self, report, destination):
+        return {
+            'token': destination['token'],
+            'channel': destination['channel'],
+            'icon_url': destination['icon_url'],
+            'icon_emoji': destination['icon_emoji'],
+            'username': destination['username'],
+            'text': report.text
+        }
+
+    def call(self, method, data, timeout=None):
+        kwargs = {'timeout': timeout} if timeout is not None else {}
+        return self.session.post(self.api_url + method, data=data, **kwargs)
+
+    def send(self, payload, destination, timeout=None):
+        return self.call('chat.postMessage', payload, timeout)
+
+    def update(self, destination, channel, ts, text, timeout=None):
+        return self.call('chat.update', {
+            'token': destination['token'],
+            'channel': channel,
+            'ts': ts,
+            'text': text
+        }, timeout)
+
+    def upload(self, destination, filename, chunks, filetype='text',
+               content_type='text/plain', title=None, thread_ts=None,
+               timeout=None):
+        boundary = new_boundary()
+        fields = [
+            ('token', destination['token']),
+            # Without a channel the file stays private to the bot.
+            ('channels', destination['channel']),
+            ('filename', filename),
+            ('filetype', filetype),
+        ]
+        if title:
+            fields.append(('title', title))
+        if thread_ts:
+            fields.append(('thread_ts', thread_ts))
+        kwargs = {'timeout': timeout} if timeout is not None else {}
+        return self.session.post(
+            self.api_url + 'files.upload',
+            data=multipart_body(
+                boundary, fields, filename, chunks, content_type
+            ),
+            headers={
+                'Content-Type': 'multipart/form-data; boundary=%s' % boundary
+            },
+            **kwargs
+        )
+
+    def failed(self, response):
+        return response.status_code == 200 and not response.json()['ok']
+
+    def file_permalink(self, response):
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        if not data.get('ok'):
+            return None
+        return data['file']['permalink']
+
+    def message_ref(self, response):
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        if not data.get('ok') or 'ts' not in data:
+            return None
+        return data['channel'], data['ts']
+
+
+class WebhookTransport(object):
+    supports_threads = False
+    supports_uploads = False
+    headers = {'Content-Type': 'application/json'}
+
+    def __init__(self, pool_maxsize=10):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def payload(self, report, destination):
+        body = {'text': report.text}
+        for key in ('channel', 'username', 'icon_url', 'icon_emoji'):
+            if destination.get(key):
+                body[key] = destination[key]
+        return json.dumps(body).encode('utf-8')
+
+    def send(self, payload, destination, timeout=None):
+        return self.session.post(
+            destination['url'], data=payload, headers=self.headers,
+            timeout=timeout
+        )
+
+    def failed(self, response):
+        return response.status_code != 200
+
+
+TRANSPORTS = {
+    'webapi': WebAPITransport,
+    'webhook': WebhookTransport,
+}
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(name):
+    with _transports_lock:
+        if name not in _transports:
+            if name in TRANSPORTS:
+                transport_class = TRANSPORTS[name]
+            else:
+                module_name, class_name = name.rsplit('.', 1)
+                transport_class = getattr(
+                    importlib.import_module(module_name), class_name
+                )
+            _transports[name] = transport_class()
+        return _transports[name]
@@ -0,0 +1,42 @@
+import uuid
+
+from django.utils.encoding import force_bytes
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+def new_boundary():
+    return uuid.uuid4().hex
+
+
+def encode_chunks(chunks, chunk_size=CHUNK_SIZE):
+    for chunk in chunks:
+        for start in range(0, len(chunk), chunk_size):
+            yield force_bytes(chunk[start:start + chunk_size])
+
+
+def multipart_body(boundary, fields, filename, chunks,
+                   content_type='text/plain'):
+    """
+    Generate a ``multipart/form-data`` body with a single file part.
+
+    The file content is taken from ``chunks`` as it is sent, so the upload
+    never holds more than one encoded chunk in memory.
+    """
+    for name, value in fields:
+        yield force_bytes(
+            '--%s\r\nContent-Disposition: form-data; name="%s"\r\n\r\n' % (
+                boundary, name
+            )
+        )
+        yield force_bytes(value) + b'\r\n'
+    yield force_bytes(
+        '--%s\r\nContent-Disposition: form-data; name="file"; '
+        'filename="%s"\r\nContent-Type: %s\r\n\r\n' % (
+            boundary, filename, content_type
+        )
+    )
+    for chunk in encode_chunks(chunks):
+        yield chunk
+    yield force_bytes('\r\n--%s--\r\n' % boundary)
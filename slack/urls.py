@@ -9,6 +9,7 @@ admin.autodiscover()
 
 urlpatterns = patterns('',
     url(r'^$', TemplateView.as_view(template_name='base.html')),
+    url(r'^errors/$', 'slack.views.error_history', name='slack_error_history'),
 
     # Examples:
     # url(r'^$', 'slack.views.home', name='home'),
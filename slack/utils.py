@@ -1,26 +1,539 @@
-import requests
+import logging
+import threading
+import time
 import traceback
 
 from django.conf import settings
 from django.core import mail
+from django.core.cache import get_cache
 from django.views.debug import ExceptionReporter, get_exception_reporter_filter
 from django.utils.log import AdminEmailHandler
 
+from slack import breadcrumbs, outbox
+from slack.backoff import BackoffTable
+from slack.budget import CpuBudget, innermost_frame, thread_cpu_time
+from slack.digests import format_top_errors
+from slack.drain import TemplateMiner
+from slack.fanout import SKIPPED, fan_out
+from slack.fingerprints import describe, fingerprint
+from slack.floods import ClientFloods, format_flood
+from slack.frames import format_locals, lazy_repr
+from slack.hostqueue import get_host_queue
+from slack.networks import NetworkIndex, client_address
+from slack.priority import DeliveryQueue, format_dropped
+from slack.rates import RateTracker
+from slack.redaction import DEFAULT_PATTERNS, Redactor
+from slack.registry import get_registry, in_flush
+from slack.reports import Report
+from slack.sampling import AdaptiveSampler
+from slack.sketches import DistinctCounter, SpaceSaving
+from slack.summaries import summarize_request
+from slack.threads import ThreadCache, ThreadedFollowUps
+from slack.tracebacks import (
+    format_chained_exception, format_compact_exception
+)
+from slack.transports import get_transport
+
+
+# CPU budget transitions are logged here, with the budget's stats in the
+# record's ``slack_cpu_budget`` attribute. The handler ignores this logger.
+budget_logger = logging.getLogger('slack.budget')
+
 
 class SlackHandler(AdminEmailHandler):
+    def __init__(self, transport=None, **kwargs):
+        super(SlackHandler, self).__init__(**kwargs)
+        self.transport = transport
+        self.follow_ups = None
+        self.heavy_hitters = None
+        self.digest_started = time.time()
+        self.distinct_ips = None
+        self.distinct_users = None
+        self.clients_synced = time.time()
+        self.rate_tracker = None
+        self.delivery_queue = None
+        self.backoff = None
+        self.sampler = None
+        self.cpu_budget = None
+        self.floods = None
+        self.networks = {}
+        self.redactor = None
+        self.redactor_patterns = None
+        self.template_miner = None
+        self.housekeeping_timer = None
+
     def app_setting(self, suffix, default):
         return getattr(settings, 'SLACK_%s' % suffix, default)
 
     def emit(self, record):
         is_slack_enabled = getattr(settings, 'IS_SLACK_ENABLED', False)
-        if not is_slack_enabled:
+        if not is_slack_enabled or in_flush() or (
+            record.name == budget_logger.name
+        ):
+            return
+
+        budget = self.get_cpu_budget()
+        if budget is None:
+            self.process(record)
+            return
+
+        started = thread_cpu_time()
+        try:
+            self.process(record, budget.degraded)
+        finally:
+            transition = budget.record(thread_cpu_time() - started)
+        if transition is not None:
+            self.notify_budget(transition, budget)
+
+    def process(self, record, minimal=False):
+        # Every record is counted, including those sampled out below; that
+        # much takes no formatting.
+        self.mine_template(record)
+        key = fingerprint(record)
+        self.track(record, key)
+
+        sampled = self.sample(record)
+        if sampled is None:
+            return
+        if not self.allow(record, key) or self.shed(record, key):
+            return
+
+        if self.app_setting('ERROR_HISTORY', False):
+            self.get_registry().add_event(
+                key, record.name, record.levelname,
+                record.exc_info[0].__name__
+                if record.exc_info and record.exc_info[0] else '',
+                getattr(getattr(record, 'request', None), 'path', '') or ''
+            )
+
+        if minimal:
+            report = self.render_minimal(record, key, sampled)
+        else:
+            report = self.render(record, key, sampled)
+        self.dispatch(self.redact(report))
+
+    def get_redactor(self):
+        if not self.app_setting('REDACT', False):
+            return None
+        patterns = self.app_setting('REDACT_PATTERNS', {})
+        if self.redactor is None or self.redactor_patterns != patterns:
+            self.redactor = Redactor(
+                DEFAULT_PATTERNS + tuple(sorted(patterns.items()))
+            )
+            self.redactor_patterns = patterns
+        return self.redactor
+
+    def redact(self, report):
+        """Remove secrets from every outgoing part of ``report``."""
+        redactor = self.get_redactor()
+        if redactor is None:
+            return report
+        attachment = report.attachment
+        if attachment is not None:
+            # Chunk by chunk, so the report is never built as one string.
+            # Each chunk is a whole section or parameter, which a secret
+            # does not span.
+            attachment = tuple(redactor.redact(chunk) for chunk in attachment)
+        return report._replace(
+            subject=redactor.redact(report.subject),
+            text=redactor.redact(report.text),
+            message=redactor.redact(report.message),
+            html_message=redactor.redact(report.html_message),
+            attachment=attachment
+        )
+
+    def mine_template(self, record):
+        """
+        Set the template of a message logged already formatted, so that
+        "Payment 8812 failed" and "Payment 77 failed" are grouped together.
+        With ``record.args`` the unformatted ``record.msg`` is the template.
+        """
+        if not self.app_setting('TEMPLATE_MINING', False) or record.args or (
+            record.exc_info and record.exc_info[0] is not None
+        ):
+            return
+        if self.template_miner is None:
+            self.template_miner = TemplateMiner(
+                depth=self.app_setting('TEMPLATE_MINING_DEPTH', 4),
+                similarity=self.app_setting('TEMPLATE_MINING_SIMILARITY', 0.4),
+                max_clusters=self.app_setting(
+                    'TEMPLATE_MINING_MAX_TEMPLATES', 1000
+                )
+            )
+        cluster = self.template_miner.learn(record.getMessage())
+        record.slack_template = cluster.template
+        record.slack_template_id = cluster.id
+
+    def get_cpu_budget(self):
+        budget = self.app_setting('CPU_BUDGET', None)
+        if not budget:
+            return None
+        if self.cpu_budget is None:
+            self.cpu_budget = CpuBudget(
+                budget,
+                window=self.app_setting('CPU_BUDGET_WINDOW', 10),
+                recover=self.app_setting('CPU_BUDGET_RECOVER', 0.5)
+            )
+        return self.cpu_budget
+
+    def notify_budget(self, transition, budget):
+        stats = budget.stats()
+        budget_logger.log(
+            logging.WARNING if transition == 'degraded' else logging.INFO,
+            'Slack handler %s: CPU time is %.1f%% of wall time, %d records '
+            'sent in the minimal format in %.0f seconds', transition,
+            stats['usage'] * 100, stats['degraded_records'],
+            stats['degraded_seconds'], extra={'slack_cpu_budget': stats}
+        )
+        if transition == 'degraded':
+            self.notify('Slack handler degraded', (
+                'Slack handler degraded: its CPU time is %.1f%% of wall time, '
+                'over the budget of %.1f%%. Alerts are sent in a minimal '
+                'format until it drops below %.1f%%.' % (
+                    stats['usage'] * 100, budget.budget * 100,
+                    budget.budget * budget.recover * 100
+                )
+            ))
+
+    def sample(self, record):
+        budgets = self.app_setting('SAMPLING', None)
+        if not budgets:
+            return 1
+        if self.sampler is None or self.sampler.budgets != budgets:
+            self.sampler = AdaptiveSampler(
+                budgets, window=self.app_setting('SAMPLING_WINDOW', 60)
+            )
+        return self.sampler.sample(record.name)
+
+    def allow(self, record, key):
+        allowed = True
+        if self.app_setting('SPIKE_DETECTION', False):
+            if self.rate_tracker is None:
+                self.rate_tracker = RateTracker(
+                    bucket=self.app_setting('SPIKE_BUCKET', 60),
+                    alpha=self.app_setting('SPIKE_ALPHA', 0.1),
+                    threshold=self.app_setting('SPIKE_THRESHOLD', 20),
+                    min_count=self.app_setting('SPIKE_MIN_COUNT', 10),
+                    max_keys=self.app_setting('SPIKE_MAX_KEYS', 1000)
+                )
+            by_fingerprint = self.rate_tracker.observe(key)
+            by_logger = self.rate_tracker.observe('logger:%s' % record.name)
+            if by_fingerprint is None and by_logger != 'spike':
+                allowed = False
+
+        if self.app_setting('NOTIFY_BACKOFF', False):
+            if self.backoff is None:
+                self.backoff = BackoffTable(
+                    size=self.app_setting('NOTIFY_BACKOFF_SIZE', 131072),
+                    base=self.app_setting('NOTIFY_BACKOFF_BASE', 10),
+                    reset=self.app_setting('NOTIFY_BACKOFF_RESET', 3600)
+                )
+            if self.backoff.observe(key) is None:
+                allowed = False
+
+        if self.app_setting('CLIENT_FLOODS', False):
+            if self.floods is None:
+                self.floods = ClientFloods(
+                    window=self.app_setting('CLIENT_FLOODS_WINDOW', 60),
+                    threshold=self.app_setting('CLIENT_FLOODS_THRESHOLD', 20),
+                    max_clients=self.app_setting(
+                        'CLIENT_FLOODS_MAX_CLIENTS', 10000
+                    ),
+                    summary_interval=self.app_setting(
+                        'CLIENT_FLOODS_SUMMARY_INTERVAL', 600
+                    )
+                )
+            for client in self.clients(record):
+                if not self.floods.observe(client):
+                    allowed = False
+            self.sweep_floods()
+            self.schedule_housekeeping()
+        return allowed
+
+    def sweep_floods(self):
+        if self.floods is None:
+            return
+        for summary in self.floods.sweep():
+            self.notify('Client flood', format_flood(*summary))
+
+    def clients(self, record):
+        request = getattr(record, 'request', None)
+        if request is None:
+            return []
+        clients = []
+        ip = self.client_ip(request)
+        if ip:
+            clients.append('IP %s' % ip)
+        user = self.client_user(request)
+        if user is not None:
+            clients.append('user %s' % user)
+        return clients
+
+    def client_ip(self, request):
+        proxies = self.app_setting('TRUSTED_PROXIES', None)
+        if not proxies:
+            return request.META.get('REMOTE_ADDR')
+        return client_address(request.META, self.network_index(proxies))
+
+    def is_internal(self, ip):
+        internal = settings.INTERNAL_IPS
+        # Leave custom containers (such as a glob matcher) to themselves.
+        if not isinstance(internal, (list, tuple, set, frozenset)):
+            return ip in internal
+        return ip in self.network_index(internal)
+
+    def network_index(self, networks):
+        # Compiled once per setting value; settings are not expected to
+        # change except in tests.
+        cached = self.networks.get(id(networks))
+        if cached is None or cached[0] is not networks:
+            cached = self.networks[id(networks)] = (
+                networks, NetworkIndex(networks)
+            )
+        return cached[1]
+
+    def client_user(self, request):
+        # Never load the user just for counting.
+        user = getattr(request, 'user', None)
+        if user is not None and lazy_repr(user) is None and getattr(
+            user, 'is_authenticated', lambda: False
+        )():
+            return user.pk
+        return None
+
+    def dispatch(self, report):
+        destinations = self.app_setting('DESTINATIONS', None)
+        if self.enqueue(report, destinations or [{}]):
+            return
+        if self.app_setting('PRIORITY_QUEUE', False):
+            queue = self.get_delivery_queue()
+            queue.put(
+                report.level or logging.WARNING, (report, destinations),
+                report.fingerprint, report.subject
+            )
+            queue.start(self.send_prioritized, self.notify_dropped)
+            return
+        self.send_now(report, destinations)
+
+    def send_now(self, report, destinations):
+        if destinations:
+            self.fan_out(report, destinations)
+        else:
+            self.deliver(report, {})
+
+    def shed(self, record, key):
+        """
+        Return True if the priority queue has no room for ``record``. It is
+        counted as dropped without being rendered.
+        """
+        if not self.app_setting('PRIORITY_QUEUE', False):
+            return False
+        queue = self.get_delivery_queue()
+        return queue.reject(
+            record.levelno, key,
+            describe(record) if queue.policy == 'collapse' else None
+        )
+
+    def get_delivery_queue(self):
+        if self.delivery_queue is None:
+            self.delivery_queue = DeliveryQueue(
+                capacity=self.app_setting('PRIORITY_QUEUE_CAPACITY', None),
+                max_size=self.app_setting('PRIORITY_QUEUE_SIZE', 2000),
+                aging=self.app_setting('PRIORITY_QUEUE_AGING', 30),
+                policy=self.app_setting('OVERFLOW_POLICY', 'drop-newest'),
+                block_timeout=self.app_setting('OVERFLOW_BLOCK_TIMEOUT', 0.1)
+            )
+        return self.delivery_queue
+
+    def send_prioritized(self, level, item):
+        self.send_now(*item)
+
+    def notify_dropped(self, dropped, collapsed):
+        text = format_dropped(dropped, collapsed)
+        self.send_now(Report(
+            subject='Slack alerts dropped',
+            text='```%s```' % text,
+            message=text,
+            html_message=None
+        ), self.app_setting('DESTINATIONS', None))
+
+    def enqueue(self, report, destinations):
+        use_outbox = self.app_setting('OUTBOX', False)
+        queue_path = self.app_setting('HOST_QUEUE', None)
+        if not use_outbox and not queue_path:
+            return False
+
+        entries = [
+            (destination, 'email' if destination.get('type') == 'email'
+             else self.destination_settings(destination)['channel'])
+            for destination in destinations
+        ]
+        try:
+            if use_outbox:
+                outbox.enqueue(
+                    report, entries,
+                    self.app_setting('OUTBOX_DATABASE', 'default')
+                )
+            else:
+                queue = self.get_host_queue(queue_path)
+                queue.put(report, entries, report.level or 0)
+                queue.start(self.send_queued, self.mail_admins)
+        except Exception:
+            # Deliver inline rather than lose the alert.
+            return False
+        return True
+
+    def get_host_queue(self, path):
+        return get_host_queue(
+            path,
+            lease=self.app_setting('HOST_QUEUE_LEASE', 10),
+            max_attempts=self.app_setting('OUTBOX_MAX_ATTEMPTS', 5),
+            retry_delay=self.app_setting('OUTBOX_RETRY_DELAY', 10),
+            max_age=self.app_setting('HOST_QUEUE_MAX_AGE', 86400),
+            timeout=self.app_setting('FANOUT_TIMEOUT', 5),
+            pool_size=self.app_setting('FANOUT_POOL_SIZE', 4),
+            limiter=outbox.ChannelLimiter(
+                rate=self.app_setting('OUTBOX_CHANNEL_RATE', 1),
+                burst=self.app_setting('OUTBOX_CHANNEL_BURST', 3)
+            )
+        )
+
+    def send_queued(self, report, destination, timeout=None):
+        if destination.get('type') == 'email':
+            self.mail_admins(report)
+            return True
+        return self.post(report, destination, timeout)
+
+    def notify(self, subject, text):
+        self.dispatch(Report(
+            subject=subject,
+            text='```%s```' % text,
+            message=text,
+            html_message=None
+        ))
+
+    def track(self, record, key):
+        # emit() runs under the handler lock, so the trackers need no
+        # locking of their own.
+        self.track_clients(record, key)
+
+        if self.app_setting('ERROR_REGISTRY', False):
+            self.get_registry().add(
+                key, record.name, record.levelname, describe(record)
+            )
+
+        interval = self.app_setting('DIGEST_INTERVAL', None)
+        if not interval:
+            return
+
+        if self.heavy_hitters is None:
+            self.heavy_hitters = SpaceSaving(
+                self.app_setting('HEAVY_HITTERS_CAPACITY', 100)
+            )
+        self.heavy_hitters.add(key, describe(record))
+        self.check_digest()
+        self.schedule_housekeeping()
+
+    def check_digest(self):
+        interval = self.app_setting('DIGEST_INTERVAL', None)
+        now = time.time()
+        if interval and now - self.digest_started >= interval:
+            self.send_digest(now - self.digest_started)
+            self.digest_started = now
+
+    def schedule_housekeeping(self):
+        """
+        While a flood or a digest is pending, run ``housekeeping`` when it is
+        next due, so its summary is sent even if no other record arrives.
+        """
+        if self.housekeeping_timer is not None:
+            return
+        delays = []
+        if self.floods is not None and self.floods.floods:
+            delays.append(self.floods.window)
+        interval = self.app_setting('DIGEST_INTERVAL', None)
+        if self.heavy_hitters is not None and interval:
+            delays.append(self.digest_started + interval - time.time())
+        if not delays:
+            return
+        self.housekeeping_timer = threading.Timer(
+            max(0, min(delays)), self.housekeeping
+        )
+        self.housekeeping_timer.daemon = True
+        self.housekeeping_timer.start()
+
+    def housekeeping(self):
+        self.acquire()
+        try:
+            self.housekeeping_timer = None
+            self.sweep_floods()
+            self.check_digest()
+            self.schedule_housekeeping()
+        except Exception:
+            pass
+        finally:
+            self.release()
+
+    def get_registry(self):
+        return get_registry(
+            interval=self.app_setting('ERROR_REGISTRY_INTERVAL', 5),
+            batch_size=self.app_setting('ERROR_REGISTRY_BATCH_SIZE', 500)
+        )
+
+    def send_digest(self, window):
+        heavy_hitters, self.heavy_hitters = self.heavy_hitters, None
+        if not heavy_hitters:
             return
+        self.notify('Top errors', format_top_errors(
+            heavy_hitters.top(self.app_setting('DIGEST_SIZE', 10)),
+            heavy_hitters.total, window, annotate=self.describe_clients
+        ))
 
-        TOKEN = self.app_setting('TOKEN', None)
-        CHANNEL = self.app_setting('CHANNEL', '#general')
-        USERNAME = self.app_setting('USERNAME', 'django')
-        ICON_URL = self.app_setting('ICON_URL', None)
-        ICON_EMOJI = self.app_setting('ICON_EMOJI', None)
+    def track_clients(self, record, key):
+        if not self.app_setting('DISTINCT_CLIENTS', False):
+            return
+        request = getattr(record, 'request', None)
+        if request is None:
+            return
+
+        if self.distinct_ips is None:
+            max_keys = self.app_setting('DISTINCT_CLIENTS_MAX_KEYS', 1000)
+            self.distinct_ips = DistinctCounter('ip', max_keys)
+            self.distinct_users = DistinctCounter('user', max_keys)
+
+        ip = self.client_ip(request)
+        if ip:
+            self.distinct_ips.add(key, ip)
+        user = self.client_user(request)
+        if user is not None:
+            self.distinct_users.add(key, user)
+
+        alias = self.app_setting('DISTINCT_CLIENTS_CACHE_ALIAS', None)
+        now = time.time()
+        if alias and now - self.clients_synced >= self.app_setting(
+            'DISTINCT_CLIENTS_SYNC_INTERVAL', 30
+        ):
+            self.clients_synced = now
+            cache = get_cache(alias)
+            try:
+                self.distinct_ips.sync(cache)
+                self.distinct_users.sync(cache)
+            except Exception:
+                pass
+
+    def describe_clients(self, key):
+        if self.distinct_ips is None:
+            return None
+        ips = self.distinct_ips.estimate(key)
+        users = self.distinct_users.estimate(key)
+        parts = []
+        if ips:
+            parts.append('~%s IPs' % format(ips, ','))
+        if users:
+            parts.append('~%s users' % format(users, ','))
+        return ', '.join(parts) or None
+
+    def render(self, record, key=None, sampled=None):
         PARAMS = self.app_setting('PARAMS', None)
 
         try:
@@ -28,86 +541,312 @@ class SlackHandler(AdminEmailHandler):
             subject = '%s (%s IP): %s' % (
                 record.levelname,
                 (
-                    'internal' if request.META.get(
-                        'REMOTE_ADDR'
-                    ) in settings.INTERNAL_IPS
+                    'internal' if self.is_internal(self.client_ip(request))
                     else 'EXTERNAL'
                 ),
                 record.getMessage()
             )
             filter = get_exception_reporter_filter(request)
-            request_repr = filter.get_request_repr(request)
+            summary_fields = self.app_setting('REQUEST_SUMMARY', None)
+            if summary_fields:
+                request_repr = list(summarize_request(
+                    request, summary_fields, filter,
+                    self.app_setting('REQUEST_SUMMARY_MAX_LENGTH', 200)
+                ))
+            else:
+                request_repr = [filter.get_request_repr(request)]
         except Exception:
             subject = '%s: %s' % (
                 record.levelname,
                 record.getMessage()
             )
             request = None
-            request_repr = "Request repr() unavailable."
+            filter = None
+            request_repr = ["Request repr() unavailable."]
         subject = self.format_subject(subject)
+        occurrences = self.backoff.count(key) if (
+            self.backoff is not None and key
+        ) else 0
+        if occurrences > 1:
+            subject += ' (%d occurrences)' % occurrences
+        if sampled and sampled > 1:
+            subject += ' (1 of ~%d)' % sampled
 
         if record.exc_info:
             exc_info = record.exc_info
-            stack_trace = '\n'.join(
-                traceback.format_exception(*record.exc_info)
-            )
+            if self.app_setting('CHAINED_TRACEBACKS', False):
+                stack_trace = format_chained_exception(
+                    *record.exc_info,
+                    budget=self.app_setting('TRACEBACK_BUDGET', 8000),
+                    max_frames=self.app_setting('TRACEBACK_MAX_FRAMES', 40)
+                )
+            elif self.app_setting('COMPACT_TRACEBACKS', False):
+                stack_trace = format_compact_exception(
+                    *record.exc_info,
+                    max_frames=self.app_setting('TRACEBACK_MAX_FRAMES', 40)
+                )
+            else:
+                stack_trace = '\n'.join(
+                    traceback.format_exception(*record.exc_info)
+                )
+            locals_frames = self.app_setting('LOCALS_FRAMES', 0)
+            if locals_frames:
+                stack_trace += '\nLocals (innermost first):\n' + ''.join(
+                    format_locals(
+                        record.exc_info[2],
+                        max_frames=locals_frames,
+                        max_length=self.app_setting('LOCALS_MAX_LENGTH', 200),
+                        max_frame_length=self.app_setting(
+                            'LOCALS_FRAME_MAX_LENGTH', 2000
+                        ),
+                        time_budget=self.app_setting(
+                            'LOCALS_TIME_BUDGET', 0.05
+                        ),
+                        filter=(
+                            filter or get_exception_reporter_filter(request)
+                        ),
+                        request=request
+                    )
+                )
         else:
             exc_info = (None, record.getMessage(), None)
             stack_trace = 'No stack trace available'
 
-        message = "%s\n\n%s" % (stack_trace, request_repr)
+        if self.app_setting('BREADCRUMBS', False):
+            crumbs = breadcrumbs.snapshot()
+            if crumbs:
+                stack_trace += '\nBreadcrumbs:\n' + ''.join(crumbs)
+
         reporter = ExceptionReporter(request, is_email=True, *exc_info)
         html_message = (
             reporter.get_traceback_html() if self.include_html else None
         )
 
-        text = subject+'\n'
+        body = [subject, '\n']
 
         order_list = ['GET', 'POST', 'COOKIES', 'META']
 
         if PARAMS:
-            text += stack_trace + '\n'
-            for key in order_list:
-                if key in PARAMS and PARAMS[key]:
-                    if isinstance(PARAMS[key], dict):
-                        text += '%s: {' % key
-                        for each in PARAMS[key]:
-                            if each in PARAMS[key] and PARAMS[key][each]:
-                                if each in eval('request.%s' % key):
-                                    text += '%s: %s,\n' % (
-                                        each, eval('request.%s["%s"]' % (
-                                            key, each)
-                                        )
-                                    )
-                        text += '}\n'
+            redactor = self.get_redactor()
+            body.extend([stack_trace, '\n'])
+            for part in order_list:
+                if part in PARAMS and PARAMS[part]:
+                    source = getattr(request, part)
+                    if redactor is not None:
+                        source = redactor.scrub(source)
+                    if isinstance(PARAMS[part], dict):
+                        body.append('%s: {' % part)
+                        for each in PARAMS[part]:
+                            if each in PARAMS[part] and PARAMS[part][each]:
+                                if each in source:
+                                    body.append('%s: %s,\n' % (
+                                        each, source[each]
+                                    ))
+                        body.append('}\n')
                     else:
-                        text += '%s: %s\n' % (key, eval('request.%s' % key))
+                        body.append('%s: %s\n' % (part, source))
+        else:
+            body.extend([stack_trace, '\n\n'])
+            body.extend(request_repr)
+
+        threshold = self.app_setting('UPLOAD_THRESHOLD', None)
+        if threshold is not None and sum(map(len, body)) > threshold:
+            if record.exc_info:
+                summary = traceback.format_exception_only(
+                    *record.exc_info[:2]
+                )[-1].strip()
+                text = '```%s\n%s```' % (subject, summary)
+            else:
+                text = '```%s```' % subject
+            attachment = tuple(body)
+        else:
+            text = '```%s```' % ''.join(body)
+            attachment = None
+
+        if attachment is not None and not PARAMS:
+            # The attachment holds the same sections; mail_admins() joins
+            # them if the report is emailed.
+            message = None
         else:
-            text += message
-
-        data = {
-            'token': TOKEN,
-            'channel': CHANNEL,
-            'icon_url': ICON_URL,
-            'icon_emoji': ICON_EMOJI,
-            'username': USERNAME,
-            'text': '```%s```' % text
+            message = '%s\n\n%s' % (stack_trace, ''.join(request_repr))
+
+        return Report(
+            subject=subject,
+            text=text,
+            message=message,
+            html_message=html_message,
+            fingerprint=key or fingerprint(record),
+            attachment=attachment,
+            clients=self.describe_clients(key) if key else None,
+            level=record.levelno
+        )
+
+    def render_minimal(self, record, key=None, sampled=None):
+        """
+        Render only the exception type, message and innermost frame, for
+        when the handler is over its CPU budget.
+        """
+        subject = self.format_subject('%s: %s' % (
+            record.levelname, record.getMessage()
+        ))
+        if sampled and sampled > 1:
+            subject += ' (1 of ~%d)' % sampled
+        lines = [subject]
+        if record.exc_info and record.exc_info[0]:
+            lines.append(traceback.format_exception_only(
+                *record.exc_info[:2]
+            )[-1].strip())
+            if record.exc_info[2] is not None:
+                lines.append('  ' + innermost_frame(record.exc_info[2]))
+        message = '\n'.join(lines)
+        return Report(
+            subject=subject,
+            text='```%s```' % message,
+            message=message,
+            html_message=None,
+            fingerprint=key or fingerprint(record),
+            level=record.levelno
+        )
+
+    def fan_out(self, report, destinations):
+        default_timeout = self.app_setting('FANOUT_TIMEOUT', 5)
+        tasks = []
+        for destination in destinations:
+            timeout = destination.get('timeout', default_timeout)
+            if destination.get('type') == 'email':
+                tasks.append((self.mail_admins, (report,), timeout))
+            else:
+                tasks.append(
+                    (self.deliver, (report, destination, timeout), timeout)
+                )
+        results = fan_out(
+            tasks, self.app_setting('FANOUT_POOL_SIZE', 4), skipped=SKIPPED
+        )
+        for (func, args, timeout), result in zip(tasks, results):
+            if result is SKIPPED:
+                # The pool stayed busy (it is shared with the drainers);
+                # send inline rather than lose the alert.
+                func(*args)
+        return results
+
+    def destination_settings(self, destination):
+        return {
+            'token': destination.get('token', self.app_setting('TOKEN', None)),
+            'channel': destination.get(
+                'channel', self.app_setting('CHANNEL', '#general')
+            ),
+            'icon_url': destination.get(
+                'icon_url', self.app_setting('ICON_URL', None)
+            ),
+            'icon_emoji': destination.get(
+                'icon_emoji', self.app_setting('ICON_EMOJI', None)
+            ),
+            'username': destination.get(
+                'username', self.app_setting('USERNAME', 'django')
+            ),
+            'url': destination.get(
+                'url', self.app_setting('WEBHOOK_URL', None)
+            ),
         }
 
+    def get_transport(self, destination):
+        return get_transport(
+            destination.get('transport') or self.transport or
+            self.app_setting('TRANSPORT', 'webapi')
+        )
+
+    def get_follow_ups(self):
+        mode = self.app_setting('THREADS', None)
+        if not mode:
+            return None
+        if self.follow_ups is None or self.follow_ups.mode != mode:
+            alias = self.app_setting('THREAD_CACHE_ALIAS', None)
+            self.follow_ups = ThreadedFollowUps(
+                mode,
+                ThreadCache(
+                    max_size=self.app_setting('THREAD_CACHE_SIZE', 1000),
+                    ttl=self.app_setting('THREAD_TTL', 3600),
+                    cache=get_cache(alias) if alias else None
+                ),
+                update_interval=self.app_setting('THREAD_UPDATE_INTERVAL', 10)
+            )
+        return self.follow_ups
+
+    def deliver(self, report, destination, timeout=None):
         try:
-            response = requests.post(
-                'https://slack.com/api/chat.postMessage', data=data
-            )
-            if response.status_code == 200:
-                if not response.json()['ok']:
-                    mail.mail_admins(
-                        subject, message, fail_silently=True,
-                        html_message=html_message,
-                        connection=self.connection()
-                    )
+            if not self.post(report, destination, timeout):
+                self.mail_admins(report)
         except:
-            mail.mail_admins(
-                subject, message, fail_silently=True,
-                html_message=html_message,
-                connection=self.connection()
+            self.mail_admins(report)
+
+    def post(self, report, destination, timeout=None):
+        """
+        Send ``report`` to ``destination`` and return whether Slack
+        accepted it. Errors from the transport are raised.
+        """
+        transport = self.get_transport(destination)
+        destination = self.destination_settings(destination)
+        follow_ups = self.get_follow_ups()
+        threaded = follow_ups is not None and report.fingerprint and getattr(
+            transport, 'supports_threads', False
+        )
+
+        if report.attachment is not None:
+            # Uploads shared to the channel show up as messages of their
+            # own, so repeats put theirs in the thread, or none at all when
+            # only the counter of the first message is updated.
+            entry = follow_ups.find(report, destination) if threaded else None
+            if entry is None:
+                report = self.attach(report, transport, destination, timeout)
+            elif follow_ups.mode == 'reply':
+                report = self.attach(
+                    report, transport, destination, timeout, entry.ts
+                )
+            else:
+                report = report._replace(attachment=None)
+        if threaded:
+            response = follow_ups.deliver(
+                transport, report, destination, timeout
+            )
+        else:
+            response = transport.send(
+                transport.payload(report, destination), destination, timeout
             )
+        return response is None or not transport.failed(response)
+
+    def attach(self, report, transport, destination, timeout=None,
+               thread_ts=None):
+        if not getattr(transport, 'supports_uploads', False):
+            return report._replace(
+                text='```%s```' % ''.join(report.attachment), attachment=None
+            )
+
+        links = [transport.file_permalink(transport.upload(
+            destination, 'traceback.txt', report.attachment,
+            title=report.subject, thread_ts=thread_ts, timeout=timeout
+        ))]
+        if links[0] is None:
+            # The report is too long to post inline; email it rather than
+            # lose it.
+            self.mail_admins(report)
+        if report.html_message and self.app_setting('UPLOAD_HTML', False):
+            links.append(transport.file_permalink(transport.upload(
+                destination, 'traceback.html', [report.html_message],
+                filetype='html', content_type='text/html',
+                title=report.subject, thread_ts=thread_ts, timeout=timeout
+            )))
+
+        text = report.text + '\n' + ' '.join(
+            '<%s|Full report>' % link for link in links if link
+        )
+        return report._replace(text=text, attachment=None)
+
+    def mail_admins(self, report):
+        message = report.message
+        if message is None:
+            message = ''.join(report.attachment or ())
+        mail.mail_admins(
+            report.subject, message, fail_silently=True,
+            html_message=report.html_message,
+            connection=self.connection()
+        )
@@ -0,0 +1,27 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import render
+
+from slack.history import (
+    approximate_count, filter_events, keyset_page, page_size
+)
+from slack.models import ErrorEvent
+
+
+@staff_member_required
+def error_history(request):
+    events = filter_events(ErrorEvent.objects.all(), request.GET)
+    page, next_cursor = keyset_page(
+        events, request.GET.get('cursor'), page_size(request.GET.get('size'))
+    )
+    count, exact = approximate_count(events)
+
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    return render(request, 'slack/error_history.html', {
+        'events': page,
+        'next_cursor': next_cursor,
+        'count': count,
+        'count_exact': exact,
+        'query': params.urlencode(),
+        'params': request.GET,
+    })